@@ -0,0 +1,35 @@
+"""storage usage counters
+
+Revision ID: 2c8e5a7d1f46
+Revises: 9a6d2f4b8e03
+Create Date: 2026-10-18 16:02:41.552917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2c8e5a7d1f46'
+down_revision: Union[str, Sequence[str], None] = '9a6d2f4b8e03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('storage_usage',
+    sa.Column('key', sa.String(length=50), nullable=False),
+    sa.Column('bytes', sa.BigInteger(), nullable=False),
+    sa.Column('files', sa.BigInteger(), nullable=False),
+    sa.Column('reconciled_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('storage_usage')
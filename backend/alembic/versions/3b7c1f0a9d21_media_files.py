@@ -0,0 +1,45 @@
+"""media files (responsive variants)
+
+Revision ID: 3b7c1f0a9d21
+Revises: e939f41d5a96
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7c1f0a9d21'
+down_revision: Union[str, Sequence[str], None] = 'e939f41d5a96'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('media_files',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('url', sa.String(length=512), nullable=False),
+    sa.Column('filename', sa.String(length=255), nullable=False),
+    sa.Column('width', sa.Integer(), nullable=False),
+    sa.Column('height', sa.Integer(), nullable=False),
+    sa.Column('variants', sa.JSON(), nullable=False),
+    sa.Column('original_size', sa.BigInteger(), nullable=True),
+    sa.Column('final_size', sa.BigInteger(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['app_users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_media_files_id'), 'media_files', ['id'], unique=False)
+    op.create_index(op.f('ix_media_files_url'), 'media_files', ['url'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_media_files_url'), table_name='media_files')
+    op.drop_index(op.f('ix_media_files_id'), table_name='media_files')
+    op.drop_table('media_files')
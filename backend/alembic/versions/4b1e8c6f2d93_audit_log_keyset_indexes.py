@@ -0,0 +1,47 @@
+"""audit log keyset pagination indexes
+
+Revision ID: 4b1e8c6f2d93
+Revises: 7d3f9b2e6a51
+Create Date: 2026-10-18 18:05:37.214690
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b1e8c6f2d93'
+down_revision: Union[str, Sequence[str], None] = '7d3f9b2e6a51'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_audit_logs_created_at_id', ['created_at', 'id']),
+    ('ix_audit_logs_action_created_at_id', ['action', 'created_at', 'id']),
+    ('ix_audit_logs_user_id_created_at_id', ['user_id', 'created_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # audit_logs může mít miliony řádků -> CONCURRENTLY (bez zamčení tabulky pro zápis),
+    # to ale nesmí běžet uvnitř transakce
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            op.create_index(name, 'audit_logs', columns, unique=False,
+                            postgresql_concurrently=True, if_not_exists=True)
+        # Pokrývá ho index (action, created_at, id)
+        op.drop_index('ix_audit_logs_action', table_name='audit_logs',
+                      postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_audit_logs_action', 'audit_logs', ['action'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+        for name, _ in reversed(INDEXES):
+            op.drop_index(name, table_name='audit_logs',
+                          postgresql_concurrently=True, if_exists=True)
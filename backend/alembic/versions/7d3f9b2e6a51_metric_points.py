@@ -0,0 +1,40 @@
+"""metric points time series
+
+Revision ID: 7d3f9b2e6a51
+Revises: 2c8e5a7d1f46
+Create Date: 2026-10-18 17:20:13.408215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d3f9b2e6a51'
+down_revision: Union[str, Sequence[str], None] = '2c8e5a7d1f46'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('metric_points',
+    sa.Column('metric', sa.String(length=50), nullable=False),
+    sa.Column('resolution', sa.String(length=10), nullable=False),
+    sa.Column('bucket', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('min_value', sa.Float(), nullable=False),
+    sa.Column('max_value', sa.Float(), nullable=False),
+    sa.Column('sum_value', sa.Float(), nullable=False),
+    sa.Column('last_value', sa.Float(), nullable=False),
+    sa.Column('sample_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('metric', 'resolution', 'bucket')
+    )
+    op.create_index('ix_metric_points_resolution_bucket', 'metric_points', ['resolution', 'bucket'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_metric_points_resolution_bucket', table_name='metric_points')
+    op.drop_table('metric_points')
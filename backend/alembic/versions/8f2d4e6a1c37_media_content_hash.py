@@ -0,0 +1,32 @@
+"""media files: content hash + reference count
+
+Revision ID: 8f2d4e6a1c37
+Revises: 3b7c1f0a9d21
+Create Date: 2026-10-18 10:02:11.530472
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f2d4e6a1c37'
+down_revision: Union[str, Sequence[str], None] = '3b7c1f0a9d21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('media_files', sa.Column('source_hash', sa.String(length=64), nullable=True))
+    op.add_column('media_files', sa.Column('ref_count', sa.Integer(), server_default='1', nullable=False))
+    op.create_index(op.f('ix_media_files_source_hash'), 'media_files', ['source_hash'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_media_files_source_hash'), table_name='media_files')
+    op.drop_column('media_files', 'ref_count')
+    op.drop_column('media_files', 'source_hash')
@@ -0,0 +1,58 @@
+"""audit log actor email with trigram index
+
+Revision ID: a8c2e4f61b07
+Revises: 4b1e8c6f2d93
+Create Date: 2026-10-18 18:47:52.930114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8c2e4f61b07'
+down_revision: Union[str, Sequence[str], None] = '4b1e8c6f2d93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = 'ix_audit_logs_actor_email_trgm'
+# Doplnění emailů u starých záznamů po dávkách (ať se nezamkne celá tabulka najednou)
+BACKFILL_BATCH = 50000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('audit_logs', sa.Column('actor_email', sa.String(length=255), nullable=True))
+
+    bind = op.get_bind()
+    max_id = bind.execute(sa.text("SELECT max(id) FROM audit_logs")).scalar() or 0
+    is_postgres = bind.dialect.name == 'postgresql'
+
+    with op.get_context().autocommit_block():
+        for start in range(0, max_id + 1, BACKFILL_BATCH):
+            op.execute(sa.text(
+                "UPDATE audit_logs SET actor_email = "
+                "(SELECT email FROM app_users WHERE app_users.id = audit_logs.user_id) "
+                "WHERE user_id IS NOT NULL AND id >= :start AND id < :end"
+            ).bindparams(start=start, end=start + BACKFILL_BATCH))
+
+        if is_postgres:
+            # Trigramy umí index použít i pro ILIKE '%x%'
+            op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            op.create_index(
+                INDEX_NAME, 'audit_logs', ['actor_email'], unique=False,
+                postgresql_using='gin', postgresql_ops={'actor_email': 'gin_trgm_ops'},
+                postgresql_concurrently=True, if_not_exists=True,
+            )
+        else:
+            # SQLite (testy) - pg_trgm nemá, stačí obyčejný index
+            op.create_index(INDEX_NAME, 'audit_logs', ['actor_email'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(INDEX_NAME, table_name='audit_logs', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('audit_logs', 'actor_email')
@@ -0,0 +1,66 @@
+"""media files: ref_count counts saved records, not uploads
+
+Revision ID: b6e1d4a9f2c8
+Revises: f7a3c9e2d4b6
+Create Date: 2026-10-18 23:41:09.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e1d4a9f2c8'
+down_revision: Union[str, Sequence[str], None] = 'f7a3c9e2d4b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Sloupce s URL nahraných souborů (stejné jako v services/upload_gc.py)
+URL_COLUMNS = [
+    ('content_items', 'image_url'),
+    ('content_photos', 'image_url'),
+    ('categories', 'image_path'),
+    ('categories', 'icon_path'),
+]
+
+
+def _name(url: str) -> str:
+    # /uploads/ab/cd/abc.webp i stará /uploads/abc.webp -> abc.webp (název = hash obsahu)
+    return url.rsplit('/', 1)[-1]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    with op.batch_alter_table('media_files') as batch_op:  # batch = funguje i na SQLite
+        batch_op.alter_column('ref_count', server_default='0')
+
+    # Dosavadní ref_count počítal uploady - přepočítáme ho podle záznamů, které soubor opravdu používají
+    media_ids = {
+        _name(url): media_id
+        for media_id, url in bind.execute(sa.text("SELECT id, url FROM media_files")).all()
+    }
+    counts = dict.fromkeys(media_ids.values(), 0)
+    for table, column in URL_COLUMNS:
+        rows = bind.execute(sa.text(
+            f"SELECT {column}, count(*) FROM {table} WHERE {column} LIKE '/uploads/%' GROUP BY {column}"
+        )).all()
+        for url, count in rows:
+            media_id = media_ids.get(_name(url))
+            if media_id is not None:
+                counts[media_id] += count
+
+    if counts:
+        bind.execute(
+            sa.text("UPDATE media_files SET ref_count = :ref_count WHERE id = :id"),
+            [{"id": media_id, "ref_count": count} for media_id, count in counts.items()],
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Počty zůstávají (menší nebo stejné jako dřív - soubory se jen dřív uvolní úklidem)
+    with op.batch_alter_table('media_files') as batch_op:
+        batch_op.alter_column('ref_count', server_default='1')
@@ -0,0 +1,125 @@
+"""partition audit_logs by month
+
+Revision ID: c3f5a9e1d7b2
+Revises: a8c2e4f61b07
+Create Date: 2026-10-18 19:31:08.671543
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f5a9e1d7b2'
+down_revision: Union[str, Sequence[str], None] = 'a8c2e4f61b07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Měsíce založené dopředu (dál je zakládá plánovač, viz services/audit_partitions.py)
+MONTHS_AHEAD = 3
+
+COLUMNS = "id, action, details, user_id, actor_email, created_at"
+
+# Indexy se zakládají na rodiči a Postgres je propíše do všech partitions
+INDEXES = [
+    "CREATE INDEX ix_audit_logs_id ON audit_logs (id)",
+    "CREATE INDEX ix_audit_logs_created_at_id ON audit_logs (created_at, id)",
+    "CREATE INDEX ix_audit_logs_action_created_at_id ON audit_logs (action, created_at, id)",
+    "CREATE INDEX ix_audit_logs_user_id_created_at_id ON audit_logs (user_id, created_at, id)",
+    "CREATE INDEX ix_audit_logs_actor_email_trgm ON audit_logs USING gin (actor_email gin_trgm_ops)",
+]
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_partition(month: date):
+    name = f"audit_logs_y{month.year}m{month.month:02d}"
+    op.execute(
+        f"CREATE TABLE {name} PARTITION OF audit_logs "
+        f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+        f"TO ('{_add_months(month, 1).isoformat()} 00:00:00+00')"
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        # Jinde partitions nejsou - retence maže po dávkách
+        return
+
+    # 1. Stará tabulka stranou (i s názvem PK, jinak by kolidoval s novým)
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_legacy")
+    op.execute("ALTER TABLE audit_logs_legacy RENAME CONSTRAINT audit_logs_pkey TO audit_logs_legacy_pkey")
+
+    # 2. Nová rozdělená tabulka - klíč partitions (created_at) musí být součástí PK
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id INTEGER NOT NULL DEFAULT nextval('audit_logs_id_seq'),
+            action VARCHAR,
+            details TEXT,
+            user_id INTEGER REFERENCES app_users (id),
+            actor_email VARCHAR(255),
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+
+    # 3. Partitions od nejstaršího záznamu po MONTHS_AHEAD dopředu + pojistka
+    oldest = bind.execute(sa.text("SELECT min(created_at) FROM audit_logs_legacy")).scalar()
+    today = datetime.now(timezone.utc).date().replace(day=1)
+    month = oldest.astimezone(timezone.utc).date().replace(day=1) if oldest else today
+    while month <= _add_months(today, MONTHS_AHEAD):
+        _create_partition(month)
+        month = _add_months(month, 1)
+    op.execute("CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT")
+
+    # 4. Přenesení dat (řádky bez času dostanou "teď") a převzetí sekvence
+    op.execute(
+        f"INSERT INTO audit_logs ({COLUMNS}) "
+        f"SELECT id, action, details, user_id, actor_email, coalesce(created_at, now()) FROM audit_logs_legacy"
+    )
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+    op.execute("DROP TABLE audit_logs_legacy")
+
+    # 5. Indexy až po naplnění (rychlejší než průběžná údržba při INSERTu)
+    for statement in INDEXES:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_partitioned")
+    op.execute("ALTER TABLE audit_logs_partitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_partitioned_pkey")
+    for statement in INDEXES:
+        name = statement.split()[2]
+        op.execute(f"ALTER INDEX {name} RENAME TO {name}_partitioned")
+
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id INTEGER NOT NULL DEFAULT nextval('audit_logs_id_seq'),
+            action VARCHAR,
+            details TEXT,
+            user_id INTEGER REFERENCES app_users (id),
+            actor_email VARCHAR(255),
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            PRIMARY KEY (id)
+        )
+    """)
+    op.execute(f"INSERT INTO audit_logs ({COLUMNS}) SELECT {COLUMNS} FROM audit_logs_partitioned")
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+    # Smaže i všechny partitions
+    op.execute("DROP TABLE audit_logs_partitioned")
+
+    for statement in INDEXES:
+        op.execute(statement)
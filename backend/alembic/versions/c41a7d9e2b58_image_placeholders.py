@@ -0,0 +1,53 @@
+"""image dimensions and placeholders
+
+Revision ID: c41a7d9e2b58
+Revises: 8f2d4e6a1c37
+Create Date: 2026-10-18 11:20:47.902316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41a7d9e2b58'
+down_revision: Union[str, Sequence[str], None] = '8f2d4e6a1c37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+IMAGE_TABLES = ('content_items', 'content_photos', 'categories')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('media_files', sa.Column('placeholder', sa.Text(), nullable=True))
+    for table in IMAGE_TABLES:
+        op.add_column(table, sa.Column('image_width', sa.Integer(), nullable=True))
+        op.add_column(table, sa.Column('image_height', sa.Integer(), nullable=True))
+        op.add_column(table, sa.Column('image_placeholder', sa.Text(), nullable=True))
+
+    # Existující záznamy: rozměry známe u souborů evidovaných v media_files
+    # (placeholdery ze souborů na disku doplní na pozadí services/placeholder_backfill.py)
+    op.execute("""
+        UPDATE content_items SET image_width = m.width, image_height = m.height
+        FROM media_files m WHERE m.url = content_items.image_url
+    """)
+    op.execute("""
+        UPDATE content_photos SET image_width = m.width, image_height = m.height
+        FROM media_files m WHERE m.url = content_photos.image_url
+    """)
+    op.execute("""
+        UPDATE categories SET image_width = m.width, image_height = m.height
+        FROM media_files m WHERE m.url = categories.image_path
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in reversed(IMAGE_TABLES):
+        op.drop_column(table, 'image_placeholder')
+        op.drop_column(table, 'image_height')
+        op.drop_column(table, 'image_width')
+    op.drop_column('media_files', 'placeholder')
@@ -0,0 +1,54 @@
+"""audit rollups
+
+Revision ID: e5b8d2a4c6f9
+Revises: c3f5a9e1d7b2
+Create Date: 2026-10-18 21:04:52.187342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b8d2a4c6f9'
+down_revision: Union[str, Sequence[str], None] = 'c3f5a9e1d7b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Začátek bucketu podle dialektu (UTC)
+TRUNCATE = {
+    'postgresql': "date_trunc('{unit}', created_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'",
+    'sqlite': "strftime('{fmt}', created_at)",
+}
+SQLITE_FORMATS = {'hour': '%Y-%m-%d %H:00:00.000000', 'day': '%Y-%m-%d 00:00:00.000000'}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('audit_rollups',
+    sa.Column('resolution', sa.String(length=10), nullable=False),
+    sa.Column('bucket', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('action', sa.String(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('resolution', 'bucket', 'action', 'user_id')
+    )
+    op.create_index('ix_audit_rollups_resolution_action_bucket', 'audit_rollups', ['resolution', 'action', 'bucket'], unique=False)
+
+    # Počty za dosavadní záznamy (dál je přičítá writer audit logu)
+    dialect = op.get_bind().dialect.name
+    for unit in ('hour', 'day'):
+        bucket = TRUNCATE[dialect].format(unit=unit, fmt=SQLITE_FORMATS[unit])
+        op.execute(
+            f"INSERT INTO audit_rollups (resolution, bucket, action, user_id, count) "
+            f"SELECT '{unit}', {bucket}, coalesce(action, ''), coalesce(user_id, 0), count(*) "
+            f"FROM audit_logs GROUP BY 2, 3, 4"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_audit_rollups_resolution_action_bucket', table_name='audit_rollups')
+    op.drop_table('audit_rollups')
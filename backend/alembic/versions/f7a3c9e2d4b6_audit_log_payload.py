@@ -0,0 +1,67 @@
+"""audit log structured payload
+
+Revision ID: f7a3c9e2d4b6
+Revises: e5b8d2a4c6f9
+Create Date: 2026-10-18 22:17:36.502918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7a3c9e2d4b6'
+down_revision: Union[str, Sequence[str], None] = 'e5b8d2a4c6f9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX = 'ix_audit_logs_payload'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    # Sloupec bez výchozí hodnoty = jen změna katalogu, tabulka se nepřepisuje.
+    # Starší záznamy payload nemají (text zůstává v details).
+    op.add_column('audit_logs', sa.Column(
+        'payload', sa.JSON().with_variant(postgresql.JSONB(), 'postgresql'), nullable=True
+    ))
+
+    if bind.dialect.name != 'postgresql':
+        # SQLite (testy) - obyčejný index, ať schéma odpovídá modelu
+        op.create_index(INDEX, 'audit_logs', ['payload'], unique=False)
+        return
+
+    partitions = bind.execute(sa.text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass('audit_logs')"
+    )).scalars().all()
+
+    if not partitions:
+        with op.get_context().autocommit_block():
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX} "
+                f"ON audit_logs USING gin (payload jsonb_path_ops)"
+            )
+        return
+
+    # Rozdělená tabulka (viz c3f5a9e1d7b2): CONCURRENTLY na rodiči nejde. Index na rodiči
+    # se založí prázdný (ON ONLY), na každé partition bez zamčení zápisu a pak se připojí.
+    op.execute(f"CREATE INDEX IF NOT EXISTS {INDEX} ON ONLY audit_logs USING gin (payload jsonb_path_ops)")
+    with op.get_context().autocommit_block():
+        for partition in partitions:
+            name = f"{partition}_payload_idx"
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                f"ON {partition} USING gin (payload jsonb_path_ops)"
+            )
+            op.execute(f"ALTER INDEX {INDEX} ATTACH PARTITION {name}")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(INDEX, table_name='audit_logs')
+    op.drop_column('audit_logs', 'payload')
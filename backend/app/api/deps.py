@@ -10,6 +10,7 @@ from app.core import security
 from app.db.session import SessionLocal
 from app.crud import crud_user
 from app.models.user import User
+from app.services.outbox import Outbox
 
 # --- 1. DATABÁZE ---
 async def get_db():
@@ -20,6 +21,14 @@ async def get_db():
         yield session
 
 
+def get_outbox() -> Outbox:
+    """
+    Outbox pro jeden request: efekty (mazání souborů, audit log) se provedou
+    až po outbox.commit(db), tedy jen když se data opravdu uložila.
+    """
+    return Outbox()
+
+
 # --- 2. SWAGGER / SECURITY ---
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
@@ -72,3 +81,16 @@ async def get_current_admin(current_user: User = Depends(get_current_user)) -> U
             detail="Nemáte oprávnění administrátora k provedení této akce.",
         )
     return current_user
+
+
+# --- 5. HLAVIČKY ---
+def parse_content_length(value: Optional[str]) -> Optional[int]:
+    """
+    Content-Length jako číslo (None = hlavička chybí).
+    Vyhodí ValueError, když to není nezáporné celé číslo - volající vrací 400.
+    """
+    if value is None:
+        return None
+    if not (value.isascii() and value.isdigit()):
+        raise ValueError("Neplatná hlavička Content-Length.")
+    return int(value)
@@ -16,6 +16,9 @@ from app.models.user import User
 
 router = APIRouter()
 
+# Delší email neprojde validací (EmailStr) - takový účet nemůže existovat
+MAX_LOGIN_LENGTH = 254
+
 @router.post("/register", response_model=UserResponse)
 async def register(user_in: UserCreate, db: AsyncSession = Depends(get_db)):
     # 1. Kontrola existence
@@ -32,10 +35,10 @@ async def register(user_in: UserCreate, db: AsyncSession = Depends(get_db)):
 
     # --- LOGOVÁNÍ: NOVÝ UŽIVATEL ---
     await log_activity(
-        db, 
         action="USER_REGISTER", 
         user_id=new_user_id, 
-        details=f"Nový uživatel registrován: {new_user_email}"
+        actor_email=new_user_email,
+        payload={}
     )
 
     return user
@@ -45,15 +48,17 @@ async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(), 
     db: AsyncSession = Depends(get_db)
 ):
-    # 1. Ověření uživatele
-    user = await crud_user.authenticate(db, email=form_data.username, password=form_data.password)
+    # 1. Ověření uživatele (příliš dlouhé jméno rovnou jako neúspěch, bez dotazu do DB)
+    user = None
+    if len(form_data.username) <= MAX_LOGIN_LENGTH:
+        user = await crud_user.authenticate(db, email=form_data.username, password=form_data.password)
     
     if not user:
         # --- LOGOVÁNÍ: CHYBA PŘIHLÁŠENÍ ---
         await log_activity(
-            db, 
             action="LOGIN_FAILED", 
-            details=f"Neúspěšný pokus o přihlášení pro email: {form_data.username}"
+            actor_email=form_data.username,
+            payload={}
         )
         
         raise HTTPException(
@@ -79,10 +84,10 @@ async def login_for_access_token(
 
     # --- LOGOVÁNÍ: ÚSPĚŠNÉ PŘIHLÁŠENÍ ---
     await log_activity(
-        db, 
         action="LOGIN_SUCCESS", 
         user_id=user_id, 
-        details=f"Uživatel {user_email} se úspěšně přihlásil"
+        actor_email=user_email,
+        payload={}
     )
     
     # 2. Vyrobíme token
@@ -101,7 +106,6 @@ async def login_for_access_token(
 
 @router.post("/logout")
 async def logout(
-    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -109,10 +113,10 @@ async def logout(
     ale slouží k tomu, aby se akce zapsala do logů.
     """
     await log_activity(
-        db,
         action="LOGOUT",
         user_id=current_user.id,
-        details=f"Uživatel {current_user.email} se odhlásil"
+        actor_email=current_user.email,
+        payload={}
     )
     return {"message": "Logout logged successfully"}
 
@@ -141,10 +145,10 @@ async def update_my_password(
     if not success:
         # --- LOGOVÁNÍ CHYBY ---
         await log_activity(
-            db,
             action="PASSWORD_CHANGE_FAILED",
             user_id=current_user.id,
-            details=f"Uživatel {current_user.email} se pokusil změnit heslo, ale staré heslo bylo špatné."
+            actor_email=current_user.email,
+            payload={}
         )
         raise HTTPException(
             status_code=400,
@@ -153,10 +157,10 @@ async def update_my_password(
 
     # 2. Logování úspěchu
     await log_activity(
-        db,
         action="PASSWORD_CHANGED",
         user_id=current_user.id,
-        details=f"Uživatel {current_user.email} úspěšně změnil heslo."
+        actor_email=current_user.email,
+        payload={}
     )
     
     return {"message": "Heslo bylo úspěšně změněno. Vynucení změny bylo vypnuto."}
\ No newline at end of file
@@ -2,14 +2,13 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_db, get_current_user
+from app.api.deps import get_db, get_current_user, get_outbox
 from app.models.user import User
 from app.schemas.category import CategoryCreate, CategoryUpdate, CategoryResponse
 from app.crud import crud_category
-from app.services.audit import log_activity 
 # import os # <-- Již není potřeba
-# IMPORTUJEME CENTRALIZOVANOU FUNKCI PRO MAZÁNÍ SOUBORŮ
-from app.services.image_service import delete_file_by_url 
+# Mazání souborů a audit log až po commitu (services/outbox.py)
+from app.services.outbox import Outbox
 
 router = APIRouter()
 
@@ -24,6 +23,7 @@ async def read_categories(db: AsyncSession = Depends(get_db)):
 async def create_category(
     category_in: CategoryCreate,
     db: AsyncSession = Depends(get_db),
+    outbox: Outbox = Depends(get_outbox),
     current_user: User = Depends(get_current_user)
 ):
     # 1. Uložíme si data o uživateli HNED TEĎ (aby nevypršela po commitu)
@@ -38,16 +38,17 @@ async def create_category(
             detail="Kategorie s tímto URL (slugem) už existuje."
         )
 
-    # 2. Vytvoření (proběhne commit)
-    new_category = await crud_category.create_category(db, category_in)
+    # 2. Vytvoření (commit až na konci, spolu se vším ostatním)
+    new_category = await crud_category.create_category(db, category_in, commit=False)
 
-    # 3. Logování s emailem v textu
-    await log_activity(
-        db,
+    # 3. Logování (text se skládá z payloadu, viz services/audit_messages.py)
+    outbox.log(
         action="CATEGORY_CREATE",
         user_id=admin_id, 
-        details=f"Uživatel {admin_email} vytvořil kategorii: {new_category.name} (Slug: {new_category.slug})"
+        actor_email=admin_email,
+        payload={"category_id": new_category.id, "name": new_category.name, "slug": new_category.slug}
     )
+    await outbox.commit(db)
 
     # 4. Refresh objektu před vrácením
     await db.refresh(new_category) 
@@ -59,6 +60,7 @@ async def update_category(
     category_id: int,
     category_in: CategoryUpdate,
     db: AsyncSession = Depends(get_db),
+    outbox: Outbox = Depends(get_outbox),
     current_user: User = Depends(get_current_user)
 ):
     admin_id = current_user.id
@@ -78,9 +80,9 @@ async def update_category(
         new_image = update_data["image_path"]
         old_image = category.image_path
         
-        # Pokud se obrázek mění (nebo maže) a starý existoval -> SMAZAT STARÝ
+        # Pokud se obrázek mění (nebo maže) a starý existoval -> SMAZAT STARÝ (až po commitu)
         if old_image and new_image != old_image:
-            delete_file_by_url(old_image) # <--- POUŽITÍ NOVÉ SLUŽBY
+            await outbox.release_file(db, old_image)
 
     # 2. Řešíme ikonku (icon_path)
     if "icon_path" in update_data:
@@ -88,17 +90,18 @@ async def update_category(
         old_icon = category.icon_path
         
         if old_icon and new_icon != old_icon:
-            delete_file_by_url(old_icon) # <--- POUŽITÍ NOVÉ SLUŽBY
+            await outbox.release_file(db, old_icon)
     # ---------------------------------------------
     
-    updated_category = await crud_category.update_category(db, db_obj=category, category_in=category_in)
+    updated_category = await crud_category.update_category(db, db_obj=category, category_in=category_in, commit=False)
 
-    await log_activity(
-        db,
+    outbox.log(
         action="CATEGORY_UPDATE",
         user_id=admin_id,
-        details=f"Uživatel {admin_email} upravil kategorii ID {category_id}. Změna z '{old_name}' na '{updated_category.name}'."
+        actor_email=admin_email,
+        payload={"category_id": category_id, "old_name": old_name, "name": updated_category.name}
     )
+    await outbox.commit(db)
     
     await db.refresh(updated_category)
     
@@ -108,6 +111,7 @@ async def update_category(
 async def delete_category(
     category_id: int,
     db: AsyncSession = Depends(get_db),
+    outbox: Outbox = Depends(get_outbox),
     current_user: User = Depends(get_current_user)
 ):
     admin_id = current_user.id
@@ -119,18 +123,19 @@ async def delete_category(
     
     deleted_name = category.name 
     
-    # --- SMAZÁNÍ SOUBORŮ Z DISKU ---
-    delete_file_by_url(category.image_path) # <--- POUŽITÍ NOVÉ SLUŽBY
-    delete_file_by_url(category.icon_path) # <--- POUŽITÍ NOVÉ SLUŽBY
+    # --- SMAZÁNÍ SOUBORŮ Z DISKU (až po commitu) ---
+    await outbox.release_file(db, category.image_path)
+    await outbox.release_file(db, category.icon_path)
     # -------------------------------------
 
-    await crud_category.delete_category(db, category_id)
+    await crud_category.delete_category(db, category_id, commit=False)
 
-    await log_activity(
-        db,
+    outbox.log(
         action="CATEGORY_DELETE",
         user_id=admin_id, 
-        details=f"Uživatel {admin_email} smazal kategorii: {deleted_name} (ID: {category_id})"
+        actor_email=admin_email,
+        payload={"category_id": category_id, "name": deleted_name}
     )
+    await outbox.commit(db)
 
     return {"message": "Kategorie smazána"}
\ No newline at end of file
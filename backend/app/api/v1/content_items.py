@@ -2,12 +2,11 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_db, get_current_user
+from app.api.deps import get_db, get_current_user, get_outbox
 from app.models.user import User
 from app.schemas.content_item import ContentItemCreate, ContentItemUpdate, ContentItemResponse
 from app.crud import crud_content_item, crud_category # <-- DŮLEŽITÉ: IMPORT crud_category pro kontrolu FK
-from app.services.audit import log_activity 
-from app.services.image_service import delete_file_by_url 
+from app.services.outbox import Outbox
 
 router = APIRouter()
 
@@ -37,6 +36,7 @@ async def read_content_item_detail(
 async def create_content_item(
     item_in: ContentItemCreate,
     db: AsyncSession = Depends(get_db),
+    outbox: Outbox = Depends(get_outbox),
     current_user: User = Depends(get_current_user)
 ):
     admin_id = current_user.id
@@ -59,14 +59,15 @@ async def create_content_item(
             detail="Položka s tímto URL (slugem) už existuje."
         )
 
-    new_item = await crud_content_item.create_content_item(db, item_in)
+    new_item = await crud_content_item.create_content_item(db, item_in, commit=False)
 
-    await log_activity(
-        db,
+    outbox.log(
         action="CONTENT_CREATE",
         user_id=admin_id, 
-        details=f"Uživatel {admin_email} vytvořil položku: {new_item.title} (CatID: {new_item.category_id})"
+        actor_email=admin_email,
+        payload={"item_id": new_item.id, "title": new_item.title, "category_id": new_item.category_id}
     )
+    await outbox.commit(db)
     
     # --- OPRAVA CHYBY MissingGreenlet ---
     # Znovu načteme model, aby byl v aktivní relaci pro serializaci Pydanticem
@@ -80,6 +81,7 @@ async def update_content_item(
     item_id: int,
     item_in: ContentItemUpdate,
     db: AsyncSession = Depends(get_db),
+    outbox: Outbox = Depends(get_outbox),
     current_user: User = Depends(get_current_user)
 ):
     admin_id = current_user.id
@@ -99,19 +101,25 @@ async def update_content_item(
         new_image = update_data["image_url"]
         old_image = item.image_url
         
-        # Pokud se obrázek mění (nebo maže) a starý existoval -> SMAZAT STARÝ
+        # Pokud se obrázek mění (nebo maže) a starý existoval -> SMAZAT STARÝ (až po commitu)
         if old_image and new_image != old_image:
-            delete_file_by_url(old_image) 
+            await outbox.release_file(db, old_image)
     # ---------------------------------------------
     
-    updated_item = await crud_content_item.update_content_item(db, db_obj=item, item_in=item_in)
+    updated_item = await crud_content_item.update_content_item(db, db_obj=item, item_in=item_in, commit=False)
 
-    await log_activity(
-        db,
+    outbox.log(
         action="CONTENT_UPDATE",
         user_id=admin_id,
-        details=f"Uživatel {admin_email} upravil položku ID {item_id}. Změna z '{old_title}' na '{updated_item.title}'."
+        actor_email=admin_email,
+        payload={
+            "item_id": item_id,
+            "old_title": old_title,
+            "title": updated_item.title,
+            "category_id": updated_item.category_id,
+        }
     )
+    await outbox.commit(db)
     
     # --- OPRAVA CHYBY MissingGreenlet ---
     await db.refresh(updated_item)
@@ -123,6 +131,7 @@ async def update_content_item(
 async def delete_content_item(
     item_id: int,
     db: AsyncSession = Depends(get_db),
+    outbox: Outbox = Depends(get_outbox),
     current_user: User = Depends(get_current_user)
 ):
     admin_id = current_user.id
@@ -133,28 +142,32 @@ async def delete_content_item(
         raise HTTPException(status_code=404, detail="Obsahová položka nenalezena")
     
     deleted_title = item.title 
+    deleted_category_id = item.category_id
     
     # --- MAZÁNÍ SOUBORŮ A GALERIE ---
+    # (soubory z disku mizí až po úspěšném commitu - viz services/outbox.py)
     
     # 1. Smazání primárního obrázku (image_url)
-    delete_file_by_url(item.image_url)
+    await outbox.release_file(db, item.image_url)
     
     # 2. Smazání všech fotek z galerie ContentPhoto (z disku a DB záznamů)
-    deleted_photos_count = await crud_content_item.delete_associated_photos_and_files(db, item_id)
+    deleted_photos_count = await crud_content_item.delete_associated_photos_and_files(db, item_id, outbox)
 
     # 3. Smazání hlavní položky z DB
-    await crud_content_item.delete_content_item(db, item_id) 
+    await crud_content_item.delete_content_item(db, item_id, commit=False)
 
     # Logování
-    log_detail = (
-        f"Uživatel {admin_email} smazal položku: {deleted_title} (ID: {item_id}). "
-        f"Smazáno {deleted_photos_count} fotek z galerie."
-    )
-    await log_activity(
-        db,
+    outbox.log(
         action="CONTENT_DELETE",
         user_id=admin_id, 
-        details=log_detail
+        actor_email=admin_email,
+        payload={
+            "item_id": item_id,
+            "title": deleted_title,
+            "category_id": deleted_category_id,
+            "deleted_photos": deleted_photos_count,
+        }
     )
+    await outbox.commit(db)
 
     return {"message": "Obsahová položka smazána"}
\ No newline at end of file
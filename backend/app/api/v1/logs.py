@@ -1,15 +1,15 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
 from typing import List, Optional
-from sqlalchemy import desc
-from datetime import date, datetime
+from datetime import date, datetime, timedelta, timezone
+from starlette.concurrency import run_in_threadpool
 
 from app.api.deps import get_db, get_current_user
+from app.crud import crud_audit_log
 from app.models.user import User
-from app.models.audit_log import AuditLog
-from app.schemas.audit import AuditLogOut
-from app.services.audit import delete_old_logs
+from app.schemas.audit import AuditAggregateResponse, AuditLogOut
+from app.services import audit_archive, audit_export, audit_retention, audit_rollups
 from app.services.audit import log_activity
 from app.core.config import settings
 
@@ -17,46 +17,137 @@ router = APIRouter()
 
 @router.get("/", response_model=List[AuditLogOut])
 async def read_logs(
+    response: Response,
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1),
+    # Kurzor z hlavičky X-Next-Cursor předchozí odpovědi (rychlejší než skip u hlubokých stránek)
+    cursor: Optional[str] = None,
     # --- NOVÉ FILTRY ---
     email: Optional[str] = None,       # Hledání podle emailu
     action: Optional[str] = None,      # Hledání podle akce (LOGIN, DELETE...)
     date_from: Optional[date] = None,  # Datum OD
     date_to: Optional[date] = None,    # Datum DO
+    # Podle strukturovaných dat, např. ?payload=category_id=5 (víc podmínek = všechny musí platit)
+    payload: List[str] = Query([], description="klíč=hodnota"),
     # -------------------
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    # Začneme základním dotazem: Chceme Logy a k nim informace o Userovi
-    query = select(AuditLog).join(User).order_by(AuditLog.created_at.desc())
+    try:
+        logs, next_cursor = await crud_audit_log.get_logs(
+            db,
+            limit=limit,
+            skip=skip,
+            cursor=cursor,
+            email=email,
+            action=action,
+            date_from=date_from,
+            date_to=date_to,
+            payload=crud_audit_log.parse_payload_filter(payload),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    # --- APLIKACE FILTRŮ ---
-    
-    # 1. Filtr podle emailu (obsahuje text, nezáleží na velikosti písmen)
-    if email:
-        query = query.where(User.email.ilike(f"%{email}%"))
-    
-    # 2. Filtr podle akce (přesná shoda)
-    if action:
-        query = query.where(AuditLog.action == action)
+    # Další stránka: stejný dotaz s ?cursor=<X-Next-Cursor> (bez hlavičky = konec)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return logs
+
+@router.get("/aggregate", response_model=AuditAggregateResponse)
+async def aggregate_logs(
+    step: str = Query("day", description="hour / day / total"),
+    date_from: Optional[date] = None,  # Výchozí: 7 dní před date_to
+    date_to: Optional[date] = None,    # Výchozí: dnes (UTC)
+    action: Optional[str] = None,
+    user_id: Optional[int] = Query(None, description="0 = bez uživatele (systém)"),
+    by_user: bool = Query(False, description="Rozdělit počty podle uživatelů"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Počty akcí pro grafy (např. LOGIN po dnech, LOGIN_FAILED po hodinách, UPLOAD_FILE podle uživatelů).
+    Čte jen předpočítané rollupy (viz services/audit_rollups.py), ne samotné logy.
+    """
+    if step not in audit_rollups.STEPS:
+        raise HTTPException(status_code=400, detail=f"Neznámý krok: {step}")
 
-    # 3. Datum OD (větší nebo rovno)
-    if date_from:
-        query = query.where(AuditLog.created_at >= date_from)
+    date_to = date_to or datetime.now(timezone.utc).date()
+    date_from = date_from or date_to - timedelta(days=7)
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="Datum OD musí být před datem DO.")
 
-    # 4. Datum DO (menší nebo rovno - přidáme čas 23:59:59, aby to vzalo celý den)
-    if date_to:
-        # Převedeme date na datetime na konci dne
-        dt_to = datetime.combine(date_to, datetime.max.time())
-        query = query.where(AuditLog.created_at <= dt_to)
+    start = datetime.combine(date_from, datetime.min.time(), tzinfo=timezone.utc)
+    end = datetime.combine(date_to, datetime.max.time(), tzinfo=timezone.utc)
+    if step in audit_rollups.RESOLUTIONS and (end - start) / audit_rollups.RESOLUTIONS[step] > settings.METRICS_MAX_POINTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Příliš mnoho bodů (max {settings.METRICS_MAX_POINTS}), zvolte větší krok nebo kratší rozsah."
+        )
 
-    # Aplikujeme stránkování
-    query = query.offset(skip).limit(limit)
+    points = await audit_rollups.aggregate(
+        db, step, start, end, action=action, user_id=user_id, per_user=by_user
+    )
+    return {"step": step, "date_from": date_from, "date_to": date_to, "points": points}
 
-    result = await db.execute(query)
-    logs = result.scalars().all()
-    return logs
+@router.get("/export")
+async def export_logs(
+    format: str = Query("csv", description="csv / ndjson"),
+    gzip: bool = Query(False, description="Komprimovat výstup (.gz)"),
+    # Stejné filtry jako výpis logů
+    email: Optional[str] = None,
+    action: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    payload: List[str] = Query([], description="klíč=hodnota"),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Export logů odpovídajících filtrům (od nejnovějších) jako soubor ke stažení.
+    Streamuje se přímo z databáze - funguje i pro miliony řádků (viz services/audit_export.py).
+    """
+    if format not in audit_export.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Nepodporovaný formát: {format}")
+    try:
+        payload_filter = crud_audit_log.parse_payload_filter(payload)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    filters = {
+        "email": email, "action": action, "date_from": date_from, "date_to": date_to,
+        "payload": payload_filter,
+    }
+    filename = audit_export.export_filename(format, gzip)
+    return StreamingResponse(
+        audit_export.export_stream(format, gzip, filters),
+        media_type="application/gzip" if gzip else audit_export.FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.get("/archive", response_model=List[AuditLogOut])
+async def search_archive(
+    date_from: date,
+    date_to: date,
+    action: Optional[str] = None,
+    email: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Hledání ve studeném archivu (záznamy, které už retence smazala z DB).
+    Čte přímo komprimované soubory podle manifestu, nic se nenačítá zpět do databáze.
+    Výsledky od nejstarších.
+    """
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="Datum OD musí být před datem DO.")
+
+    return await run_in_threadpool(
+        audit_archive.search,
+        datetime.combine(date_from, datetime.min.time()),
+        datetime.combine(date_to, datetime.max.time()),
+        action=action,
+        email=email,
+        limit=limit,
+    )
 
 @router.delete("/cleanup", response_model=dict)
 async def cleanup_logs(
@@ -67,17 +158,44 @@ async def cleanup_logs(
 ):
     """
     Smaže staré logy a vytvoří o tom záznam.
+    Maže po dávkách: co nestihne během AUDIT_RETENTION_REQUEST_SECONDS,
+    doběhne na pozadí (stav viz GET /cleanup).
     """
-    # 1. Provedeme smazání
-    deleted_count = await delete_old_logs(db, days=days)
+    # 1. Založíme úklid a kus ho rovnou provedeme (když už běží, necháme ho doběhnout)
+    try:
+        job = await audit_retention.run_retention(
+            db, settings.AUDIT_RETENTION_REQUEST_SECONDS,
+            start=audit_retention.new_job(days, trigger="manual", user_id=current_user.id),
+        )
+    except audit_retention.RetentionBusy:
+        raise HTTPException(
+            status_code=409,
+            detail="Úklid logů právě běží. Stav viz GET /api/logs/cleanup, zkuste to prosím za chvíli."
+        )
     
-    # 2. ZALOGUJEME TO (Kdo to smazal a kolik toho bylo)
+    # 2. ZALOGUJEME TO (Kdo to smazal a kolik toho zatím bylo)
     # Tento nový záznam se nesmaže, protože je "teď" (není starý 365 dní)
     await log_activity(
-        db,
         action="LOGS_CLEANUP",
         user_id=current_user.id,
-        details=f"Manuální úklid logů. Smazáno {deleted_count} záznamů starších než {days} dní."
+        actor_email=current_user.email,
+        payload=audit_retention.log_payload(job)
     )
     
-    return {"message": f"Úklid hotov. Smazáno {deleted_count} starých záznamů."}
\ No newline at end of file
+    prefix = "Úklid hotov." if job["done"] else "Úklid běží."
+    return {
+        "message": f"{prefix} {audit_retention.describe(job)}",
+        "deleted": job["deleted"],
+        "done": job["done"],
+    }
+
+@router.get("/cleanup", response_model=dict)
+async def cleanup_status(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Stav posledního úklidu logů (průběh po dávkách)."""
+    job = await audit_retention.get_job(db)
+    if job is None:
+        return {"message": "Úklid logů zatím neběžel.", "done": True}
+    return {"message": audit_retention.describe(job), **job}
@@ -0,0 +1,181 @@
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional
+from urllib.parse import quote
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse
+from PIL import features
+
+from app.core.config import settings
+from app.services.image_engine import ImageEngineBusy
+from app.services.image_service import UPLOAD_DIR, MAX_WIDTH, resolve_upload_path
+from app.services.variant_cache import variant_cache
+
+router = APIRouter()
+
+MEDIA_TYPES = {
+    "webp": "image/webp",
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "avif": "image/avif",
+}
+
+def _supported_formats() -> set[str]:
+    formats = {"webp", "jpeg", "png"}
+    if features.check("avif"):
+        formats.add("avif")
+    return formats
+
+SUPPORTED_FORMATS = _supported_formats()
+
+# Obsahově adresovaný soubor (hash obsahu v názvu) se nikdy nezmění -> smí se cachovat navždy
+CONTENT_NAME = re.compile(r"^[0-9a-f]{32}(-\d+w)?\.webp$")
+LADDER_WIDTH = re.compile(r"-(\d+)w\.webp$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def _accepts(request: Request, media_type: str) -> bool:
+    """Prohlížeč v hlavičce Accept uvádí daný formát (a ne s q=0)."""
+    for item in request.headers.get("accept", "").split(","):
+        mime, *params = [part.strip() for part in item.split(";")]
+        if mime == media_type:
+            return not any(p.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000") for p in params)
+    return False
+
+
+def _not_modified(request: Request, etag: str, mtime: float) -> bool:
+    """Podmíněný request (If-None-Match / If-Modified-Since) -> stačí odpovědět 304."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Pro GET stačí slabé porovnání (W/"x" == "x")
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _accel_uri(path: str) -> str:
+    """Interní nginx location pro X-Accel-Redirect (originály a varianty mají každý svůj)."""
+    if os.path.commonpath([os.path.abspath(path), os.path.abspath(UPLOAD_DIR)]) == os.path.abspath(UPLOAD_DIR):
+        prefix, root = settings.MEDIA_ACCEL_UPLOADS_PREFIX, UPLOAD_DIR
+    else:
+        prefix, root = settings.MEDIA_ACCEL_VARIANTS_PREFIX, variant_cache.cache_dir
+    return prefix.rstrip("/") + "/" + quote(os.path.relpath(path, root))
+
+
+def _send_media(request: Request, path: str, media_type: str | None, immutable: bool, vary: bool = False) -> Response:
+    """
+    Odpověď se souborem včetně cache hlaviček:
+    - obsahově adresované soubory: silný ETag z názvu + Cache-Control immutable,
+    - ostatní (staré názvy): ETag z mtime a velikosti, kratší max-age.
+    Range / If-Range obslouží FileResponse, při X-Accel-Redirect nginx.
+    """
+    stat_result = os.stat(path)
+    if immutable:
+        etag = f'"{os.path.basename(path)}"'
+        cache_control = IMMUTABLE
+    else:
+        etag = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+        cache_control = f"public, max-age={settings.MEDIA_CACHE_MAX_AGE}"
+
+    headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control,
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+    }
+    if vary:
+        headers["Vary"] = "Accept"
+
+    if _not_modified(request, etag, stat_result.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    if settings.MEDIA_ACCEL_REDIRECT:
+        # Data pošle nginx, Python worker vrátí jen hlavičky
+        headers["X-Accel-Redirect"] = _accel_uri(path)
+        return Response(headers=headers, media_type=media_type)
+
+    return FileResponse(path, headers=headers, media_type=media_type, stat_result=stat_result)
+
+
+async def _negotiated_original(request: Request, source_path: str) -> tuple[str, str | None]:
+    """
+    Originál v nejlepším formátu, který prohlížeč umí (AVIF, u starých JPEG/PNG i WebP).
+    Použije se jen už vyrenderovaná varianta, která je menší než originál;
+    když ještě neexistuje, nechá se vyrenderovat na pozadí a teď pošleme originál.
+    """
+    name = os.path.basename(source_path)
+    match = LADDER_WIDTH.search(name)
+    width = int(match.group(1)) if match else MAX_WIDTH
+
+    alternatives = [fmt for fmt in ("avif", "webp") if fmt in SUPPORTED_FORMATS]
+    if name.endswith(".webp"):
+        alternatives.remove("webp")
+
+    for fmt in alternatives:
+        if not _accepts(request, MEDIA_TYPES[fmt]):
+            continue
+        cached = await variant_cache.peek(source_path, width, settings.IMAGE_QUALITY, fmt)
+        if cached is None:
+            variant_cache.warm(source_path, width, settings.IMAGE_QUALITY, fmt)
+            continue
+        if os.path.getsize(cached) < os.path.getsize(source_path):
+            return cached, MEDIA_TYPES[fmt]
+
+    return source_path, None
+
+
+@router.api_route("/uploads/{filename:path}", methods=["GET", "HEAD"])
+async def read_upload(
+    filename: str,
+    request: Request,
+    w: Optional[int] = Query(None, ge=1, description="Požadovaná šířka v px"),
+    q: Optional[int] = Query(None, ge=30, le=95, description="Kvalita komprese"),
+    fmt: Optional[str] = Query(None, description="Výstupní formát (webp, jpeg, png, avif)"),
+):
+    """
+    Vrátí nahraný soubor. S parametry w/q/fmt vrátí variantu zmenšenou na míru
+    (vyrenderuje se při prvním požadavku a pak se servíruje z cache na disku).
+    Funguje stará plochá URL (/uploads/abc.webp) i rozvětvená (/uploads/ab/cd/abc.webp).
+    Bez parametrů se formát vybírá podle hlavičky Accept (AVIF, když už ho máme).
+    """
+    # 1. Dohledání souboru (resolve_upload_path odmítne ../ i skryté soubory)
+    source_path = resolve_upload_path(filename)
+    if source_path is None:
+        raise HTTPException(status_code=404, detail="Soubor nenalezen.")
+
+    immutable = bool(CONTENT_NAME.match(os.path.basename(source_path)))
+
+    # 2. Bez parametrů -> originál (případně v lepším formátu podle Accept)
+    if w is None and q is None and fmt is None:
+        path, media_type = await _negotiated_original(request, source_path)
+        return _send_media(request, path, media_type, immutable, vary=True)
+
+    # 3. Normalizace parametrů (ať nevzniká nekonečně mnoho variant)
+    fmt = (fmt or "webp").lower()
+    if fmt == "jpg":
+        fmt = "jpeg"
+    if fmt not in SUPPORTED_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Nepodporovaný formát: {fmt}")
+
+    step = settings.VARIANT_WIDTH_STEP
+    width = min(MAX_WIDTH, -(-(w or MAX_WIDTH) // step) * step)  # zaokrouhlení nahoru na krok
+    quality = q or settings.IMAGE_QUALITY
+
+    # 4. Cache (render jen při prvním požadavku)
+    try:
+        variant_path = await variant_cache.get(source_path, width, quality, fmt)
+    except ImageEngineBusy:
+        raise HTTPException(
+            status_code=503,
+            detail="Server právě zpracovává příliš mnoho obrázků. Zkuste to prosím za chvíli.",
+            headers={"Retry-After": str(settings.IMAGE_RETRY_AFTER)},
+        )
+
+    return _send_media(request, variant_path, MEDIA_TYPES[fmt], immutable)
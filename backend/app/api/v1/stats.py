@@ -1,50 +1,65 @@
-import os
-from fastapi import APIRouter, Depends
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
 
 from app.api.deps import get_db, get_current_user
+from app.core.config import settings
 from app.models.user import User
-from app.models.message import Message
-from app.schemas.stats import StatsResponse
-from app.services.system_info import get_folder_size, get_disk_usage
-from app.crud.crud_content_item import get_published_content_count
+from app.schemas.stats import StatsResponse, StatsHistoryResponse
+from app.services.metrics import METRICS, RESOLUTIONS, get_history, pick_resolution
+from app.services.stats_snapshot import stats_snapshot
 
 router = APIRouter()
 
-UPLOAD_DIR = "uploads"
-APP_PATH_FOR_SIZE = "."
-
 @router.get("/", response_model=StatsResponse)
 async def get_stats(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
     current_user: User = Depends(get_current_user)
 ):
-    users_count = await db.scalar(select(func.count(User.id)))
-
-    content_count = await get_published_content_count(db)
-
-    messages_count = await db.scalar(
-        select(func.count(Message.id)).where(Message.is_read == False)  # noqa: E712
-    )
-
-    total_disk, used_disk, free_disk = get_disk_usage(UPLOAD_DIR)
-    uploads_size = get_folder_size(UPLOAD_DIR)
-    app_size = get_folder_size(APP_PATH_FOR_SIZE)
+    # Čísla z cachovaného snapshotu (viz services/stats_snapshot.py) - jeden dotaz
+    # do DB za STATS_CACHE_TTL_SECONDS, ne při každém obnovení dashboardu
+    data, generated_at, age = await stats_snapshot.get()
+    response.headers["Age"] = str(int(age))
 
     return {
         "system_version": "1.0.0",
         "database_status": "online",
-        "counts": {
-            "users": users_count,
-            "content_items": content_count,
-            "messages": messages_count
-        },
-        "storage": {
-            "total_disk_size": total_disk,
-            "used_disk_size": used_disk,
-            "free_disk_size": free_disk,
-            "app_folder_size": app_size,
-            "uploads_folder_size": uploads_size
-        }
+        **data,
+        "generated_at": generated_at,
+        "snapshot_age_seconds": round(age, 1),
     }
+
+def _as_utc(value: datetime) -> datetime:
+    """Čas bez časové zóny bereme jako UTC."""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+@router.get("/history", response_model=StatsHistoryResponse)
+async def get_stats_history(
+    metric: str = Query(..., description="users, content_items, messages_unread, uploads_bytes, uploads_files"),
+    start: Optional[datetime] = Query(None, alias="from", description="Začátek (výchozí: 24 h před koncem)"),
+    end: Optional[datetime] = Query(None, alias="to", description="Konec (výchozí: teď)"),
+    step: Optional[str] = Query(None, description="minute / hour / day (výchozí: podle rozsahu)"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Vývoj metriky v čase z předpočítaných bucketů (viz services/metrics.py)."""
+    if metric not in METRICS:
+        raise HTTPException(status_code=400, detail=f"Neznámá metrika: {metric}")
+    if step is not None and step not in RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"Neznámý krok: {step}")
+
+    end = _as_utc(end) if end else datetime.now(timezone.utc)
+    start = _as_utc(start) if start else end - timedelta(hours=24)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="Začátek musí být před koncem.")
+
+    step = step or pick_resolution(start, end)
+    if (end - start) / RESOLUTIONS[step] > settings.METRICS_MAX_POINTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Příliš mnoho bodů (max {settings.METRICS_MAX_POINTS}), zvolte větší krok nebo kratší rozsah."
+        )
+
+    points = await get_history(db, metric, start, end, step)
+    return {"metric": metric, "step": step, "points": points}
@@ -1,23 +1,53 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+import asyncio
+import uuid
+from typing import List
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Request, Header, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
-from app.api.deps import get_db, get_current_user
+from app.api.deps import get_db, get_current_user, parse_content_length
+from app.db.session import SessionLocal
 from app.models.user import User
-from app.services.image_service import process_and_save_image
-from app.services.audit import log_activity 
+from app.services.image_service import (
+    process_and_save_image, process_staged_image, stage_upload_file, build_srcset, hash_file, UploadTooLarge,
+)
+from app.services.image_engine import image_engine, ImageEngineBusy
+from app.services.image_processing import ImageRejected
+from app.services import upload_sessions
+from app.services.image_jobs import image_job_runner
+from app.crud import crud_image_job
+from app.services.upload_sessions import UploadSessionNotFound, UploadSessionBusy, UploadOffsetMismatch
+from app.services.audit import compression_pct, format_size, log_activity, log_upload
+from app.core.config import settings
+from app.schemas.media import (
+    UploadResponse, UploadSessionCreate, UploadSessionStatus, BatchUploadResponse, ImageJobStatus,
+)
 
 router = APIRouter()
 
-def format_size(size_in_bytes):
-    # Pomocná funkce: 1024 B -> 1 KB, 1024*1024 B -> 1 MB
-    if size_in_bytes < 1024:
-        return f"{size_in_bytes} B"
-    elif size_in_bytes < 1024 * 1024:
-        return f"{size_in_bytes / 1024:.1f} KB"
-    else:
-        return f"{size_in_bytes / (1024 * 1024):.1f} MB"
+def too_large_exception() -> HTTPException:
+    limit = format_size(settings.UPLOAD_MAX_BYTES)
+    return HTTPException(status_code=413, detail=f"Soubor je příliš velký (maximum je {limit}).")
 
-@router.post("/", response_model=dict)
+def busy_exception() -> HTTPException:
+    # Pool je plný -> klient to má zkusit znovu za chvíli
+    return HTTPException(
+        status_code=503,
+        detail="Server právě zpracovává příliš mnoho obrázků. Zkuste to prosím za chvíli.",
+        headers={"Retry-After": str(settings.IMAGE_RETRY_AFTER)},
+    )
+
+def upload_response(result: dict) -> dict:
+    return {
+        "url": result["url"],
+        "width": result["width"],
+        "height": result["height"],
+        "placeholder": result["placeholder"],
+        "variants": result["variants"],
+        "srcset": build_srcset(result["variants"]),
+    }
+
+@router.post("/", response_model=UploadResponse)
 async def upload_file(
     file: UploadFile = File(...),
     db: AsyncSession = Depends(get_db),
@@ -33,28 +63,267 @@ async def upload_file(
 
     try:
         # 2. Voláme službu (magie se děje tam)
-        result = await process_and_save_image(file)
+        result = await process_and_save_image(db, file, user_id=user_id)
 
         # 3. ZAPÍŠEME AUDIT LOG 📝
-        orig_readable = format_size(result['original_size'])
-        final_readable = format_size(result['final_size'])
-        
-        # Kolik jsme ušetřili? (např. "Ušetřeno 90%")
-        saving_pct = 100 - (result['final_size'] / result['original_size'] * 100)
-        
-        log_detail = (
-            f"Uživatel {user_email} nahrál soubor: {result['filename']}. "
-            f"Velikost: {orig_readable} -> {final_readable} (Komprese {saving_pct:.0f}%)."
+        await log_upload(user_id, user_email, result)
+
+        return upload_response(result)
+
+    except ImageEngineBusy:
+        raise busy_exception()
+    except UploadTooLarge:
+        raise too_large_exception()
+    except ImageRejected as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Chyba nahrávání: {str(e)}")
+
+
+# --- DÁVKOVÝ UPLOAD (galerie) ---
+@router.post("/batch", response_model=BatchUploadResponse)
+async def upload_batch(
+    files: List[UploadFile] = File(...),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Nahraje víc obrázků jedním requestem. Soubory se zpracují paralelně
+    (max. UPLOAD_BATCH_CONCURRENCY najednou), do audit logu jde jeden souhrnný záznam.
+    Chyba jednoho souboru neshodí ostatní - výsledek je po souborech.
+    """
+    if len(files) > settings.UPLOAD_BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Najednou lze nahrát maximálně {settings.UPLOAD_BATCH_MAX_FILES} souborů."
         )
 
+    user_id = current_user.id
+    user_email = current_user.email
+    semaphore = asyncio.Semaphore(settings.UPLOAD_BATCH_CONCURRENCY)
+
+    async def process_one(file: UploadFile) -> dict:
+        item = {"filename": file.filename or "", "ok": False}
+        if not (file.content_type or "").startswith("image/"):
+            return {**item, "error": "Soubor není obrázek."}
+
+        async with semaphore:
+            try:
+                # Každý soubor má vlastní session - jedna AsyncSession se nesmí sdílet mezi tasky
+                async with SessionLocal() as file_db:
+                    result = await process_and_save_image(file_db, file, user_id=user_id)
+                return {**item, "ok": True, "result": upload_response(result), "_raw": result}
+            except ImageEngineBusy:
+                return {**item, "error": "Server je přetížený, zkuste soubor nahrát znovu.", "retryable": True}
+            except UploadTooLarge:
+                return {**item, "error": too_large_exception().detail}
+            except ImageRejected as e:
+                return {**item, "error": str(e)}
+            except Exception as e:
+                return {**item, "error": f"Chyba nahrávání: {str(e)}"}
+
+    items = await asyncio.gather(*(process_one(f) for f in files))
+    done = [item.pop("_raw") for item in items if item["ok"]]
+
+    # Jeden souhrnný záznam do audit logu za celou dávku
+    if done:
+        original_total = sum(r["original_size"] for r in done)
+        final_total = sum(r["final_size"] for r in done)
         await log_activity(
-            db,
-            action="UPLOAD_FILE",
+            action="UPLOAD_BATCH",
             user_id=user_id,
-            details=log_detail
+            actor_email=user_email,
+            payload={
+                "uploaded": len(done),
+                "files": len(files),
+                "filenames": [r["filename"] for r in done],
+                "original_size": original_total,
+                "final_size": final_total,
+                "compression_pct": compression_pct(original_total, final_total),
+            },
+        )
+
+    return {
+        "uploaded": len(done),
+        "failed": len(files) - len(done),
+        "items": items,
+    }
+
+
+# --- ASYNCHRONNÍ ZPRACOVÁNÍ (JOB) ---
+# Request jen uloží soubor a hned vrátí 202 s ID jobu; klient se pak ptá
+# na GET /jobs/{id}, dokud není status "done" (nebo "failed").
+
+def _job_status(job) -> dict:
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "error": job.error,
+        "result": job.result if job.status == "done" else None,
+    }
+
+@router.post("/jobs", response_model=ImageJobStatus, status_code=status.HTTP_202_ACCEPTED)
+async def create_upload_job(
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if not file.content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail="Soubor není obrázek.")
+
+    try:
+        staged_path, source_hash = await stage_upload_file(file)
+    except UploadTooLarge:
+        raise too_large_exception()
+
+    job = await crud_image_job.create_job(
+        db, uuid.uuid4().hex, current_user.id, file.filename, staged_path, source_hash
+    )
+    image_job_runner.enqueue(job.id)
+    return _job_status(job)
+
+@router.get("/jobs/{job_id}", response_model=ImageJobStatus)
+async def read_upload_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    job = await crud_image_job.get_job(db, job_id)
+    # Cizí job se tváří jako neexistující
+    if not job or job.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Job nenalezen.")
+    return _job_status(job)
+
+
+# --- NAVAZOVANÝ UPLOAD PO KUSECH ---
+# 1. POST   /sessions              -> založení (klient pošle celkovou velikost)
+# 2. PUT    /sessions/{id}         -> další kus (hlavička Upload-Offset = odkud kus začíná)
+# 3. GET    /sessions/{id}         -> kolik už máme (po výpadku spojení)
+# 4. POST   /sessions/{id}/complete -> zpracování obrázku
+# 5. DELETE /sessions/{id}         -> zrušení
+
+def _session_status(session, offset: int) -> dict:
+    return {
+        "upload_id": session.id,
+        "offset": offset,
+        "total_size": session.total_size,
+        "chunk_size": settings.UPLOAD_CHUNK_SIZE,
+    }
+
+async def _get_session_or_404(upload_id: str, user_id: int):
+    try:
+        return await upload_sessions.get_session(upload_id, user_id)
+    except UploadSessionNotFound:
+        raise HTTPException(status_code=404, detail="Upload nenalezen (možná vypršel).")
+
+@router.post("/sessions", response_model=UploadSessionStatus, status_code=status.HTTP_201_CREATED)
+async def create_upload_session(
+    body: UploadSessionCreate,
+    current_user: User = Depends(get_current_user),
+):
+    if not body.content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail="Soubor není obrázek.")
+    try:
+        session = await upload_sessions.create_session(
+            current_user.id, body.filename, body.content_type, body.total_size
+        )
+    except UploadTooLarge:
+        raise too_large_exception()
+    return _session_status(session, 0)
+
+@router.get("/sessions/{upload_id}", response_model=UploadSessionStatus)
+async def read_upload_session(
+    upload_id: str,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+):
+    session, offset = await _get_session_or_404(upload_id, current_user.id)
+    response.headers["Upload-Offset"] = str(offset)
+    return _session_status(session, offset)
+
+@router.put("/sessions/{upload_id}", response_model=UploadSessionStatus)
+async def append_upload_chunk(
+    upload_id: str,
+    request: Request,
+    response: Response,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    current_user: User = Depends(get_current_user),
+):
+    session, _ = await _get_session_or_404(upload_id, current_user.id)
+
+    # Kus, který by přetekl ohlášenou velikost, odmítneme ještě před čtením těla
+    try:
+        content_length = parse_content_length(request.headers.get("content-length"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if content_length and upload_offset + content_length > session.total_size:
+        raise too_large_exception()
+
+    try:
+        offset = await upload_sessions.append_chunk(session, upload_offset, request.stream())
+    except UploadOffsetMismatch as e:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Nesouhlasí offset, server má uloženo {e.current_offset} B.",
+            headers={"Upload-Offset": str(e.current_offset)},
+        )
+    except UploadSessionBusy:
+        raise HTTPException(status_code=409, detail="Do tohoto uploadu právě zapisuje jiný požadavek.")
+    except UploadTooLarge:
+        raise too_large_exception()
+
+    response.headers["Upload-Offset"] = str(offset)
+    return _session_status(session, offset)
+
+@router.post("/sessions/{upload_id}/complete", response_model=UploadResponse)
+async def complete_upload_session(
+    upload_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    user_id = current_user.id
+    user_email = current_user.email
+
+    session, offset = await _get_session_or_404(upload_id, user_id)
+    if offset != session.total_size:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Upload není kompletní ({offset} z {session.total_size} B).",
+            headers={"Upload-Offset": str(offset)},
         )
 
-        return {"url": result["url"]}
+    # Plný pool -> 503 hned, bez hashování celého souboru (data zůstávají na disku)
+    if image_engine.is_saturated:
+        raise busy_exception()
+
+    try:
+        handle = await upload_sessions.lock_session(session)
+    except UploadSessionBusy:
+        raise HTTPException(status_code=409, detail="Do tohoto uploadu právě zapisuje jiný požadavek.")
 
+    try:
+        source_hash = await run_in_threadpool(hash_file, session.part_path)
+        result = await process_staged_image(db, session.part_path, source_hash, user_id=user_id)
+    except ImageEngineBusy:
+        # Data necháváme na disku - klient může "complete" zopakovat
+        raise busy_exception()
+    except ImageRejected as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Chyba nahrávání: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Chyba nahrávání: {str(e)}")
+    finally:
+        await upload_sessions.unlock_session(handle)
+
+    await upload_sessions.discard_session(session)
+    await log_upload(user_id, user_email, result)
+
+    return upload_response(result)
+
+@router.delete("/sessions/{upload_id}", status_code=204)
+async def delete_upload_session(
+    upload_id: str,
+    current_user: User = Depends(get_current_user),
+):
+    session, _ = await _get_session_or_404(upload_id, current_user.id)
+    await upload_sessions.discard_session(session)
+    return
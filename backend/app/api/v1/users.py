@@ -39,10 +39,10 @@ async def create_user_by_admin_endpoint(
 
     # 3. Logování
     await log_activity(
-        db,
         action="USER_ADD_BY_ADMIN",
         user_id=admin.id,
-        details=f"Admin {admin.email} vytvořil uživatele: {new_user.email} s vynucenou změnou hesla."
+        actor_email=admin.email,
+        payload={"target_user_id": new_user.id, "target_email": new_user.email}
     )
 
     # 4. Vrácení odpovědi (zahrnuje dočasné heslo)
@@ -90,10 +90,10 @@ async def set_user_active_endpoint(
     # Logování
     action = "USER_ACTIVATED" if body.is_active else "USER_DEACTIVATED"
     await log_activity(
-        db,
         action=action,
         user_id=admin.id,
-        details=f"Admin {admin.email} změnil stav uživatele {user.email} na {'aktivní' if body.is_active else 'neaktivní'}."
+        actor_email=admin.email,
+        payload={"target_user_id": user.id, "target_email": user.email, "is_active": body.is_active}
     )
 
     return updated
@@ -122,13 +122,10 @@ async def set_user_role_endpoint(
 
     # 🔍 Logování změny role
     await log_activity(
-        db,
         action="USER_ROLE_CHANGED",
         user_id=admin.id,
-        details=(
-            f"Admin {admin.email} změnil roli uživatele {user.email} "
-            f"na {'Admin' if body.is_admin else 'Uživatel'}."
-        ),
+        actor_email=admin.email,
+        payload={"target_user_id": user.id, "target_email": user.email, "is_admin": body.is_admin},
     )
 
     return updated
\ No newline at end of file
@@ -10,5 +10,128 @@ class Settings:
     # Logování: Načteme z .env, pokud tam není, použijeme 365.
     # Důležité: Musíme to převést na int (číslo), protože .env vrací text.
     LOG_RETENTION_DAYS: int = int(os.getenv("LOG_RETENTION_DAYS", 365))
+    # Kolik měsíčních partitions audit logu držet založených dopředu (Postgres)
+    AUDIT_PARTITIONS_AHEAD_MONTHS: int = int(os.getenv("AUDIT_PARTITIONS_AHEAD_MONTHS", 3))
+    # Retence po dávkách (services/audit_retention.py): největší dávka a cílová doba jedné dávky
+    AUDIT_DELETE_BATCH_SIZE: int = int(os.getenv("AUDIT_DELETE_BATCH_SIZE", 5000))
+    AUDIT_RETENTION_BATCH_SECONDS: float = float(os.getenv("AUDIT_RETENTION_BATCH_SECONDS", 0.5))
+    # Pauza mezi dávkami (ať úklid nepřetěžuje DB)
+    AUDIT_RETENTION_PAUSE_SECONDS: float = float(os.getenv("AUDIT_RETENTION_PAUSE_SECONDS", 0.1))
+    # Cron pokračuje v úklidu každých N minut, vždy nejvýš TIME_BUDGET sekund;
+    # nový úklid začne jednou za RUN_HOURS
+    AUDIT_RETENTION_INTERVAL_MINUTES: int = int(os.getenv("AUDIT_RETENTION_INTERVAL_MINUTES", 10))
+    AUDIT_RETENTION_TIME_BUDGET_SECONDS: float = float(os.getenv("AUDIT_RETENTION_TIME_BUDGET_SECONDS", 20))
+    AUDIT_RETENTION_RUN_HOURS: int = int(os.getenv("AUDIT_RETENTION_RUN_HOURS", 24))
+    # Studený archiv: záznamy se před smazáním uloží jako NDJSON.gz po dnech (services/audit_archive.py)
+    AUDIT_ARCHIVE_ENABLED: bool = os.getenv("AUDIT_ARCHIVE_ENABLED", "true").lower() in ("1", "true", "yes")
+    AUDIT_ARCHIVE_DIR: str = os.getenv("AUDIT_ARCHIVE_DIR", "archive/audit")
+    # Kolik času dostane úklid přímo v requestu DELETE /api/logs/cleanup (zbytek doběhne na pozadí)
+    AUDIT_RETENTION_REQUEST_SECONDS: float = float(os.getenv("AUDIT_RETENTION_REQUEST_SECONDS", 5))
 
-settings = Settings()
\ No newline at end of file
+    # --- Zpracování obrázků (process pool) ---
+    # Kolik procesů smí současně dekódovat/kódovat obrázky
+    IMAGE_WORKERS: int = int(os.getenv("IMAGE_WORKERS", 2))
+    # Kolik dalších obrázků smí čekat ve frontě, než začneme vracet 503
+    IMAGE_QUEUE_SIZE: int = int(os.getenv("IMAGE_QUEUE_SIZE", 8))
+    # Hodnota hlavičky Retry-After (v sekundách) při přetížení
+    IMAGE_RETRY_AFTER: int = int(os.getenv("IMAGE_RETRY_AFTER", 5))
+    # Šířky generovaných variant (pro srcset). Největší = hlavní obrázek.
+    IMAGE_VARIANT_WIDTHS: list[int] = sorted(
+        int(w) for w in os.getenv("IMAGE_VARIANT_WIDTHS", "320,640,1024,1600").split(",") if w.strip()
+    )
+    # Kvalita WebP komprese (0-100)
+    IMAGE_QUALITY: int = int(os.getenv("IMAGE_QUALITY", 80))
+    # Ochrana proti "decompression bomb": max. počet pixelů podle hlavičky (default 100 MP)
+    IMAGE_MAX_PIXELS: int = int(os.getenv("IMAGE_MAX_PIXELS", 100_000_000))
+    # Max. paměť na dekódovaný obrázek (po zmenšeném dekódování), default 256 MB
+    IMAGE_MAX_DECODE_BYTES: int = int(os.getenv("IMAGE_MAX_DECODE_BYTES", 256 * 1024 * 1024))
+    # Dočasná složka pro nahrané soubory (nesmí být uvnitř /uploads, ta je veřejná)
+    UPLOAD_TMP_DIR: str = os.getenv("UPLOAD_TMP_DIR", "uploads_tmp")
+
+    # --- Limity uploadu ---
+    # Maximální velikost jednoho nahrávaného souboru (default 40 MB)
+    UPLOAD_MAX_BYTES: int = int(os.getenv("UPLOAD_MAX_BYTES", 40 * 1024 * 1024))
+    # Doporučená velikost jednoho kusu u navazovaného (chunked) uploadu
+    UPLOAD_CHUNK_SIZE: int = int(os.getenv("UPLOAD_CHUNK_SIZE", 2 * 1024 * 1024))
+    # Dávkový upload: max. počet souborů v jednom requestu a kolik z nich zpracováváme souběžně
+    UPLOAD_BATCH_MAX_FILES: int = int(os.getenv("UPLOAD_BATCH_MAX_FILES", 20))
+    UPLOAD_BATCH_CONCURRENCY: int = int(os.getenv("UPLOAD_BATCH_CONCURRENCY", 2))
+    # Asynchronní zpracování (fronta jobů): souběžnost, počet pokusů a lease jednoho pokusu
+    IMAGE_JOB_CONCURRENCY: int = int(os.getenv("IMAGE_JOB_CONCURRENCY", 2))
+    IMAGE_JOB_MAX_ATTEMPTS: int = int(os.getenv("IMAGE_JOB_MAX_ATTEMPTS", 3))
+    IMAGE_JOB_LEASE_SECONDS: int = int(os.getenv("IMAGE_JOB_LEASE_SECONDS", 300))
+    # Jak často se runner podívá do DB po jobech (z jiných workerů / po restartu)
+    IMAGE_JOB_POLL_SECONDS: int = int(os.getenv("IMAGE_JOB_POLL_SECONDS", 15))
+    # Po kolika hodinách nečinnosti se rozpracovaný upload zahodí
+    UPLOAD_SESSION_TTL_HOURS: int = int(os.getenv("UPLOAD_SESSION_TTL_HOURS", 24))
+
+    # --- Úklid osiřelých souborů v /uploads (GC) ---
+    # Jak často se úklid spouští a kolik času smí jedno spuštění zabrat (pak pokračuje příště)
+    UPLOAD_GC_INTERVAL_MINUTES: int = int(os.getenv("UPLOAD_GC_INTERVAL_MINUTES", 10))
+    UPLOAD_GC_TIME_BUDGET_SECONDS: float = float(os.getenv("UPLOAD_GC_TIME_BUDGET_SECONDS", 5))
+    # Kolik souborů se kontroluje jedním dotazem do DB
+    UPLOAD_GC_BATCH_SIZE: int = int(os.getenv("UPLOAD_GC_BATCH_SIZE", 1000))
+    # Soubor mladší než tohle se nemaže (upload čeká, až uživatel uloží formulář)
+    UPLOAD_GC_GRACE_HOURS: int = int(os.getenv("UPLOAD_GC_GRACE_HOURS", 24))
+    # True = jen hlásí, co by smazal (report v system_state + výpis do logu)
+    UPLOAD_GC_DRY_RUN: bool = os.getenv("UPLOAD_GC_DRY_RUN", "false").lower() in ("1", "true", "yes")
+
+    # --- Přestěhování starých souborů do uploads/ab/cd/ (běží na pozadí, dokud není hotovo) ---
+    UPLOAD_MIGRATION_BATCH_SIZE: int = int(os.getenv("UPLOAD_MIGRATION_BATCH_SIZE", 500))
+    UPLOAD_MIGRATION_TIME_BUDGET_SECONDS: float = float(os.getenv("UPLOAD_MIGRATION_TIME_BUDGET_SECONDS", 5))
+
+    # --- Dopočet rozměrů a placeholderů u obrázků nahraných před LQIP (běží na pozadí, dokud není hotovo) ---
+    PLACEHOLDER_BACKFILL_BATCH_SIZE: int = int(os.getenv("PLACEHOLDER_BACKFILL_BATCH_SIZE", 50))
+    PLACEHOLDER_BACKFILL_TIME_BUDGET_SECONDS: float = float(os.getenv("PLACEHOLDER_BACKFILL_TIME_BUDGET_SECONDS", 5))
+
+    # --- Počítadla místa pro /api/stats ---
+    # Jak často se počítadla přepočítají podle skutečného stavu disku
+    STORAGE_RECONCILE_HOURS: int = int(os.getenv("STORAGE_RECONCILE_HOURS", 6))
+
+    # --- Snapshot statistik pro dashboard (/api/stats) ---
+    # Do tohoto stáří se snapshot vrací bez přepočtu
+    STATS_CACHE_TTL_SECONDS: float = float(os.getenv("STATS_CACHE_TTL_SECONDS", 30))
+    # Starší snapshot se ještě vrátí a přepočítá na pozadí; nad tento limit request na přepočet počká
+    STATS_MAX_STALE_SECONDS: float = float(os.getenv("STATS_MAX_STALE_SECONDS", 600))
+
+    # --- Časové řady metrik (/api/stats/history) ---
+    METRICS_SAMPLE_MINUTES: int = int(os.getenv("METRICS_SAMPLE_MINUTES", 1))
+    # Retence bucketů podle rozlišení (0 = držet napořád)
+    METRICS_RETENTION_MINUTE_HOURS: int = int(os.getenv("METRICS_RETENTION_MINUTE_HOURS", 48))
+    METRICS_RETENTION_HOUR_DAYS: int = int(os.getenv("METRICS_RETENTION_HOUR_DAYS", 90))
+    METRICS_RETENTION_DAY_DAYS: int = int(os.getenv("METRICS_RETENTION_DAY_DAYS", 0))
+    # Strop počtu bodů v jedné odpovědi (podle něj se volí automatický krok)
+    METRICS_MAX_POINTS: int = int(os.getenv("METRICS_MAX_POINTS", 1500))
+
+    # --- Outbox (efekty po commitu: mazání souborů, audit log) ---
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 5))
+    # Prodleva před 2. pokusem v sekundách (každý další pokus 2x déle)
+    OUTBOX_RETRY_DELAY: float = float(os.getenv("OUTBOX_RETRY_DELAY", 1))
+
+    # --- Audit log po dávkách (services/audit_sink.py) ---
+    AUDIT_BATCH_SIZE: int = int(os.getenv("AUDIT_BATCH_SIZE", 200))
+    # Nejdéle tak dlouho čeká záznam ve frontě na zápis (sekundy)
+    AUDIT_FLUSH_INTERVAL: float = float(os.getenv("AUDIT_FLUSH_INTERVAL", 1))
+    AUDIT_QUEUE_SIZE: int = int(os.getenv("AUDIT_QUEUE_SIZE", 10000))
+    # Jak dlouho request při plné frontě čeká na místo, než záznam zapíše sám
+    AUDIT_ENQUEUE_TIMEOUT: float = float(os.getenv("AUDIT_ENQUEUE_TIMEOUT", 2))
+
+    # --- On-demand varianty (/uploads/<soubor>?w=&q=&fmt=) ---
+    # Kam ukládáme vyrenderované varianty (mimo /uploads, aby se nemíchaly s originály)
+    VARIANT_CACHE_DIR: str = os.getenv("VARIANT_CACHE_DIR", "cache/variants")
+    # Maximální velikost cache na disku; nejdéle nepoužité varianty se mažou (LRU)
+    VARIANT_CACHE_MAX_BYTES: int = int(os.getenv("VARIANT_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+    # Požadovaná šířka se zaokrouhlí nahoru na násobek kroku (brání zahlcení cache)
+    VARIANT_WIDTH_STEP: int = int(os.getenv("VARIANT_WIDTH_STEP", 64))
+
+    # --- Servírování /uploads ---
+    # max-age pro soubory se starým (ne obsahovým) názvem; obsahově adresované jsou "immutable"
+    MEDIA_CACHE_MAX_AGE: int = int(os.getenv("MEDIA_CACHE_MAX_AGE", 86400))
+    # True = data neposílá Python, ale nginx (X-Accel-Redirect). V nginx pak musí být:
+    #   location /_protected/uploads/  { internal; alias /app/uploads/; }
+    #   location /_protected/variants/ { internal; alias /app/cache/variants/; }
+    MEDIA_ACCEL_REDIRECT: bool = os.getenv("MEDIA_ACCEL_REDIRECT", "false").lower() in ("1", "true", "yes")
+    MEDIA_ACCEL_UPLOADS_PREFIX: str = os.getenv("MEDIA_ACCEL_UPLOADS_PREFIX", "/_protected/uploads/")
+    MEDIA_ACCEL_VARIANTS_PREFIX: str = os.getenv("MEDIA_ACCEL_VARIANTS_PREFIX", "/_protected/variants/")
+
+settings = Settings()
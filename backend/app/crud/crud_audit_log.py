@@ -0,0 +1,159 @@
+import base64
+import json
+import re
+from datetime import date, datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import func, tuple_, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+from app.models.audit_log import AuditLog
+
+# --- Kurzor pro stránkování (keyset) ---
+# Neprůhledný řetězec s pozicí posledního vráceného záznamu: (created_at, id).
+# Další stránka začíná "za ním" přes index, ne přeskakováním (OFFSET) -
+# hluboké stránky jsou stejně rychlé jako první.
+
+def encode_cursor(log: AuditLog) -> str:
+    raw = f"{log.created_at.isoformat()}|{log.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Vyhodí ValueError, když kurzor není platný."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, log_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(log_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Neplatný kurzor.")
+
+# --- Filtr podle payloadu ---
+# ?payload=category_id=5&payload=deduplicated=true -> {"category_id": 5, "deduplicated": true}.
+# Hodnota se čte jako JSON (čísla, true/false, null), jinak jako text.
+PAYLOAD_KEY = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+def parse_payload_filter(items: list[str]) -> dict:
+    """Vyhodí ValueError, když podmínka není ve tvaru klíč=hodnota."""
+    conditions = {}
+    for item in items:
+        key, sep, raw = item.partition("=")
+        if not sep or not PAYLOAD_KEY.match(key):
+            raise ValueError(f"Neplatný filtr payloadu: {item} (očekává se klíč=hodnota).")
+        try:
+            conditions[key] = json.loads(raw)
+        except ValueError:
+            conditions[key] = raw
+    return conditions
+
+def _payload_conditions(dialect: str, conditions: dict) -> list:
+    if dialect == "postgresql":
+        # payload @> {...} - jde přes GIN index ix_audit_logs_payload
+        return [type_coerce(AuditLog.payload, JSONB).contains(conditions)]
+    # Jinde (SQLite) klíč po klíči, bez indexu
+    return [
+        func.json_extract(AuditLog.payload, f"$.{key}").is_(None) if value is None
+        else func.json_extract(AuditLog.payload, f"$.{key}") == value
+        for key, value in conditions.items()
+    ]
+
+def _filter(
+    query,
+    dialect: str,
+    email: str | None = None,
+    action: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    payload: dict | None = None,
+):
+    """Filtry prohlížeče logů (společné pro výpis i export)."""
+    # 1. Filtr podle emailu (obsahuje text, nezáleží na velikosti písmen; trigramový index)
+    if email:
+        query = query.where(AuditLog.actor_email.ilike(f"%{email}%"))
+
+    # 2. Filtr podle akce (přesná shoda)
+    if action:
+        query = query.where(AuditLog.action == action)
+
+    # 3. Datum OD (větší nebo rovno)
+    if date_from:
+        query = query.where(AuditLog.created_at >= date_from)
+
+    # 4. Datum DO (menší nebo rovno - do konce dne)
+    if date_to:
+        query = query.where(AuditLog.created_at <= datetime.combine(date_to, datetime.max.time()))
+
+    # 5. Filtr podle payloadu (všechny podmínky najednou)
+    if payload:
+        query = query.where(*_payload_conditions(dialect, payload))
+
+    return query
+
+async def get_logs(
+    db: AsyncSession,
+    *,
+    limit: int = 100,
+    skip: int = 0,
+    cursor: str | None = None,
+    email: str | None = None,
+    action: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    payload: dict | None = None,
+) -> tuple[list[AuditLog], str | None]:
+    """
+    Logy od nejnovějších + kurzor na další stránku (None = další už nejsou).
+    S kurzorem se skip ignoruje; skip (OFFSET) zůstává kvůli starým klientům.
+    """
+    # Řazení i podmínka kurzoru jdou přes (created_at, id) - pořadí je jednoznačné
+    # i pro záznamy se stejným časem a odpovídá indexům z migrace.
+    # Bez JOINu na uživatele - vrací i systémové záznamy (user_id = None).
+    query = select(AuditLog).order_by(AuditLog.created_at.desc(), AuditLog.id.desc())
+    query = _filter(
+        query, db.bind.dialect.name,
+        email=email, action=action, date_from=date_from, date_to=date_to, payload=payload,
+    )
+
+    if cursor:
+        created_at, log_id = decode_cursor(cursor)
+        query = query.where(tuple_(AuditLog.created_at, AuditLog.id) < (created_at, log_id))
+    elif skip:
+        query = query.offset(skip)
+
+    # O jeden navíc - podle něj poznáme, jestli existuje další stránka
+    result = await db.execute(query.limit(limit + 1))
+    logs = list(result.scalars().all())
+
+    next_cursor = None
+    if len(logs) > limit:
+        logs = logs[:limit]
+        next_cursor = encode_cursor(logs[-1])
+    return logs, next_cursor
+
+# Sloupce exportu (pořadí = pořadí sloupců v CSV)
+EXPORT_COLUMNS = ("id", "created_at", "action", "user_id", "actor_email", "details", "payload")
+
+async def stream_logs(
+    db: AsyncSession,
+    *,
+    batch_size: int = 1000,
+    email: str | None = None,
+    action: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    payload: dict | None = None,
+):
+    """
+    Všechny logy odpovídající filtrům (od nejnovějších) jako async iterátor řádků.
+    Čte se kurzorem na straně serveru po `batch_size` řádcích - v paměti je
+    vždy jen jedna dávka, ne celý výsledek. Session musí zůstat otevřená,
+    dokud se iteruje.
+    """
+    query = select(*(getattr(AuditLog, column) for column in EXPORT_COLUMNS))
+    query = _filter(
+        query, db.bind.dialect.name,
+        email=email, action=action, date_from=date_from, date_to=date_to, payload=payload,
+    )
+    query = query.order_by(AuditLog.created_at.desc(), AuditLog.id.desc())
+
+    result = await db.stream(query.execution_options(yield_per=batch_size))
+    async for row in result:
+        yield row
@@ -0,0 +1,59 @@
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models.audit_rollup import AuditRollup
+
+async def add_counts(db: AsyncSession, counts: dict[tuple[str, datetime, str, int], int]):
+    """
+    Přičte počty ((resolution, bucket, action, user_id) -> počet) jedním upsertem.
+    Necommituje - volá se v transakci zápisu audit logu.
+    """
+    if not counts:
+        return
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    # Seřazené klíče = souběžné workery zamykají řádky ve stejném pořadí (žádný deadlock)
+    rows = [
+        {"resolution": resolution, "bucket": bucket, "action": action, "user_id": user_id, "count": count}
+        for (resolution, bucket, action, user_id), count in sorted(counts.items())
+    ]
+    query = dialect.insert(AuditRollup).values(rows)
+    await db.execute(query.on_conflict_do_update(
+        index_elements=["resolution", "bucket", "action", "user_id"],
+        set_={"count": AuditRollup.count + query.excluded.count},
+    ))
+
+async def get_counts(
+    db: AsyncSession,
+    resolution: str,
+    start: datetime,
+    end: datetime,
+    *,
+    action: str | None = None,
+    user_id: int | None = None,
+    per_bucket: bool = True,
+    per_user: bool = False,
+) -> list[dict]:
+    """
+    Součty v bucketech [start, end] seskupené podle akce, volitelně i bucketu a uživatele.
+    Řádky: {"bucket"?, "action", "user_id"?, "count"}.
+    """
+    groups = [AuditRollup.action]
+    if per_bucket:
+        groups.insert(0, AuditRollup.bucket)
+    if per_user:
+        groups.append(AuditRollup.user_id)
+
+    query = select(*groups, func.sum(AuditRollup.count).label("count")).where(
+        AuditRollup.resolution == resolution,
+        AuditRollup.bucket >= start,
+        AuditRollup.bucket <= end,
+    )
+    if action:
+        query = query.where(AuditRollup.action == action)
+    if user_id is not None:
+        query = query.where(AuditRollup.user_id == user_id)
+
+    result = await db.execute(query.group_by(*groups).order_by(*groups))
+    return [dict(row) for row in result.mappings().all()]
@@ -3,6 +3,7 @@ from sqlalchemy.future import select
 from sqlalchemy import delete
 from app.models.category import Category
 from app.schemas.category import CategoryCreate, CategoryUpdate
+from app.crud import crud_media
 import re
 import unicodedata
 
@@ -31,7 +32,7 @@ async def get_category_by_slug(db: AsyncSession, slug: str):
     result = await db.execute(select(Category).where(Category.slug == slug))
     return result.scalar_one_or_none()
 
-async def create_category(db: AsyncSession, category_in: CategoryCreate):
+async def create_category(db: AsyncSession, category_in: CategoryCreate, commit: bool = True):
     # Pokud slug není zadaný, vyrobíme ho z názvu
     if not category_in.slug:
         category_in.slug = slugify(category_in.name)
@@ -39,28 +40,52 @@ async def create_category(db: AsyncSession, category_in: CategoryCreate):
         # I zadaný slug raději "vyčistíme"
         category_in.slug = slugify(category_in.slug)
 
-    # Vytvoříme objekt
+    # Vytvoříme objekt (+ rozměry a placeholder velké fotky)
     db_obj = Category(**category_in.dict())
+    for field, value in (await crud_media.get_image_metadata(db, db_obj.image_path)).items():
+        setattr(db_obj, field, value)
+    # Kategorie začala používat nahrané soubory -> reference (ve stejném commitu)
+    await crud_media.add_reference(db, db_obj.image_path)
+    await crud_media.add_reference(db, db_obj.icon_path)
     db.add(db_obj)
+    if not commit:
+        # Commit udělá volající (jeden za celý request, viz services/outbox.py)
+        await db.flush()
+        return db_obj
     await db.commit()
     await db.refresh(db_obj)
     return db_obj
 
-async def update_category(db: AsyncSession, db_obj: Category, category_in: CategoryUpdate):
+async def update_category(db: AsyncSession, db_obj: Category, category_in: CategoryUpdate, commit: bool = True):
     # Převedeme data na dict a odstraníme prázdné hodnoty (None)
     update_data = category_in.dict(exclude_unset=True)
 
     # Pokud se mění název a slug nebyl zadán, můžeme slug přegenerovat (volitelné)
     # Zde to raději necháme na uživateli - slug by se neměl měnit samoúčelně (rozbíjí SEO)
+
+    # Nově použité soubory dostanou referenci (staré uvolňuje endpoint přes outbox)
+    for field in ("image_path", "icon_path"):
+        if field in update_data and update_data[field] != getattr(db_obj, field):
+            await crud_media.add_reference(db, update_data[field])
     
     for field, value in update_data.items():
         setattr(db_obj, field, value)
 
+    # Změnila se fotka -> přepíšeme i rozměry a placeholder
+    if "image_path" in update_data:
+        for field, value in (await crud_media.get_image_metadata(db, db_obj.image_path)).items():
+            setattr(db_obj, field, value)
+
     db.add(db_obj)
+    if not commit:
+        # Commit udělá volající (jeden za celý request, viz services/outbox.py)
+        await db.flush()
+        return db_obj
     await db.commit()
     await db.refresh(db_obj)
     return db_obj
 
-async def delete_category(db: AsyncSession, category_id: int):
+async def delete_category(db: AsyncSession, category_id: int, commit: bool = True):
     await db.execute(delete(Category).where(Category.id == category_id))
-    await db.commit()
\ No newline at end of file
+    if commit:
+        await db.commit()
\ No newline at end of file
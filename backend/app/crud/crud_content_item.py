@@ -3,6 +3,7 @@ from sqlalchemy.future import select
 from sqlalchemy import delete, func # Přidán func pro případné použití
 from app.models.content_item import ContentItem 
 from app.schemas.content_item import ContentItemCreate, ContentItemUpdate
+from app.crud import crud_media
 from typing import Optional
 import re
 import unicodedata
@@ -10,7 +11,7 @@ from sqlalchemy import select, func
 
 # --- NOVÉ IMPORTY PRO MAZÁNÍ GALERIE ---
 from app.models.content_item import ContentPhoto # Model pro ContentPhoto
-from app.services.image_service import delete_file_by_url # Služba pro mazání souborů
+from app.services.outbox import Outbox # Mazání souborů až po commitu
 # ---------------------------------------
 
 # Pomocná funkce na výrobu URL (Slug) - Použijeme stejnou logiku jako u Category
@@ -39,40 +40,61 @@ async def get_content_item_by_slug(db: AsyncSession, slug: str):
     result = await db.execute(select(ContentItem).where(ContentItem.slug == slug))
     return result.scalar_one_or_none()
 
-async def create_content_item(db: AsyncSession, item_in: ContentItemCreate):
+async def create_content_item(db: AsyncSession, item_in: ContentItemCreate, commit: bool = True):
     # 1. Slugify (vyrobíme ho z názvu, pokud není zadaný)
     if not item_in.slug:
         item_in.slug = slugify(item_in.title)
     else:
         item_in.slug = slugify(item_in.slug)
 
-    # 2. Vytvoření objektu
+    # 2. Vytvoření objektu (+ rozměry a placeholder obrázku)
     db_obj = ContentItem(**item_in.dict())
+    for field, value in (await crud_media.get_image_metadata(db, db_obj.image_url)).items():
+        setattr(db_obj, field, value)
+    # Položka začala používat nahraný soubor -> reference (ve stejném commitu)
+    await crud_media.add_reference(db, db_obj.image_url)
     db.add(db_obj)
+    if not commit:
+        # Commit udělá volající (jeden za celý request, viz services/outbox.py)
+        await db.flush()
+        return db_obj
     await db.commit()
     await db.refresh(db_obj)
     return db_obj
 
-async def update_content_item(db: AsyncSession, db_obj: ContentItem, item_in: ContentItemUpdate):
+async def update_content_item(db: AsyncSession, db_obj: ContentItem, item_in: ContentItemUpdate, commit: bool = True):
     update_data = item_in.dict(exclude_unset=True)
 
     # Pokud je upraven slug, vyčistíme ho
     if "slug" in update_data and update_data["slug"]:
         update_data["slug"] = slugify(update_data["slug"])
+
+    # Nový obrázek dostane referenci (starý uvolňuje endpoint přes outbox)
+    if "image_url" in update_data and update_data["image_url"] != db_obj.image_url:
+        await crud_media.add_reference(db, update_data["image_url"])
     
     for field, value in update_data.items():
         setattr(db_obj, field, value)
 
+    # Změnil se obrázek -> přepíšeme i rozměry a placeholder
+    if "image_url" in update_data:
+        for field, value in (await crud_media.get_image_metadata(db, db_obj.image_url)).items():
+            setattr(db_obj, field, value)
+
     db.add(db_obj)
+    if not commit:
+        # Commit udělá volající (jeden za celý request, viz services/outbox.py)
+        await db.flush()
+        return db_obj
     await db.commit()
     await db.refresh(db_obj)
     return db_obj
 
 # --- NOVÁ FUNKCE PRO MAZÁNÍ GALERIE A SOUBORŮ ---
-async def delete_associated_photos_and_files(db: AsyncSession, content_item_id: int) -> int:
+async def delete_associated_photos_and_files(db: AsyncSession, content_item_id: int, outbox: Outbox) -> int:
     """
-    Smaže všechny navázané ContentPhoto záznamy a jejich fyzické soubory z disku.
-    Vrací počet smazaných fotek.
+    Smaže všechny navázané ContentPhoto záznamy a jejich fyzické soubory z disku
+    (soubory až po commitu volajícího, přes outbox). Vrací počet smazaných fotek.
     """
     
     # 1. Najít všechny fotky patřící k položce
@@ -81,9 +103,9 @@ async def delete_associated_photos_and_files(db: AsyncSession, content_item_id:
     )
     photos = photos_result.scalars().all()
     
-    # 2. Smazat fyzické soubory pro každou fotku
+    # 2. Uvolnit soubory každé fotky (z disku zmizí po commitu)
     for photo in photos:
-        delete_file_by_url(photo.image_url) 
+        await outbox.release_file(db, photo.image_url)
         
     # 3. Smazat záznamy ContentPhoto z databáze
     if photos:
@@ -94,9 +116,10 @@ async def delete_associated_photos_and_files(db: AsyncSession, content_item_id:
     return len(photos)
 # --------------------------------------------------
 
-async def delete_content_item(db: AsyncSession, item_id: int):
+async def delete_content_item(db: AsyncSession, item_id: int, commit: bool = True):
     await db.execute(delete(ContentItem).where(ContentItem.id == item_id))
-    await db.commit()
+    if commit:
+        await db.commit()
 
 async def get_published_content_count(db: AsyncSession) -> int:
     """Vrátí celkový počet položek obsahu, které jsou publikované (is_published=True)."""
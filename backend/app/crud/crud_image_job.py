@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import update, or_, and_
+from app.models.image_job import ImageJob
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+def _claimable():
+    """Podmínka: job čeká (a nemá odložený pokus), nebo ho zpracovával worker, kterému vypršel lease."""
+    now = _now()
+    return or_(
+        and_(
+            ImageJob.status == "queued",
+            or_(ImageJob.next_attempt_at.is_(None), ImageJob.next_attempt_at <= now),
+        ),
+        and_(ImageJob.status == "processing", ImageJob.locked_until < now),
+    )
+
+async def create_job(db: AsyncSession, job_id: str, user_id: int, filename: str, source_path: str, source_hash: str) -> ImageJob:
+    job = ImageJob(
+        id=job_id,
+        status="queued",
+        user_id=user_id,
+        filename=filename,
+        source_path=source_path,
+        source_hash=source_hash,
+        attempts=0,
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+async def get_job(db: AsyncSession, job_id: str):
+    result = await db.execute(select(ImageJob).where(ImageJob.id == job_id))
+    return result.scalar_one_or_none()
+
+async def get_claimable_job_ids(db: AsyncSession, limit: int = 100) -> list[str]:
+    result = await db.execute(
+        select(ImageJob.id).where(_claimable()).order_by(ImageJob.created_at).limit(limit)
+    )
+    return list(result.scalars().all())
+
+async def claim_job(db: AsyncSession, job_id: str, lease_seconds: int) -> bool:
+    """
+    Atomicky převezme job ke zpracování. Vrací False, když ho mezitím
+    převzal jiný worker (nebo už není co dělat).
+    """
+    result = await db.execute(
+        update(ImageJob)
+        .where(ImageJob.id == job_id, _claimable())
+        .values(
+            status="processing",
+            attempts=ImageJob.attempts + 1,
+            locked_until=_now() + timedelta(seconds=lease_seconds),
+        )
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+async def mark_done(db: AsyncSession, job_id: str, result: dict):
+    await db.execute(
+        update(ImageJob)
+        .where(ImageJob.id == job_id)
+        .values(status="done", result=result, error=None, locked_until=None)
+    )
+    await db.commit()
+
+async def mark_retry(db: AsyncSession, job_id: str, error: str, delay_seconds: float, count_attempt: bool = True):
+    """Vrátí job do fronty s odloženým dalším pokusem."""
+    values = dict(
+        status="queued",
+        error=error,
+        locked_until=None,
+        next_attempt_at=_now() + timedelta(seconds=delay_seconds),
+    )
+    if not count_attempt:
+        # Přetížení není chyba obrázku - pokus se nepočítá
+        values["attempts"] = ImageJob.attempts - 1
+    await db.execute(update(ImageJob).where(ImageJob.id == job_id).values(**values))
+    await db.commit()
+
+async def mark_failed(db: AsyncSession, job_id: str, error: str):
+    await db.execute(
+        update(ImageJob)
+        .where(ImageJob.id == job_id)
+        .values(status="failed", error=error, locked_until=None)
+    )
+    await db.commit()
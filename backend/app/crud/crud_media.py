@@ -0,0 +1,94 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import update, delete
+from app.models.media_file import MediaFile
+from app.services.image_processing import upload_url_aliases
+
+async def get_media_by_url(db: AsyncSession, url: str):
+    # Záznam může mít starou (plochou) i novou (uploads/ab/cd/) podobu URL
+    result = await db.execute(select(MediaFile).where(MediaFile.url.in_(upload_url_aliases(url))).limit(1))
+    return result.scalar_one_or_none()
+
+async def get_media_by_source_hash(db: AsyncSession, source_hash: str):
+    result = await db.execute(select(MediaFile).where(MediaFile.source_hash == source_hash))
+    return result.scalar_one_or_none()
+
+async def get_image_metadata(db: AsyncSession, url: str | None) -> dict:
+    """
+    Rozměry a placeholder obrázku podle URL - pro kopii do ContentItem / Category.
+    U neevidovaného (starého) souboru nebo prázdné URL vrací None hodnoty.
+    """
+    media = await get_media_by_url(db, url) if url else None
+    return {
+        "image_width": media.width if media else None,
+        "image_height": media.height if media else None,
+        "image_placeholder": media.placeholder if media else None,
+    }
+
+async def add_reference(db: AsyncSession, url: str | None):
+    """
+    Záznam (ContentItem, ContentPhoto, Category) začal soubor používat -> ref_count + 1.
+    Volá se při uložení záznamu, ne při uploadu - nahraný a nikdy neuložený soubor
+    tak nemá žádnou referenci a uklidí ho upload_gc.
+    Změna se uloží až commitem volajícího (spolu se záznamem). Neevidovaný soubor -> nic.
+    """
+    if not url:
+        return
+    # Atomický UPDATE, aby se souběžná uložení navzájem nepřepsala
+    await db.execute(
+        update(MediaFile)
+        .where(MediaFile.url.in_(upload_url_aliases(url)))
+        .values(ref_count=MediaFile.ref_count + 1)
+    )
+
+async def register_media_file(
+    db: AsyncSession, data: dict, source_hash: str, user_id: int = None
+) -> tuple[MediaFile, bool]:
+    """
+    Uloží záznam o nově zpracovaném obrázku (zatím bez referencí, viz add_reference).
+    Když mezitím stejný soubor uložil souběžný request (unikátní url / source_hash),
+    vrátí jeho záznam. Vrací (záznam, True = založen teď).
+    """
+    db_obj = MediaFile(
+        url=data["url"],
+        filename=data["filename"],
+        width=data["width"],
+        height=data["height"],
+        variants=data["variants"],
+        placeholder=data.get("placeholder"),
+        source_hash=source_hash,
+        ref_count=0,
+        original_size=data["original_size"],
+        final_size=data["final_size"],
+        user_id=user_id,
+    )
+    db.add(db_obj)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        existing = await get_media_by_url(db, data["url"]) or await get_media_by_source_hash(db, source_hash)
+        return existing, False
+
+    await db.refresh(db_obj)
+    return db_obj, True
+
+async def release_reference(db: AsyncSession, media: MediaFile) -> int:
+    """
+    Jeden záznam přestal soubor používat -> ref_count - 1. Vrací počet zbývajících referencí.
+    Změna se uloží až commitem volajícího (spolu s jeho vlastní změnou).
+    """
+    # Atomický UPDATE (na Postgresu zároveň zamkne řádek až do commitu)
+    await db.execute(
+        update(MediaFile)
+        .where(MediaFile.id == media.id)
+        .values(ref_count=MediaFile.ref_count - 1)
+    )
+    remaining = await db.scalar(select(MediaFile.ref_count).where(MediaFile.id == media.id))
+    return max(remaining or 0, 0)
+
+async def delete_media(db: AsyncSession, media: MediaFile):
+    """Smaže záznam o souboru (bez commitu). Soubory z disku maže volající až po commitu."""
+    await db.execute(delete(MediaFile).where(MediaFile.id == media.id))
+    db.expunge(media)
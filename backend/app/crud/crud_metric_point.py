@@ -0,0 +1,62 @@
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import delete, func
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models.metric_point import MetricPoint
+
+async def add_samples(db: AsyncSession, samples: dict[str, float], buckets: dict[str, datetime]):
+    """
+    Započítá vzorky (metrika -> hodnota) do bucketů všech rozlišení (rozlišení -> začátek bucketu)
+    jedním upsertem a commitne. Přičítá se v databázi - vzorky z víc workerů se nepřepíšou.
+    """
+    if not samples:
+        return
+    postgres = db.bind.dialect.name == "postgresql"
+    dialect = postgresql if postgres else sqlite
+    # Dvouargumentové min/max: na Postgresu LEAST/GREATEST, na SQLite skalární min()/max()
+    least, greatest = (func.least, func.greatest) if postgres else (func.min, func.max)
+    # Seřazené klíče = souběžné workery zamykají řádky ve stejném pořadí (žádný deadlock)
+    rows = [
+        {
+            "metric": metric, "resolution": resolution, "bucket": bucket,
+            "min_value": value, "max_value": value, "sum_value": value, "last_value": value, "sample_count": 1,
+        }
+        for metric, value in sorted(samples.items())
+        for resolution, bucket in sorted(buckets.items())
+    ]
+    query = dialect.insert(MetricPoint).values(rows)
+    await db.execute(query.on_conflict_do_update(
+        index_elements=["metric", "resolution", "bucket"],
+        set_={
+            "min_value": least(MetricPoint.min_value, query.excluded.min_value),
+            "max_value": greatest(MetricPoint.max_value, query.excluded.max_value),
+            "sum_value": MetricPoint.sum_value + query.excluded.sum_value,
+            "last_value": query.excluded.last_value,
+            "sample_count": MetricPoint.sample_count + query.excluded.sample_count,
+        },
+    ))
+    await db.commit()
+
+async def get_points(
+    db: AsyncSession, metric: str, resolution: str, start: datetime, end: datetime
+) -> list[MetricPoint]:
+    result = await db.execute(
+        select(MetricPoint)
+        .where(
+            MetricPoint.metric == metric,
+            MetricPoint.resolution == resolution,
+            MetricPoint.bucket >= start,
+            MetricPoint.bucket <= end,
+        )
+        .order_by(MetricPoint.bucket)
+    )
+    return list(result.scalars().all())
+
+async def delete_older_than(db: AsyncSession, resolution: str, cutoff: datetime) -> int:
+    """Smaže buckety daného rozlišení starší než cutoff a commitne. Vrací počet smazaných."""
+    result = await db.execute(
+        delete(MetricPoint).where(MetricPoint.resolution == resolution, MetricPoint.bucket < cutoff)
+    )
+    await db.commit()
+    return result.rowcount
@@ -0,0 +1,33 @@
+from datetime import datetime, timezone
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import update
+from app.models.storage_usage import StorageUsage
+
+async def get_usage(db: AsyncSession) -> dict[str, StorageUsage]:
+    result = await db.execute(select(StorageUsage))
+    return {row.key: row for row in result.scalars().all()}
+
+async def add_usage(db: AsyncSession, key: str, delta_bytes: int, delta_files: int):
+    """
+    Atomicky přičte (odečte) k počítadlu a commitne.
+    Když řádek ještě neexistuje, nic nedělá - založí ho první přepočet.
+    """
+    await db.execute(
+        update(StorageUsage)
+        .where(StorageUsage.key == key)
+        .values(bytes=StorageUsage.bytes + delta_bytes, files=StorageUsage.files + delta_files)
+    )
+    await db.commit()
+
+async def set_usage(db: AsyncSession, key: str, total_bytes: int, total_files: int):
+    """Přepíše počítadlo skutečným stavem (po přepočtu) a commitne."""
+    result = await db.execute(select(StorageUsage).where(StorageUsage.key == key))
+    row = result.scalar_one_or_none()
+    if row is None:
+        row = StorageUsage(key=key)
+        db.add(row)
+    row.bytes = total_bytes
+    row.files = total_files
+    row.reconciled_at = datetime.now(timezone.utc)
+    await db.commit()
@@ -0,0 +1,17 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.models.system_state import SystemState
+
+async def get_state(db: AsyncSession, key: str) -> dict | None:
+    result = await db.execute(select(SystemState.value).where(SystemState.key == key))
+    return result.scalar_one_or_none()
+
+async def set_state(db: AsyncSession, key: str, value: dict):
+    """Uloží (přepíše) stav pod klíčem a commitne."""
+    result = await db.execute(select(SystemState).where(SystemState.key == key))
+    row = result.scalar_one_or_none()
+    if row is None:
+        db.add(SystemState(key=key, value=value))
+    else:
+        row.value = value
+    await db.commit()
@@ -10,4 +10,10 @@ from app.models.category import Category
 
 from app.models.content_item import ContentItem, ContentPhoto
 
-from app.models.message import Message
\ No newline at end of file
+from app.models.message import Message
+from app.models.media_file import MediaFile
+from app.models.image_job import ImageJob
+from app.models.system_state import SystemState
+from app.models.storage_usage import StorageUsage
+from app.models.metric_point import MetricPoint
+from app.models.audit_rollup import AuditRollup
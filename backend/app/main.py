@@ -1,55 +1,185 @@
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 import os
+from datetime import datetime, timedelta, timezone
 from app.core.config import settings
-from fastapi.staticfiles import StaticFiles
 
 # Importy našich funkcí
-from app.api.v1 import auth, logs, stats, categories, upload, content_items, users, messages
+from app.api.v1 import auth, logs, stats, categories, upload, content_items, users, messages, media
+from app.api.deps import parse_content_length
 from app.db.session import SessionLocal
-from app.services.audit import delete_old_logs, log_activity
+from app.services import audit_retention
+from app.services.audit import log_activity
+from app.services.audit_partitions import is_partitioned, ensure_partitions
+from app.services.audit_sink import audit_sink
+from app.services.image_engine import image_engine
+from app.services.image_jobs import image_job_runner
+from app.services.outbox import wait_for_pending
+from app.services.image_service import UPLOAD_DIR
+from app.services.metrics import sample_metrics
+from app.services.placeholder_backfill import run_placeholder_backfill
+from app.services.storage_usage import reconcile_storage_usage
+from app.services.upload_sessions import cleanup_stale_sessions
+from app.services.upload_gc import run_upload_gc
+from app.services.upload_migration import run_upload_migration
+from starlette.concurrency import run_in_threadpool
 
 
 # --- FUNKCE PRO CRON (To, co se děje v noci) ---
 async def run_cleanup():
-    """Tato funkce se spustí automaticky podle plánu"""
+    """Tato funkce se spustí automaticky podle plánu (po kouscích, viz services/audit_retention)"""
     async with SessionLocal() as db:
         try:
-            print("🕒 CRON: Spouštím automatický úklid logů...")
-            
-            # 1. Smažeme logy starší než 365 dní
-            count = await delete_old_logs(db, days=settings.LOG_RETENTION_DAYS)
-            
-            # 2. Pokud se něco smazalo, zapíšeme to do auditu jako "SYSTEM_CLEANUP"
-            if count > 0:
+            job = await audit_retention.get_job(db)
+
+            # 1. Jednou za AUDIT_RETENTION_RUN_HOURS začneme nový úklid (logy starší než LOG_RETENTION_DAYS)
+            start = None
+            if job is None or (
+                job["done"] and datetime.fromisoformat(job["finished_at"])
+                < datetime.now(timezone.utc) - timedelta(hours=settings.AUDIT_RETENTION_RUN_HOURS)
+            ):
+                print("🕒 CRON: Spouštím automatický úklid logů...")
+                start = audit_retention.new_job(settings.LOG_RETENTION_DAYS, trigger="auto")
+            elif job["done"]:
+                return
+
+            # 2. Pokračujeme v rozpracovaném úklidu (i v ručně spuštěném nebo přerušeném restartem)
+            try:
+                job = await audit_retention.run_retention(db, settings.AUDIT_RETENTION_TIME_BUDGET_SECONDS, start=start)
+            except audit_retention.RetentionBusy:
+                print("⏳ CRON: Úklid logů právě běží jinde, přeskakuji.")
+                return
+            if not job["done"]:
+                print(f"⏳ CRON: Úklid logů pokračuje: {audit_retention.describe(job)}")
+                return
+
+            # 3. Pokud se něco smazalo, zapíšeme to do auditu jako "SYSTEM_CLEANUP"
+            # (ručně spuštěný úklid, který doběhl až tady, jako "LOGS_CLEANUP" jeho autora)
+            if job["deleted"] > 0:
+                manual = job["trigger"] == "manual"
                 await log_activity(
-                    db,
-                    action="SYSTEM_CLEANUP",
-                    details=f"Automatický úklid: Smazáno {count} starých záznamů.",
-                    user_id=None # None = Udělal to Systém, ne uživatel
+                    action="LOGS_CLEANUP" if manual else "SYSTEM_CLEANUP",
+                    payload=audit_retention.log_payload(job, background=True),
+                    user_id=job["user_id"] # None = Udělal to Systém, ne uživatel
                 )
-                print(f"✅ CRON: Hotovo. Smazáno {count} záznamů.")
+                print(f"✅ CRON: Hotovo. Smazáno {job['deleted']} záznamů.")
             else:
                 print("💤 CRON: Žádné staré logy k mazání.")
                 
         except Exception as e:
             print(f"❌ CRON CHYBA: {e}")
 
+async def run_audit_partitions():
+    """Založí měsíční partitions audit logu dopředu (jen Postgres s partitions, jinak nic)."""
+    async with SessionLocal() as db:
+        try:
+            if await is_partitioned(db):
+                created = await ensure_partitions(db, settings.AUDIT_PARTITIONS_AHEAD_MONTHS)
+                if created:
+                    print(f"🗓️ CRON: Založeny partitions audit logu: {', '.join(created)}")
+        except Exception as e:
+            print(f"❌ CRON CHYBA (partitions audit logu): {e}")
+
+async def run_upload_sessions_cleanup():
+    """Zahodí rozpracované uploady po kusech, na které se už nikdo nevrátil."""
+    removed = await run_in_threadpool(cleanup_stale_sessions)
+    if removed:
+        print(f"🧹 CRON: Smazáno {removed} nedokončených uploadů.")
+
+async def run_orphan_uploads_gc():
+    """Po kouscích uklízí soubory v /uploads, na které nic neodkazuje (viz services/upload_gc)."""
+    async with SessionLocal() as db:
+        try:
+            dry_run = settings.UPLOAD_GC_DRY_RUN
+            run = await run_upload_gc(db, settings.UPLOAD_GC_TIME_BUDGET_SECONDS, dry_run)
+
+            if run["orphans"]:
+                verb = "by smazal (dry-run)" if dry_run else "smazal"
+                print(f"🧹 CRON: Úklid uploadů {verb} {run['orphans']} osiřelých souborů.")
+            if run["deleted"]:
+                await log_activity(
+                    action="SYSTEM_UPLOAD_GC",
+                    payload={"deleted": run["deleted"]},
+                    user_id=None
+                )
+        except Exception as e:
+            print(f"❌ CRON CHYBA (úklid uploadů): {e}")
+
+async def run_uploads_migration():
+    """Stěhuje staré soubory z ploché složky do uploads/ab/cd/ (po dokončení už nic nedělá)."""
+    async with SessionLocal() as db:
+        try:
+            report = await run_upload_migration(db, settings.UPLOAD_MIGRATION_TIME_BUDGET_SECONDS)
+            if report and report.get("finished_at"):
+                print(f"✅ CRON: Migrace uploadů dokončena ({report['moved']} souborů, {report['failed']} chyb).")
+        except Exception as e:
+            print(f"❌ CRON CHYBA (migrace uploadů): {e}")
+
+async def run_placeholders_backfill():
+    """Doplní rozměry a placeholdery obrázkům nahraným před LQIP (po dokončení už nic nedělá)."""
+    async with SessionLocal() as db:
+        try:
+            report = await run_placeholder_backfill(db, settings.PLACEHOLDER_BACKFILL_TIME_BUDGET_SECONDS)
+            if report and report.get("finished_at"):
+                print(
+                    f"✅ CRON: Placeholdery doplněny ({report['generated']} obrázků, "
+                    f"{report['missing']} chybí na disku, {report['failed']} chyb)."
+                )
+        except Exception as e:
+            print(f"❌ CRON CHYBA (placeholdery): {e}")
+
+async def run_storage_reconcile():
+    """Přepočítá počítadla místa (uploads, aplikace) podle disku - opraví odchylky průběžného počítání."""
+    try:
+        await reconcile_storage_usage(UPLOAD_DIR, ".")
+    except Exception as e:
+        print(f"❌ CRON CHYBA (přepočet místa): {e}")
+
+async def run_metrics_sample():
+    """Vzorek metrik pro /api/stats/history (+ úklid starých bucketů podle retence)."""
+    async with SessionLocal() as db:
+        try:
+            await sample_metrics(db)
+        except Exception as e:
+            print(f"❌ CRON CHYBA (metriky): {e}")
+
 # --- LIFESPAN (Start a Stop aplikace) ---
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # 1. CO SE STANE PŘI ZAPNUTÍ (START)
+    # Audit log se zapisuje po dávkách na pozadí (musí běžet dřív než cokoli, co loguje)
+    audit_sink.start()
+
     scheduler = AsyncIOScheduler()
     
     # Nastavíme budík: Spouštěj se každých 24 hodin
     # (Pro testování si to můžeš změnit na 'minutes=1')
-    scheduler.add_job(run_cleanup, 'interval', hours=24)
+    # Úklid logů běží po kouscích - cron v něm pokračuje, dokud nedoběhne
+    scheduler.add_job(run_cleanup, 'interval', minutes=settings.AUDIT_RETENTION_INTERVAL_MINUTES, max_instances=1)
+    # Partitions audit logu na další měsíce - poprvé hned po startu
+    scheduler.add_job(run_audit_partitions, 'interval', hours=24, next_run_time=datetime.now(), max_instances=1)
+    scheduler.add_job(run_upload_sessions_cleanup, 'interval', hours=1)
+    # max_instances=1: další spuštění nezačne, dokud předchozí neskončí
+    scheduler.add_job(run_orphan_uploads_gc, 'interval', minutes=settings.UPLOAD_GC_INTERVAL_MINUTES, max_instances=1)
+    scheduler.add_job(run_uploads_migration, 'interval', minutes=1, max_instances=1)
+    scheduler.add_job(run_placeholders_backfill, 'interval', minutes=1, max_instances=1)
+    # Přepočet počítadel místa - poprvé hned po startu (založí je, pokud ještě nejsou)
+    scheduler.add_job(
+        run_storage_reconcile, 'interval', hours=settings.STORAGE_RECONCILE_HOURS,
+        next_run_time=datetime.now(), max_instances=1
+    )
+    scheduler.add_job(run_metrics_sample, 'interval', minutes=settings.METRICS_SAMPLE_MINUTES, max_instances=1)
     
     scheduler.start()
     print("⏰ Plánovač úloh (Cron) byl úspěšně spuštěn.")
+
+    # Pool procesů pro zpracování obrázků (Pillow neblokuje event loop)
+    image_engine.start()
+    # Fronta asynchronních jobů (POST /api/upload/jobs) - převezme i joby z doby před restartem
+    await image_job_runner.start()
     
     yield # ---> TADY BĚŽÍ TVOJE APLIKACE <---
     
@@ -57,9 +187,43 @@ async def lifespan(app: FastAPI):
     scheduler.shutdown()
     print("🔕 Plánovač vypnut.")
 
+    await image_job_runner.stop()
+    image_engine.shutdown()
+
+    # Dokončení efektů po commitu (mazání souborů)
+    await wait_for_pending()
+    # Nakonec zapíšeme, co zbylo ve frontě audit logu
+    await audit_sink.stop()
+
 # --- Vytvoření aplikace s naším Lifespanem ---
 app = FastAPI(title="Muj CMS API", version="1.0.0", lifespan=lifespan)
 
+API_PREFIX = "/api"
+
+# --- Limit velikosti uploadu ---
+# FastAPI si multipart tělo načte celé ještě před voláním endpointu,
+# proto příliš velký request odmítneme už podle Content-Length.
+# (Middleware je definovaný před CORS, aby i odpověď 413 měla CORS hlavičky.)
+MULTIPART_OVERHEAD = 64 * 1024
+
+UPLOAD_REQUEST_LIMITS = {
+    f"{API_PREFIX}/upload": settings.UPLOAD_MAX_BYTES + MULTIPART_OVERHEAD,
+    f"{API_PREFIX}/upload/batch": (settings.UPLOAD_MAX_BYTES + MULTIPART_OVERHEAD) * settings.UPLOAD_BATCH_MAX_FILES,
+    f"{API_PREFIX}/upload/jobs": settings.UPLOAD_MAX_BYTES + MULTIPART_OVERHEAD,
+}
+
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    if request.method == "POST":
+        limit = UPLOAD_REQUEST_LIMITS.get(request.url.path.rstrip("/"))
+        try:
+            content_length = parse_content_length(request.headers.get("content-length"))
+        except ValueError as e:
+            return JSONResponse(status_code=400, content={"detail": str(e)})
+        if limit and content_length and content_length > limit:
+            return JSONResponse(status_code=413, content={"detail": "Soubor je příliš velký."})
+    return await call_next(request)
+
 # --- CORS Nastavení ---
 origins = [
   "http://localhost:5173",
@@ -74,14 +238,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Upload-Offset", "Retry-After", "X-Next-Cursor"],
 )
 
 # --- Zbytek aplikace ---
 os.makedirs("uploads", exist_ok=True)
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 
+# Soubory v /uploads: cache hlavičky, Range, formát podle Accept, on-demand varianty (?w=640)
+# a volitelně X-Accel-Redirect (viz api/v1/media.py a MEDIA_* v config.py)
+app.include_router(media.router, tags=["Media"])
 
-API_PREFIX = "/api"
 
 app.include_router(auth.router, prefix=f"{API_PREFIX}/auth", tags=["Authentication"])
 app.include_router(logs.router, prefix=f"{API_PREFIX}/logs", tags=["Logs"])
@@ -94,10 +260,6 @@ app.include_router(messages.router, prefix=f"{API_PREFIX}/messages", tags=["Mess
 
 
 
-# Umožníme přístup k nahraným souborům
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
-
-
 @app.get("/")
 def read_root():
     return {"message": "Backend běží i s Cronem! 🚀"}
\ No newline at end of file
@@ -1,12 +1,42 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index, JSON
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from app.db.session import Base
 
 class AuditLog(Base):
+    """
+    Na Postgresu je tabulka rozdělená na měsíční partitions podle created_at
+    (viz services/audit_partitions.py). Primární klíč je tam fyzicky (id, created_at),
+    id ale zůstává unikátní (jedna sekvence), takže ORM si vystačí s id.
+    """
     __tablename__ = "audit_logs"
 
     id = Column(Integer, primary_key=True, index=True)
-    action = Column(String, index=True)      # Např. "LOGIN", "DELETE_USER"
-    details = Column(Text, nullable=True)    # Např. "Neúspěšný pokus o heslo"
+    action = Column(String)                  # Např. "LOGIN", "DELETE_USER"
+    details = Column(Text, nullable=True)    # Volný text; u novějších záznamů prázdný (text se skládá z payloadu)
+    # Strukturovaná data záznamu, např. {"category_id": 5, "name": "Novinky"} - filtruje se podle nich
+    # (GET /api/logs?payload=category_id=5), čitelný text z nich skládá services/audit_messages.py
+    payload = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)
     user_id = Column(Integer, ForeignKey("app_users.id"), nullable=True) # Kdo to udělal
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    # Email aktéra v okamžiku zápisu (hledání bez JOINu na app_users; u LOGIN_FAILED zadaný email)
+    actor_email = Column(String(255), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    # Indexy pro prohlížeč logů (řazení od nejnovějších + kurzor (created_at, id), viz crud_audit_log).
+    # Index začínající "action" nahrazuje i původní samostatný index na action.
+    __table_args__ = (
+        Index("ix_audit_logs_created_at_id", "created_at", "id"),
+        Index("ix_audit_logs_action_created_at_id", "action", "created_at", "id"),
+        Index("ix_audit_logs_user_id_created_at_id", "user_id", "created_at", "id"),
+        # Hledání podřetězce v emailu (ILIKE '%x%'): na Postgresu trigramový GIN index,
+        # jinde (SQLite v testech) obyčejný index
+        Index(
+            "ix_audit_logs_actor_email_trgm", "actor_email",
+            postgresql_using="gin", postgresql_ops={"actor_email": "gin_trgm_ops"},
+        ),
+        # Filtr podle payloadu (payload @> {...}) - na Postgresu GIN index; jinde bez indexu
+        Index(
+            "ix_audit_logs_payload", "payload",
+            postgresql_using="gin", postgresql_ops={"payload": "jsonb_path_ops"},
+        ),
+    )
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, DateTime, Integer, Index
+from app.db.session import Base
+
+class AuditRollup(Base):
+    """
+    Předpočítané počty záznamů audit logu pro grafy na dashboardu
+    (počet akcí daného typu od daného uživatele za hodinu / den).
+    Přičítá je writer audit logu ve stejné transakci jako samotné záznamy
+    (viz services/audit_rollups.py). Retence logu je nemaže.
+    """
+    __tablename__ = "audit_rollups"
+
+    resolution = Column(String(10), primary_key=True) # "hour" / "day"
+    bucket = Column(DateTime(timezone=True), primary_key=True) # Začátek bucketu (UTC)
+    action = Column(String, primary_key=True)
+    # 0 = bez uživatele (systém, nepřihlášený) - NULL by v primárním klíči nešel
+    user_id = Column(Integer, primary_key=True, default=0)
+    count = Column(Integer, nullable=False, default=0)
+
+    # Grafy jedné akce v čase (např. LOGIN_FAILED po hodinách)
+    __table_args__ = (
+        Index("ix_audit_rollups_resolution_action_bucket", "resolution", "action", "bucket"),
+    )
@@ -13,6 +13,10 @@ class Category(Base):
     
     # Média (ukládáme jen cestu k souboru, ne obrázek samotný)
     image_path = Column(String, nullable=True) # Velká fotka
+    # Rozměry a placeholder velké fotky (kopie z media_files)
+    image_width = Column(Integer, nullable=True)
+    image_height = Column(Integer, nullable=True)
+    image_placeholder = Column(Text, nullable=True)
     icon_path = Column(String, nullable=True)  # Malá ikonka/SVG
     
     # Detaily
@@ -21,6 +21,10 @@ class ContentItem(Base):
     description = Column(Text, nullable=True)
     content = Column(Text, nullable=True)
     image_url = Column(String(512), nullable=True)  # Primární náhled
+    # Rozměry a placeholder obrázku (kopie z media_files, ať frontend nemusí nic dočítat)
+    image_width = Column(Integer, nullable=True)
+    image_height = Column(Integer, nullable=True)
+    image_placeholder = Column(Text, nullable=True)
     price = Column(Numeric(precision=10, scale=2), nullable=True)
 
     # --- Metadata ---
@@ -51,6 +55,9 @@ class ContentPhoto(Base):
     )
 
     image_url = Column(String(512), nullable=False)
+    image_width = Column(Integer, nullable=True)
+    image_height = Column(Integer, nullable=True)
+    image_placeholder = Column(Text, nullable=True)
     alt_text = Column(String(255), nullable=True)
     position = Column(Integer, default=0)
 
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON
+from sqlalchemy.sql import func
+from app.db.session import Base
+
+class ImageJob(Base):
+    __tablename__ = "image_jobs"
+
+    id = Column(String(32), primary_key=True) # uuid4().hex - klient se ptá na /api/upload/jobs/{id}
+
+    # Stav: "queued" -> "processing" -> "done" / "failed"
+    status = Column(String(20), nullable=False, default="queued", index=True)
+
+    user_id = Column(Integer, ForeignKey("app_users.id"), nullable=True) # Kdo to nahrál
+    filename = Column(String(255), nullable=True)      # Původní název souboru (pro log)
+    source_path = Column(String(512), nullable=False)  # Syrový upload v UPLOAD_TMP_DIR
+    source_hash = Column(String(64), nullable=False)
+
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    result = Column(JSON, nullable=True) # Stejný tvar jako odpověď /api/upload
+
+    # Kdy smí přijít další pokus (backoff po chybě)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True)
+    # Dokud neuplyne, job zpracovává některý worker (po pádu procesu si ho vezme jiný)
+    locked_until = Column(DateTime(timezone=True), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
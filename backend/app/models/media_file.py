@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, BigInteger
+from sqlalchemy.sql import func
+from app.db.session import Base
+
+class MediaFile(Base):
+    __tablename__ = "media_files"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Hlavní (největší) obrázek, název = hash obsahu (abc123....webp).
+    # Na tuhle URL odkazují ContentItem / Category
+    url = Column(String(512), unique=True, index=True, nullable=False)
+    filename = Column(String(255), nullable=False)
+    width = Column(Integer, nullable=False)
+    height = Column(Integer, nullable=False)
+
+    # Malinký rozmazaný náhled (data URI), frontend ho ukáže, než se načte obrázek
+    placeholder = Column(Text, nullable=True)
+
+    # Žebříček variant pro srcset: [{"filename", "width", "height", "size"}, ...]
+    variants = Column(JSON, nullable=False, default=list)
+
+    # Obsahová adresace: hash původního (nahraného) souboru -> stejný upload se nezpracovává znovu
+    source_hash = Column(String(64), unique=True, index=True, nullable=True)
+    # Kolik uložených záznamů (ContentItem, ContentPhoto, Category) na soubor odkazuje.
+    # Přičítá se při uložení záznamu (ne při uploadu), soubor z disku mažeme, když klesne na 0.
+    ref_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # Velikosti v bajtech (originál od uživatele vs. uložený hlavní WebP)
+    original_size = Column(BigInteger, nullable=True)
+    final_size = Column(BigInteger, nullable=True)
+
+    user_id = Column(Integer, ForeignKey("app_users.id"), nullable=True) # Kdo to nahrál
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
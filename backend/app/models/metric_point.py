@@ -0,0 +1,24 @@
+from sqlalchemy import Column, String, DateTime, Float, Integer, Index
+from app.db.session import Base
+
+class MetricPoint(Base):
+    """
+    Jeden bucket časové řady pro dashboard (agregát vzorků za minutu / hodinu / den).
+    Průměr = sum_value / sample_count.
+    """
+    __tablename__ = "metric_points"
+
+    metric = Column(String(50), primary_key=True) # Např. "users", "uploads_bytes"
+    resolution = Column(String(10), primary_key=True) # "minute" / "hour" / "day"
+    bucket = Column(DateTime(timezone=True), primary_key=True) # Začátek bucketu (UTC)
+
+    min_value = Column(Float, nullable=False)
+    max_value = Column(Float, nullable=False)
+    sum_value = Column(Float, nullable=False)
+    last_value = Column(Float, nullable=False)
+    sample_count = Column(Integer, nullable=False, default=1)
+
+    # Mazání podle retence jde přes (resolution, bucket) napříč metrikami
+    __table_args__ = (
+        Index("ix_metric_points_resolution_bucket", "resolution", "bucket"),
+    )
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, BigInteger, DateTime
+from sqlalchemy.sql import func
+from app.db.session import Base
+
+class StorageUsage(Base):
+    """
+    Průběžně vedené počítadlo obsazeného místa (aby /api/stats nemusel procházet disk).
+    "uploads" se mění při každém uložení / smazání souboru, "app" jen při přepočtu.
+    """
+    __tablename__ = "storage_usage"
+
+    key = Column(String(50), primary_key=True) # "uploads" / "app"
+    bytes = Column(BigInteger, nullable=False, default=0)
+    files = Column(BigInteger, nullable=False, default=0)
+
+    # Kdy se naposledy přepočítalo podle skutečného stavu disku
+    reconciled_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
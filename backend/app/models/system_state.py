@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, DateTime, JSON
+from sqlalchemy.sql import func
+from app.db.session import Base
+
+class SystemState(Base):
+    """Drobný stav systémových úloh (kurzory, reporty) - co má přežít restart."""
+    __tablename__ = "system_state"
+
+    key = Column(String(100), primary_key=True) # Např. "upload_gc"
+    value = Column(JSON, nullable=True)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
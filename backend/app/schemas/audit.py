@@ -1,12 +1,38 @@
-from pydantic import BaseModel
-from datetime import datetime
+from pydantic import BaseModel, model_validator
+from datetime import date, datetime
+from typing import List, Optional
+
+from app.services.audit_messages import render_details
 
 class AuditLogOut(BaseModel):
     id: int
     action: str
-    details: str | None
+    details: str | None = None
+    payload: dict | None = None
     user_id: int | None
+    actor_email: str | None = None
     created_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+    # Čitelný text se z payloadu skládá až tady (v DB se neukládá)
+    @model_validator(mode="after")
+    def _render_details(self):
+        if self.details is None:
+            self.details = render_details(self.action, self.payload, self.actor_email)
+        return self
+
+# Počty akcí z předpočítaných rollupů (/api/logs/aggregate)
+class AuditAggregatePoint(BaseModel):
+    bucket: Optional[datetime] = None # Začátek bucketu (UTC); u step=total není
+    action: str
+    user_id: Optional[int] = None # Jen při by_user (None = systém / nepřihlášený)
+    actor_email: Optional[str] = None
+    count: int
+
+class AuditAggregateResponse(BaseModel):
+    step: str # "hour" / "day" / "total"
+    date_from: date
+    date_to: date
+    points: List[AuditAggregatePoint]
@@ -28,6 +28,10 @@ class CategoryUpdate(BaseModel):
 # 4. Co vrací API zpátky (RESPONSE)
 class CategoryResponse(CategoryBase):
     id: int
+    # Rozměry a placeholder velké fotky (doplňuje backend z media_files)
+    image_width: Optional[int] = None
+    image_height: Optional[int] = None
+    image_placeholder: Optional[str] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
 
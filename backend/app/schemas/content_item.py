@@ -6,6 +6,9 @@ from decimal import Decimal
 class ContentPhotoResponse(BaseModel):
     id: int
     image_url: str
+    image_width: Optional[int] = None
+    image_height: Optional[int] = None
+    image_placeholder: Optional[str] = None
     alt_text: Optional[str] = None
     position: Optional[int] = 0
     created_at: datetime
@@ -40,6 +43,10 @@ class ContentItemUpdate(BaseModel):
 
 class ContentItemResponse(ContentItemBase):
     id: int
+    # Rozměry a placeholder obrázku (doplňuje backend z media_files)
+    image_width: Optional[int] = None
+    image_height: Optional[int] = None
+    image_placeholder: Optional[str] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
 
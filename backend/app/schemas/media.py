@@ -0,0 +1,49 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+class MediaVariant(BaseModel):
+    url: str
+    width: int
+    height: int
+
+# Odpověď po nahrání obrázku (frontend z ní skládá <img srcset>)
+class UploadResponse(BaseModel):
+    url: str
+    width: int
+    height: int
+    placeholder: Optional[str] = None  # data:image/webp;base64,... (LQIP)
+    variants: List[MediaVariant] = []
+    srcset: str = ""
+
+# --- Navazovaný upload po kusech ---
+class UploadSessionCreate(BaseModel):
+    filename: str
+    content_type: str
+    total_size: int = Field(gt=0) # Celková velikost souboru v bajtech
+
+class UploadSessionStatus(BaseModel):
+    upload_id: str
+    offset: int       # Kolik bajtů server potvrdil (od tohoto místa se pokračuje)
+    total_size: int
+    chunk_size: int   # Doporučená velikost jednoho kusu
+
+# --- Dávkový upload ---
+class BatchUploadItem(BaseModel):
+    filename: str
+    ok: bool
+    result: Optional[UploadResponse] = None
+    error: Optional[str] = None
+    retryable: bool = False  # True = server byl přetížený, stačí soubor poslat znovu
+
+class BatchUploadResponse(BaseModel):
+    uploaded: int
+    failed: int
+    items: List[BatchUploadItem]
+
+# --- Asynchronní zpracování (job) ---
+class ImageJobStatus(BaseModel):
+    job_id: str
+    status: str                # queued / processing / done / failed
+    attempts: int = 0
+    error: Optional[str] = None
+    result: Optional[UploadResponse] = None  # Vyplněné, až je status "done"
@@ -1,3 +1,5 @@
+from datetime import datetime
+from typing import List, Optional
 from pydantic import BaseModel
 
 # 1. Část pro počty (ta tři čísla)
@@ -13,13 +15,33 @@ class StatsStorage(BaseModel):
     used_disk_size: int
     free_disk_size: int
 
-    # Velikost konkrétních složek
+    # Velikost konkrétních složek (z průběžných počítadel, ne procházením disku)
     app_folder_size: int 
     uploads_folder_size: int 
+    uploads_file_count: int = 0
+    # Kdy se počítadla naposledy srovnala se skutečným stavem disku
+    reconciled_at: Optional[datetime] = None
 
 # 2. Hlavní odpověď
 class StatsResponse(BaseModel):
     system_version: str
     database_status: str
     counts: StatsCounts
-    storage: StatsStorage # Změna z storage_size na detailní strukturu
\ No newline at end of file
+    storage: StatsStorage # Změna z storage_size na detailní strukturu
+    # Kdy byl snapshot spočítán a jak je starý (čísla se cachují, viz services/stats_snapshot.py)
+    generated_at: Optional[datetime] = None
+    snapshot_age_seconds: float = 0
+
+# Časová řada jedné metriky (/api/stats/history)
+class StatsHistoryPoint(BaseModel):
+    bucket: datetime # Začátek bucketu (UTC)
+    min: float
+    max: float
+    avg: float
+    last: float
+    samples: int
+
+class StatsHistoryResponse(BaseModel):
+    metric: str
+    step: str # "minute" / "hour" / "day"
+    points: List[StatsHistoryPoint]
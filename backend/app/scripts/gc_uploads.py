@@ -0,0 +1,40 @@
+"""
+Ruční průchod úklidem osiřelých souborů v /uploads (viz app/services/upload_gc.py).
+
+Spuštění (z adresáře backend):
+    python -m app.scripts.gc_uploads            # jen report, nic nemaže
+    python -m app.scripts.gc_uploads --delete   # opravdu smaže
+
+Projde celou složku najednou (bez časového rozpočtu) a nesahá na kurzor
+plánovaného úklidu v system_state.
+"""
+
+import asyncio
+import sys
+
+from app.db.session import SessionLocal
+from app.services.audit import format_size
+from app.services.upload_gc import gc_step, new_report
+
+
+async def main(dry_run: bool):
+    report = new_report()
+    cursor = ""
+    async with SessionLocal() as db:
+        while cursor is not None:
+            cursor = await gc_step(db, cursor, report, dry_run)
+
+    print(f"Prohledáno souborů: {report['scanned']}")
+    print(f"Osiřelých: {report['orphans']} ({format_size(report['orphan_bytes'])})")
+    for filename in report["sample"]:
+        print(f"  {filename}")
+    if report["orphans"] > len(report["sample"]):
+        print(f"  ... a dalších {report['orphans'] - len(report['sample'])}")
+    if dry_run:
+        print("Dry-run: nic nebylo smazáno (pro smazání spusť s --delete).")
+    else:
+        print(f"Smazáno souborů: {report['deleted']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(dry_run="--delete" not in sys.argv))
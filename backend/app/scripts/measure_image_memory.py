@@ -0,0 +1,96 @@
+"""
+Změří špičkovou paměť (peak RSS) zpracování obrázku - původní cesta
+(plné dekódování + resize) vs. open_within_budget (draft / reduce).
+
+Spuštění (z adresáře backend):
+    python -m app.scripts.measure_image_memory
+
+Každé měření běží v čerstvém procesu, hodnota je přírůstek ru_maxrss
+oproti stavu po importu knihoven (tedy paměť spotřebovaná samotným obrázkem).
+"""
+
+import multiprocessing
+import os
+import resource
+import tempfile
+
+from PIL import Image, ImageOps
+import pillow_heif
+
+from app.services.image_processing import process_image_file
+
+pillow_heif.register_heif_opener()
+
+WIDTHS = [320, 640, 1024, 1600]
+QUALITY = 80
+NO_LIMIT = 10**12
+
+# (název, šířka, výška, formát)
+CASES = [
+    ("JPEG 12 MP", 4000, 3000, "JPEG"),
+    ("JPEG 50 MP", 8660, 5774, "JPEG"),
+    ("PNG 24 MP", 6000, 4000, "PNG"),
+    ("HEIC 12 MP", 4000, 3000, "HEIF"),
+]
+
+
+def _make_source(path: str, width: int, height: int, fmt: str):
+    # Gradient + šum, aby enkodéry neměly triviální práci
+    image = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    noise = Image.effect_noise((width, height), 40).convert("RGB")
+    Image.blend(image, noise, 0.3).save(path, format=fmt)
+
+
+def _legacy(source_path: str, dest_dir: str):
+    """Původní pipeline: plné dekódování v nativním rozlišení, pak LANCZOS."""
+    image = Image.open(source_path)
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ("RGBA", "P", "CMYK"):
+        image = image.convert("RGB")
+    if image.width > max(WIDTHS):
+        image = image.resize((max(WIDTHS), int(max(WIDTHS) * image.height / image.width)), Image.Resampling.LANCZOS)
+    image.save(os.path.join(dest_dir, "legacy.webp"), format="WEBP", quality=QUALITY, optimize=True)
+
+
+def _budgeted(source_path: str, dest_dir: str):
+    process_image_file(source_path, dest_dir, WIDTHS, QUALITY, NO_LIMIT, NO_LIMIT)
+
+
+def _measure_child(fn_name: str, source_path: str, dest_dir: str, queue):
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    {"legacy": _legacy, "budgeted": _budgeted}[fn_name](source_path, dest_dir)
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((after - before) // 1024)  # Linux: ru_maxrss je v KB
+
+
+def measure(fn_name: str, source_path: str, dest_dir: str) -> int:
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=_measure_child, args=(fn_name, source_path, dest_dir, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def _run_in_child(target, *args):
+    # Vše paměťově náročné běží v samostatném procesu: high-water mark RSS
+    # se dědí z rodiče, takže rodič musí zůstat malý.
+    process = multiprocessing.get_context("spawn").Process(target=target, args=args)
+    process.start()
+    process.join()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'Vstup':<12} {'Původní (MB)':>13} {'Nový (MB)':>10}")
+        for name, width, height, fmt in CASES:
+            source_path = os.path.join(tmp, f"source.{fmt.lower()}")
+            _run_in_child(_make_source, source_path, width, height, fmt)
+            legacy = measure("legacy", source_path, tmp)
+            budgeted = measure("budgeted", source_path, tmp)
+            print(f"{name:<12} {legacy:>13} {budgeted:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Přestěhuje staré soubory z ploché složky uploads/ do uploads/ab/cd/
+a přepíše URL v DB (viz app/services/upload_migration.py).
+
+Spuštění (z adresáře backend):
+    python -m app.scripts.migrate_uploads
+
+Normálně to dělá plánovač na pozadí; skript doběhne najednou a jde spustit
+i znovu (třeba když se do ploché složky dodatečně nakopírovaly soubory).
+Kurzor plánované migrace v system_state nechává být.
+"""
+
+import asyncio
+
+from app.db.session import SessionLocal
+from app.services.upload_migration import migrate_step, new_report
+
+
+async def main():
+    report = new_report()
+    cursor = ""
+    async with SessionLocal() as db:
+        while cursor is not None:
+            cursor = await migrate_step(db, cursor, report)
+
+    print(f"Přesunuto souborů: {report['moved']}")
+    print(f"Přepsáno záznamů v DB: {report['rows_updated']}")
+    if report["failed"]:
+        print(f"⚠️ Nepřesunuto (chyba): {report['failed']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,38 +1,40 @@
-from sqlalchemy.ext.asyncio import AsyncSession
-from app.models.audit_log import AuditLog
-from datetime import datetime, timedelta
-from sqlalchemy import delete
-from app.core.config import settings
+from app.services.audit_messages import format_size
+from app.services.audit_sink import audit_sink
 
-async def log_activity(db: AsyncSession, action: str, details: str = None, user_id: int = None):
+async def log_activity(
+    action: str,
+    details: str = None,
+    user_id: int = None,
+    actor_email: str = None,
+    payload: dict = None,
+):
     """
     Jednoduchá funkce pro zápis do audit logu.
-    """
-    try:
-        log_entry = AuditLog(
-            action=action,
-            details=details,
-            user_id=user_id
-        )
-        db.add(log_entry)
-        await db.commit() # Uložíme to hned
-    except Exception as e:
-        print(f"Chyba při logování: {e}") 
-        # Logování nesmí shodit aplikaci, proto try/except
+    Záznam jde do fronty a zapíše se po dávkách na pozadí (viz services/audit_sink.py),
+    session requestu se nijak nedotkne. actor_email se při zápisu doplní podle user_id,
+    pokud ho neznáme už teď.
 
-async def delete_old_logs(db: AsyncSession, days: int = settings.LOG_RETENTION_DAYS):
-    """
-    Smaže logy starší než X dní.
-    Vrací počet smazaných řádků.
+    payload = strukturovaná data záznamu (id, názvy, čísla - jde podle nich filtrovat);
+    čitelný text se z nich skládá až při čtení (services/audit_messages.py).
+    details jen pro volný text, který do payloadu nepatří.
     """
-    # Spočítáme datum "před X dny"
-    cutoff_date = datetime.utcnow() - timedelta(days=days)
-    
-    # Sestavíme příkaz DELETE
-    query = delete(AuditLog).where(AuditLog.created_at < cutoff_date)
-    
-    # Provedeme to
-    result = await db.execute(query)
-    await db.commit()
-    
-    return result.rowcount
\ No newline at end of file
+    await audit_sink.enqueue(action, details=details, user_id=user_id, actor_email=actor_email, payload=payload)
+
+def compression_pct(original_size: int, final_size: int) -> float:
+    # Kolik jsme ušetřili? (např. 90.0 = "Ušetřeno 90%")
+    return round(100 - (final_size / original_size * 100), 1)
+
+async def log_upload(user_id: int, user_email: str | None, result: dict):
+    """Zápis UPLOAD_FILE do audit logu (velikost před/po a komprese)."""
+    await log_activity(
+        action="UPLOAD_FILE",
+        user_id=user_id,
+        actor_email=user_email,
+        payload={
+            "filename": result["filename"],
+            "original_size": result["original_size"],
+            "final_size": result["final_size"],
+            "compression_pct": compression_pct(result["original_size"], result["final_size"]),
+            "deduplicated": result["deduplicated"],
+        },
+    )
@@ -0,0 +1,116 @@
+# backend/app/services/audit_messages.py
+"""
+Čitelný text záznamů audit logu.
+
+Záznamy ukládají strukturovaná data (AuditLog.payload - id, názvy,
+velikosti ...), podle kterých jde filtrovat. Text pro lidi ("Uživatel x
+smazal kategorii y") se z nich skládá až při čtení (render_details) -
+v DB se neukládá a šablony jde kdykoliv změnit i pro staré záznamy.
+Starší záznamy bez payloadu mají text uložený v details.
+"""
+
+
+def format_size(size_in_bytes):
+    # Pomocná funkce: 1024 B -> 1 KB, 1024*1024 B -> 1 MB
+    if size_in_bytes < 1024:
+        return f"{size_in_bytes} B"
+    elif size_in_bytes < 1024 * 1024:
+        return f"{size_in_bytes / 1024:.1f} KB"
+    else:
+        return f"{size_in_bytes / (1024 * 1024):.1f} MB"
+
+
+def _upload(p: dict, who: str) -> str:
+    text = (
+        f"Uživatel {who} nahrál soubor: {p['filename']}. "
+        f"Velikost: {format_size(p['original_size'])} -> {format_size(p['final_size'])} "
+        f"(Komprese {p['compression_pct']:.0f}%)."
+    )
+    if p.get("deduplicated"):
+        text += " Soubor už existoval, použit bez nového zpracování."
+    return text
+
+
+def cleanup_summary(p: dict) -> str:
+    """Stav úklidu logů (job z audit_retention nebo payload LOGS_CLEANUP / SYSTEM_CLEANUP)."""
+    status = "hotovo" if p["done"] else "pokračuje na pozadí"
+    archived = f", archivováno {p['archived']}" if p.get("archived") else ""
+    return (
+        f"Smazáno {p['deleted']} záznamů starších než {p['days']} dní "
+        f"({p['batches']} dávek{archived}, {status})."
+    )
+
+
+def _cleanup(p: dict, who: str) -> str:
+    summary = cleanup_summary(p)
+    if p.get("trigger") == "auto":
+        return f"Automatický úklid: {summary}"
+    if p.get("background"):
+        return f"Manuální úklid logů dokončen na pozadí: {summary}"
+    return f"Manuální úklid logů. {summary}"
+
+
+# Akce -> text z (payload, kdo to udělal)
+TEMPLATES = {
+    "USER_REGISTER": lambda p, who: f"Nový uživatel registrován: {who}",
+    "LOGIN_FAILED": lambda p, who: f"Neúspěšný pokus o přihlášení pro email: {who}",
+    "LOGIN_SUCCESS": lambda p, who: f"Uživatel {who} se úspěšně přihlásil",
+    "LOGOUT": lambda p, who: f"Uživatel {who} se odhlásil",
+    "PASSWORD_CHANGE_FAILED": lambda p, who: (
+        f"Uživatel {who} se pokusil změnit heslo, ale staré heslo bylo špatné."
+    ),
+    "PASSWORD_CHANGED": lambda p, who: f"Uživatel {who} úspěšně změnil heslo.",
+    "USER_ADD_BY_ADMIN": lambda p, who: (
+        f"Admin {who} vytvořil uživatele: {p['target_email']} s vynucenou změnou hesla."
+    ),
+    "USER_ACTIVATED": lambda p, who: f"Admin {who} změnil stav uživatele {p['target_email']} na aktivní.",
+    "USER_DEACTIVATED": lambda p, who: f"Admin {who} změnil stav uživatele {p['target_email']} na neaktivní.",
+    "USER_ROLE_CHANGED": lambda p, who: (
+        f"Admin {who} změnil roli uživatele {p['target_email']} "
+        f"na {'Admin' if p['is_admin'] else 'Uživatel'}."
+    ),
+    "UPLOAD_FILE": _upload,
+    "UPLOAD_BATCH": lambda p, who: (
+        f"Uživatel {who} nahrál dávku: {p['uploaded']} z {p['files']} souborů "
+        f"({', '.join(p['filenames'])}). "
+        f"Velikost: {format_size(p['original_size'])} -> {format_size(p['final_size'])} "
+        f"(Komprese {p['compression_pct']:.0f}%)."
+    ),
+    "CATEGORY_CREATE": lambda p, who: (
+        f"Uživatel {who} vytvořil kategorii: {p['name']} (Slug: {p['slug']})"
+    ),
+    "CATEGORY_UPDATE": lambda p, who: (
+        f"Uživatel {who} upravil kategorii ID {p['category_id']}. Změna z '{p['old_name']}' na '{p['name']}'."
+    ),
+    "CATEGORY_DELETE": lambda p, who: (
+        f"Uživatel {who} smazal kategorii: {p['name']} (ID: {p['category_id']})"
+    ),
+    "CONTENT_CREATE": lambda p, who: (
+        f"Uživatel {who} vytvořil položku: {p['title']} (CatID: {p['category_id']})"
+    ),
+    "CONTENT_UPDATE": lambda p, who: (
+        f"Uživatel {who} upravil položku ID {p['item_id']}. Změna z '{p['old_title']}' na '{p['title']}'."
+    ),
+    "CONTENT_DELETE": lambda p, who: (
+        f"Uživatel {who} smazal položku: {p['title']} (ID: {p['item_id']}). "
+        f"Smazáno {p['deleted_photos']} fotek z galerie."
+    ),
+    "LOGS_CLEANUP": _cleanup,
+    "SYSTEM_CLEANUP": _cleanup,
+    "SYSTEM_UPLOAD_GC": lambda p, who: (
+        f"Automatický úklid: Smazáno {p['deleted']} osiřelých souborů z /uploads."
+    ),
+}
+
+
+def render_details(action: str, payload: dict | None, actor_email: str | None = None) -> str | None:
+    """Text záznamu z payloadu (None, když payload není)."""
+    if payload is None:
+        return None
+    template = TEMPLATES.get(action)
+    try:
+        if template is not None:
+            return template(payload, actor_email or "systém")
+    except (KeyError, TypeError, ValueError):
+        pass  # Payload ze starší verze šablony - aspoň surová data
+    return ", ".join(f"{key}={value}" for key, value in payload.items())
@@ -0,0 +1,197 @@
+# backend/app/services/audit_partitions.py
+"""
+Měsíční partitions tabulky audit_logs (jen Postgres).
+
+Na Postgresu je audit_logs rozdělená podle created_at po kalendářních
+měsících (UTC): audit_logs_y2026m10 = říjen 2026 (viz migrace
+c3f5a9e1d7b2). Díky tomu:
+- retence jen zahodí celé prošlé měsíce (DROP TABLE) místo mazání
+  milionů řádků - žádný bloat ani dlouhé zámky,
+- dotazy s rozsahem dat čtou jen dotčené měsíce.
+
+Partitions na příští měsíce zakládá dopředu plánovač (ensure_partitions),
+aby zápis nikdy nenarazil na chybějící měsíc. Záznam mimo založené měsíce
+skončí v audit_logs_default (pojistka, normálně je prázdná); když pak
+vzniká jeho měsíc, ensure_partitions ho do nové partition přestěhuje.
+
+Prošlý měsíc se nejdřív odpojí (DETACH PARTITION) a teprve pak zahodí,
+DROP samostatné tabulky už rodiče nezamyká.
+
+Jinde (SQLite, nebo Postgres před migrací) je audit_logs obyčejná tabulka
+a is_partitioned() vrací False - retence pak maže po dávkách.
+"""
+
+import re
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.audit_log import AuditLog
+
+PARENT = "audit_logs"
+DEFAULT_PARTITION = f"{PARENT}_default"
+PARTITION_NAME = re.compile(r"^audit_logs_y(\d{4})m(\d{2})$")
+COLUMNS = ", ".join(AuditLog.__table__.columns.keys())
+
+# Jak dlouho smí DETACH čekat na zámek rodiče (pak to zkusí příští krok)
+DETACH_LOCK_TIMEOUT = "2s"
+LOCK_NOT_AVAILABLE = "55P03"
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_y{month.year}m{month.month:02d}"
+
+
+def add_months(month: date, count: int) -> date:
+    """První den měsíce posunutý o `count` měsíců."""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _bound(month: date) -> str:
+    return f"{month.isoformat()} 00:00:00+00"
+
+
+async def is_partitioned(db: AsyncSession) -> bool:
+    if db.bind.dialect.name != "postgresql":
+        return False
+    result = await db.execute(text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:parent)"
+    ), {"parent": PARENT})
+    return result.scalar() is not None
+
+
+async def list_partitions(db: AsyncSession) -> list[tuple[str, date]]:
+    """Měsíční partitions (název, první den měsíce) od nejstarší. Výchozí partition sem nepatří."""
+    result = await db.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:parent)"
+    ), {"parent": PARENT})
+    partitions = []
+    for name in result.scalars().all():
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions.append((name, date(int(match[1]), int(match[2]), 1)))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+async def _default_rows(db: AsyncSession, month: date) -> int:
+    """Kolik záznamů daného měsíce leží ve výchozí partition (normálně 0, tabulka je prázdná)."""
+    if await db.scalar(text("SELECT to_regclass(:name)"), {"name": DEFAULT_PARTITION}) is None:
+        return 0
+    lower, upper = month_bounds(month)
+    return await db.scalar(text(
+        f"SELECT count(*) FROM {DEFAULT_PARTITION} WHERE created_at >= :lower AND created_at < :upper"
+    ), {"lower": lower, "upper": upper})
+
+
+async def _create_from_default(db: AsyncSession, name: str, month: date) -> int:
+    """
+    Založí partition měsíce, jehož záznamy už leží ve výchozí partition.
+    Obyčejné CREATE ... PARTITION OF by skončilo chybou (řádky by porušily nové hranice
+    výchozí partition) - proto v jedné transakci: samostatná tabulka, přesun řádků, ATTACH.
+    Vrací počet přesunutých záznamů.
+    """
+    lower, upper = month_bounds(month)
+    # Zámek výchozí partition: během přesunu do ní nepřibude další záznam z tohoto měsíce
+    await db.execute(text(f"LOCK TABLE {DEFAULT_PARTITION} IN ACCESS EXCLUSIVE MODE"))
+    await db.execute(text(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS)"))
+    result = await db.execute(text(
+        f"WITH moved AS ("
+        f"DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= :lower AND created_at < :upper RETURNING {COLUMNS}"
+        f") INSERT INTO {name} ({COLUMNS}) SELECT {COLUMNS} FROM moved"
+    ), {"lower": lower, "upper": upper})
+    await db.execute(text(
+        f"ALTER TABLE {PARENT} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{_bound(month)}') TO ('{_bound(add_months(month, 1))}')"
+    ))
+    await db.commit()
+    return result.rowcount
+
+
+async def ensure_partitions(db: AsyncSession, months_ahead: int) -> list[str]:
+    """Založí partitions pro aktuální a `months_ahead` dalších měsíců (co chybí). Vrací založené."""
+    existing = {name for name, _ in await list_partitions(db)}
+    today = datetime.now(timezone.utc).date().replace(day=1)
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(today, offset)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        if await _default_rows(db, month):
+            moved = await _create_from_default(db, name, month)
+            print(f"⚠️ Audit log: {moved} záznamů z {DEFAULT_PARTITION} přesunuto do nové partition {name}.")
+            created.append(name)
+            continue
+        # Název i hranice skládáme sami z data -> bezpečné vložit do SQL
+        await db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT} "
+            f"FOR VALUES FROM ('{_bound(month)}') TO ('{_bound(add_months(month, 1))}')"
+        ))
+        await db.commit()
+        created.append(name)
+    return created
+
+
+def month_bounds(month: date) -> tuple[datetime, datetime]:
+    """Rozsah created_at měsíce: [první den, první den dalšího měsíce) v UTC."""
+    lower = datetime.combine(month, datetime.min.time(), tzinfo=timezone.utc)
+    upper = datetime.combine(add_months(month, 1), datetime.min.time(), tzinfo=timezone.utc)
+    return lower, upper
+
+
+async def expired_partitions(db: AsyncSession, cutoff: datetime) -> list[tuple[str, datetime, datetime]]:
+    """Měsíce, které celé leží před `cutoff`, od nejstaršího: (název, od, do)."""
+    expired = []
+    for name, month in await list_partitions(db):
+        lower, upper = month_bounds(month)
+        if upper > cutoff:
+            break
+        expired.append((name, lower, upper))
+    return expired
+
+
+async def estimated_rows(db: AsyncSession, name: str) -> int:
+    """Odhad počtu řádků tabulky ze statistik (pg_class.reltuples) - bez procházení celé tabulky."""
+    estimate = await db.scalar(text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:name)"), {"name": name})
+    return max(int(estimate or 0), 0)  # -1 = tabulka ještě nebyla analyzovaná
+
+
+async def detach_partition(db: AsyncSession, name: str) -> bool:
+    """
+    Odpojí měsíc od audit_logs. Vrací False, když se to teď nepodařilo (zkusí se znovu).
+
+    DETACH ... CONCURRENTLY Postgres nedovolí, dokud má tabulka výchozí partition
+    (audit_logs_default je tu vždy), takže jde o obyčejný DETACH: na krátkou chvíli
+    (jen změna katalogu) zamkne audit_logs exkluzivně - zápisy i čtení logů počkají.
+    Krátký lock_timeout hlídá, aby ve frontě na zámek nestál dlouho (a nebrzdil
+    zápisy za sebou); když zámek nedostane, zkusí se to v dalším kroku.
+    """
+    attached = await db.scalar(
+        text("SELECT 1 FROM pg_inherits WHERE inhrelid = to_regclass(:name)"), {"name": name}
+    )
+    if attached is None:
+        await db.commit()
+        return True  # Už není připojená (např. odpojená minulým během)
+
+    try:
+        await db.execute(text(f"SET LOCAL lock_timeout = '{DETACH_LOCK_TIMEOUT}'"))
+        await db.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+        await db.commit()
+        return True
+    except DBAPIError as e:
+        await db.rollback()
+        if getattr(e.orig, "sqlstate", None) != LOCK_NOT_AVAILABLE:
+            raise
+        print(f"⏳ Audit log: partition {name} teď nejde odpojit (zámek), zkusím to znovu.")
+        return False
+
+
+async def drop_partition(db: AsyncSession, name: str):
+    """Zahodí odpojený měsíc (DROP samostatné tabulky, žádné mazání řádků)."""
+    await db.execute(text(f"DROP TABLE IF EXISTS {name}"))
+    await db.commit()
+    print(f"🗑️ Audit log: zahozena partition {name}.")
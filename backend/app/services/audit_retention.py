@@ -0,0 +1,264 @@
+# backend/app/services/audit_retention.py
+"""
+Retence audit logu - mazání starých záznamů po dávkách, které jde přerušit.
+
+Úklid je "job" s pevným cutoffem (smazat vše starší než ...), jehož stav
+je v system_state (klíč "audit_retention"): cutoff, kurzor (poslední
+zpracované id), počty a jestli je hotový. Každé spuštění (cron nebo
+DELETE /api/logs/cleanup) pracuje jen omezenou dobu a pokračuje tam,
+kde minulé skončilo - i po restartu workeru.
+
+Jak se maže:
+1. Na Postgresu s partitions se nejdřív zahodí celé prošlé měsíce
+   (viz audit_partitions) - odpojení a DROP, žádné mazání řádků. Počet
+   smazaných je z archivu, bez něj odhad ze statistik. S archivem se měsíc
+   před zahozením archivuje po dávkách; rozpracovaný měsíc a kurzor v něm
+   jsou v jobu ("partition"), takže i tohle jde přerušit a navázat.
+2. Zbytek po dávkách seřazených podle id (index PK), každá dávka je
+   vlastní krátká transakce a zároveň posune kurzor ve stejném commitu.
+   Velikost dávky se přizpůsobuje: když dávka trvá déle než
+   AUDIT_RETENTION_BATCH_SECONDS, zmenší se (kratší zámky), když je
+   rychlá, zvětší se až do AUDIT_DELETE_BATCH_SIZE.
+3. Mezi dávkami se na chvíli pustí event loop i databáze
+   (AUDIT_RETENTION_PAUSE_SECONDS).
+
+S AUDIT_ARCHIVE_ENABLED se každá dávka (i celý zahazovaný měsíc) nejdřív
+uloží do studeného archivu (viz audit_archive) a teprve pak smaže.
+
+Úklid běží vždy jen jeden (cron, DELETE /api/logs/cleanup, víc workerů):
+run_retention drží zámek (retention_lock) a když běží jinde, vyhodí
+RetentionBusy. Nový job se zakládá až pod zámkem, takže nepřepíše
+rozpracovaný stav jiného běhu.
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, delete, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.crud import crud_system_state
+from app.models.audit_log import AuditLog
+from app.services import audit_archive, audit_messages, audit_partitions
+
+STATE_KEY = "audit_retention"
+MIN_BATCH_SIZE = 100
+
+# Klíč pg_advisory_lock (libovolné číslo, unikátní v rámci databáze)
+LOCK_KEY = 4_217_001
+# Bez Postgresu (SQLite - vývoj, testy) jen zámek v rámci procesu
+_local_lock = asyncio.Lock()
+
+
+class RetentionBusy(Exception):
+    """Úklid logů právě běží jinde (cron, jiný request nebo worker)."""
+
+
+@asynccontextmanager
+async def retention_lock(db: AsyncSession):
+    """
+    Zámek úklidu. Vrací True, když se ho podařilo získat, False, když úklid běží jinde.
+    Na Postgresu pg_try_advisory_lock na vlastním spojení (v autocommitu) - zámek
+    platí pro všechny workery a drží i přes commity jednotlivých dávek.
+    """
+    if db.bind.dialect.name != "postgresql":
+        if _local_lock.locked():
+            yield False
+            return
+        async with _local_lock:
+            yield True
+        return
+
+    async with db.bind.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        if not await conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": LOCK_KEY}):
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": LOCK_KEY})
+
+
+def new_job(days: int, trigger: str, user_id: int | None = None) -> dict:
+    now = datetime.now(timezone.utc)
+    return {
+        "cutoff": (now - timedelta(days=days)).isoformat(),
+        "days": days,
+        "trigger": trigger,  # "auto" / "manual"
+        "user_id": user_id,
+        "started_at": now.isoformat(),
+        "cursor": 0,
+        "deleted": 0,
+        "archived": 0,
+        "batches": 0,
+        "partitions_checked": False,
+        "batch_size": settings.AUDIT_DELETE_BATCH_SIZE,
+        "done": False,
+    }
+
+
+def describe(job: dict) -> str:
+    """Lidsky čitelný stav jobu (do odpovědi API)."""
+    return audit_messages.cleanup_summary(job)
+
+
+def log_payload(job: dict, background: bool = False) -> dict:
+    """Payload záznamu LOGS_CLEANUP / SYSTEM_CLEANUP (text z něj skládá audit_messages)."""
+    payload = {key: job.get(key, 0) for key in ("days", "deleted", "archived", "batches")}
+    return {**payload, "done": job["done"], "trigger": job["trigger"], "background": background}
+
+
+ARCHIVE_COLUMNS = [getattr(AuditLog, column) for column in audit_archive.COLUMNS]
+
+
+async def _archive(db: AsyncSession, query, job: dict) -> list:
+    """Načte řádky dotazu (seřazené podle id) a uloží je do archivu. Vrací načtené řádky."""
+    rows = (await db.execute(query)).mappings().all()
+    if rows:
+        archived = await run_in_threadpool(audit_archive.archive_rows, rows)
+        job["archived"] = job.get("archived", 0) + archived
+    return rows
+
+
+async def _partition_step(db: AsyncSession, job: dict, cutoff: datetime):
+    """
+    Jeden krok zahazování prošlých měsíců: dávka archivu nejstaršího měsíce,
+    nebo jeho odpojení a zahození, když je archiv hotový. Stav se uloží po každém
+    kroku - i mezi odpojením a DROP (odpojený měsíc už mezi partitions není).
+    """
+    progress = job.get("partition") or {}
+    if not progress.get("detached"):
+        expired = await audit_partitions.expired_partitions(db, cutoff)
+        if not expired:
+            job["partitions_checked"] = True
+            job.pop("partition", None)
+            await crud_system_state.set_state(db, STATE_KEY, job)
+            return
+
+        name, lower, upper = expired[0]
+        if progress.get("name") != name:
+            progress = {"name": name, "cursor": 0, "rows": 0, "archived": not settings.AUDIT_ARCHIVE_ENABLED}
+
+        if not progress["archived"]:
+            rows = await _archive(
+                db,
+                select(*ARCHIVE_COLUMNS)
+                .where(AuditLog.created_at >= lower, AuditLog.created_at < upper, AuditLog.id > progress["cursor"])
+                .order_by(AuditLog.id)
+                .limit(job["batch_size"]),
+                job,
+            )
+            if rows:
+                progress["cursor"] = rows[-1]["id"]
+                progress["rows"] += len(rows)
+            progress["archived"] = len(rows) < job["batch_size"]
+            job["partition"] = progress
+            await crud_system_state.set_state(db, STATE_KEY, job)
+            return
+
+        if not settings.AUDIT_ARCHIVE_ENABLED:
+            # Bez archivu řádky nepočítáme (count(*) by četl celý měsíc) - stačí odhad ze statistik
+            progress["rows"] = await audit_partitions.estimated_rows(db, name)
+        progress["detached"] = await audit_partitions.detach_partition(db, name)
+        job["partition"] = progress
+        await crud_system_state.set_state(db, STATE_KEY, job)
+        if not progress["detached"]:
+            return
+
+    await audit_partitions.drop_partition(db, progress["name"])
+    job["deleted"] += progress["rows"]
+    job.pop("partition", None)
+    await crud_system_state.set_state(db, STATE_KEY, job)
+
+
+async def _delete_batch(db: AsyncSession, job: dict, cutoff: datetime) -> int:
+    """Smaže jednu dávku (id vzestupně od kurzoru) a ve stejném commitu uloží posunutý kurzor."""
+    query = (
+        select(*ARCHIVE_COLUMNS if settings.AUDIT_ARCHIVE_ENABLED else [AuditLog.id])
+        .where(AuditLog.id > job["cursor"], AuditLog.created_at < cutoff)
+        .order_by(AuditLog.id)
+        .limit(job["batch_size"])
+    )
+    if settings.AUDIT_ARCHIVE_ENABLED:
+        # Nejdřív archiv (na disk, fsync), pak teprve mazání
+        ids = [row["id"] for row in await _archive(db, query, job)]
+    else:
+        ids = list((await db.execute(query)).scalars().all())
+    if ids:
+        result = await db.execute(
+            delete(AuditLog)
+            .where(AuditLog.id.in_(ids), AuditLog.created_at < cutoff)
+            .execution_options(synchronize_session=False)
+        )
+        job["cursor"] = ids[-1]
+        # Skutečně smazané (řádek mezitím mohl smazat někdo jiný)
+        job["deleted"] += result.rowcount
+        job["batches"] += 1
+    if len(ids) < job["batch_size"]:
+        job["done"] = True
+        job["finished_at"] = datetime.now(timezone.utc).isoformat()
+    await crud_system_state.set_state(db, STATE_KEY, job)  # commit = smazání + kurzor
+    return len(ids)
+
+
+def _adapt_batch_size(job: dict, elapsed: float):
+    target = settings.AUDIT_RETENTION_BATCH_SECONDS
+    if elapsed > target:
+        job["batch_size"] = max(MIN_BATCH_SIZE, job["batch_size"] // 2)
+    elif elapsed < target / 4:
+        job["batch_size"] = min(settings.AUDIT_DELETE_BATCH_SIZE, job["batch_size"] * 2)
+
+
+async def get_job(db: AsyncSession) -> dict | None:
+    return await crud_system_state.get_state(db, STATE_KEY)
+
+
+async def run_retention(db: AsyncSession, time_budget: float, start: dict | None = None) -> dict | None:
+    """
+    Pokračuje v rozpracovaném jobu, dokud nedojde čas. S `start` (viz new_job)
+    nejdřív založí nový job - rozpracovaný starý nahradí, nový cutoff ho stejně
+    pokryje nebo přepíše; jen rozpracovaný měsíc (partition) si nový job převezme.
+    Vrací stav jobu (None, když žádný není), hotový job se znovu nespouští.
+    Když úklid právě běží jinde, vyhodí RetentionBusy.
+    """
+    async with retention_lock(db) as acquired:
+        if not acquired:
+            raise RetentionBusy()
+        if start is not None:
+            current = await get_job(db)
+            if current and not current["done"] and current.get("partition"):
+                # Odpojený měsíc už mezi partitions není - bez převzetí by tabulka zůstala
+                # ležet navždy; u archivovaného měsíce by se zase archivovalo znovu od začátku
+                start["partition"] = current["partition"]
+            await crud_system_state.set_state(db, STATE_KEY, start)
+        return await _run_locked(db, time_budget)
+
+
+async def _run_locked(db: AsyncSession, time_budget: float) -> dict | None:
+    job = await get_job(db)
+    if job is None or job["done"]:
+        return job
+
+    cutoff = datetime.fromisoformat(job["cutoff"])
+    deadline = time.monotonic() + time_budget
+
+    if not job["partitions_checked"] and not await audit_partitions.is_partitioned(db):
+        job["partitions_checked"] = True
+
+    # 1. Celé prošlé měsíce, 2. zbytek po dávkách - obojí jen dokud je čas
+    while not job["done"] and time.monotonic() < deadline:
+        started = time.monotonic()
+        if job["partitions_checked"]:
+            await _delete_batch(db, job, cutoff)
+        else:
+            await _partition_step(db, job, cutoff)
+        _adapt_batch_size(job, time.monotonic() - started)
+        # Pustíme ke slovu ostatní (requesty, autovacuum)
+        await asyncio.sleep(settings.AUDIT_RETENTION_PAUSE_SECONDS)
+
+    return job
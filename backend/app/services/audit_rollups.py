@@ -0,0 +1,96 @@
+# backend/app/services/audit_rollups.py
+"""
+Předpočítané počty akcí z audit logu pro grafy (přihlášení za den,
+neúspěšná přihlášení po hodinách, uploady podle uživatelů ...).
+
+Tabulka audit_rollups drží počet záznamů pro každou kombinaci
+(rozlišení, bucket, akce, uživatel) v hodinových a denních bucketech (UTC).
+Přičítá je writer audit logu (services/audit_sink.py) ve stejné transakci,
+ve které zapisuje samotné záznamy - počty tak nikdy neujedou ani
+nezapočítají nic dvakrát a žádná další úloha je dohánět nemusí.
+Starší záznamy naplnila migrace.
+
+/api/logs/aggregate pak jen sčítá pár řádků z audit_rollups a nikdy
+neprochází audit_logs. Retence logu rollupy nemaže - grafy pokrývají
+i období, jehož záznamy už jsou jen v archivu.
+"""
+
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud import crud_audit_rollup
+from app.models.user import User
+from app.services.metrics import bucket_start
+
+RESOLUTIONS = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+# "total" = jeden součet za celý rozsah (z denních bucketů)
+STEPS = (*RESOLUTIONS, "total")
+
+# Bez uživatele (viz AuditRollup.user_id)
+NO_USER = 0
+
+
+def count_entries(entries: list[dict]) -> Counter:
+    """Počty záznamů (action, user_id, created_at) po bucketech všech rozlišení."""
+    counts = Counter()
+    for entry in entries:
+        for resolution in RESOLUTIONS:
+            counts[(
+                resolution,
+                bucket_start(entry["created_at"], resolution),
+                entry["action"] or "",
+                entry["user_id"] or NO_USER,
+            )] += 1
+    return counts
+
+
+async def aggregate(
+    db: AsyncSession,
+    step: str,
+    start: datetime,
+    end: datetime,
+    *,
+    action: str | None = None,
+    user_id: int | None = None,
+    per_user: bool = False,
+) -> list[dict]:
+    """
+    Počty akcí v rozsahu [start, end] po krocích (hour / day) nebo celkem (total).
+    Rozsah se zarovná na začátek bucketu (u "total" na celé dny).
+    """
+    resolution = "day" if step == "total" else step
+    rows = await crud_audit_rollup.get_counts(
+        db,
+        resolution,
+        bucket_start(start, resolution),
+        end,
+        action=action,
+        user_id=user_id,
+        per_bucket=step != "total",
+        per_user=per_user,
+    )
+
+    # Emaily k uživatelům (jen pro ty, kteří ve výsledku jsou)
+    emails = {}
+    if per_user:
+        user_ids = {row["user_id"] for row in rows if row["user_id"] != NO_USER}
+        if user_ids:
+            result = await db.execute(select(User.id, User.email).where(User.id.in_(user_ids)))
+            emails = dict(result.all())
+
+    return [
+        {
+            "bucket": row.get("bucket"),
+            "action": row["action"],
+            "user_id": (row["user_id"] or None) if per_user else None,
+            "actor_email": emails.get(row["user_id"]) if per_user else None,
+            "count": row["count"],
+        }
+        for row in rows
+    ]
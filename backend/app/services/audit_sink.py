@@ -0,0 +1,198 @@
+# backend/app/services/audit_sink.py
+"""
+Zápis audit logu po dávkách.
+
+log_activity() záznam jen vloží do fronty v paměti a request jede dál -
+nečeká na commit a hlavně necommituje nic jiného, co má request rozdělané
+ve své session. Writer na pozadí frontu vybírá a zapisuje jedním
+víceřádkovým INSERTem, jakmile má AUDIT_BATCH_SIZE záznamů nebo uplyne
+AUDIT_FLUSH_INTERVAL od prvního čekajícího.
+
+- Čas záznamu (created_at) se bere při vložení do fronty, ne při zápisu.
+- Plná fronta (AUDIT_QUEUE_SIZE, typicky nedostupná DB) request přibrzdí:
+  počká na místo až AUDIT_ENQUEUE_TIMEOUT a pak záznam zapíše sám.
+- Při vypnutí aplikace (stop) writer zapíše všechno, co ve frontě zbylo.
+- Mimo běžící aplikaci (skripty) se zapisuje rovnou.
+- Se záznamy se ve stejné transakci přičtou počty do audit_rollups.
+
+Fronta je v každém uvicorn workeru zvlášť.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+
+from sqlalchemy import insert, select
+
+from app.core.config import settings
+from app.crud import crud_audit_rollup
+from app.db.session import SessionLocal
+from app.models.audit_log import AuditLog
+from app.models.user import User
+from app.services import audit_rollups
+
+# Značka konce fronty (stop)
+_STOP = None
+
+# actor_email může být vstup od uživatele (LOGIN_FAILED) - delší by shodil zápis celé dávky
+ACTOR_EMAIL_MAX = AuditLog.__table__.c.actor_email.type.length
+
+
+async def _write_batch(batch: list[dict]):
+    async with SessionLocal() as db:
+        # Email aktéra se ukládá k záznamu (hledání bez JOINu) - chybějící doplníme jedním dotazem
+        missing = {e["user_id"] for e in batch if e["user_id"] is not None and e["actor_email"] is None}
+        if missing:
+            result = await db.execute(select(User.id, User.email).where(User.id.in_(missing)))
+            emails = dict(result.all())
+            batch = [
+                {**e, "actor_email": emails.get(e["user_id"])} if e["actor_email"] is None else e
+                for e in batch
+            ]
+        await db.execute(insert(AuditLog).values(batch))
+        # Počty pro grafy ve stejné transakci (viz services/audit_rollups.py)
+        await crud_audit_rollup.add_counts(db, audit_rollups.count_entries(batch))
+        await db.commit()
+
+
+class AuditSink:
+    def __init__(self, batch_size: int, flush_interval: float, queue_size: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+        self._queue: asyncio.Queue | None = None
+        self._writer: asyncio.Task | None = None
+        self._closing = False
+
+    @property
+    def running(self) -> bool:
+        """Writer běží a přijímá záznamy (po zahájení stop() už ne - šly by až za konec fronty)."""
+        return self._writer is not None and not self._writer.done() and not self._closing
+
+    def start(self):
+        self._closing = False
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._writer = asyncio.create_task(self._run())
+        print(f"📝 Audit log zapisuje po dávkách (max {self.batch_size} / {self.flush_interval} s).")
+
+    async def stop(self, timeout: float = 10):
+        """Zapíše zbytek fronty a ukončí writer. Další záznamy už jdou rovnou do DB."""
+        if not self.running:
+            return
+        self._closing = True
+        await self._queue.put(_STOP)
+        try:
+            await asyncio.wait_for(self._writer, timeout)
+        except asyncio.TimeoutError:
+            print(f"❌ Audit log: při vypnutí nestihl zapsat {self._queue.qsize()} záznamů.")
+        self._writer = None
+        print("📝 Audit log vypnut.")
+
+    async def enqueue(
+        self,
+        action: str,
+        details: str = None,
+        user_id: int = None,
+        actor_email: str = None,
+        payload: dict = None,
+    ):
+        entry = {
+            "action": action,
+            "details": details,
+            "payload": payload,
+            "user_id": user_id,
+            "actor_email": actor_email[:ACTOR_EMAIL_MAX] if actor_email else actor_email,
+            "created_at": datetime.now(timezone.utc),
+        }
+        if not self.running:
+            await self._write_now([entry])
+            return
+
+        try:
+            self._queue.put_nowait(entry)
+            return
+        except asyncio.QueueFull:
+            pass
+
+        # Backpressure: writer nestíhá -> počkáme na místo ve frontě
+        try:
+            await asyncio.wait_for(self._queue.put(entry), settings.AUDIT_ENQUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            print("⚠️ Audit log: fronta je plná, zapisuji záznam přímo.")
+            await self._write_now([entry])
+
+    async def _write_now(self, batch: list[dict]):
+        try:
+            await _write_batch(batch)
+        except Exception as e:
+            # Logování nesmí shodit aplikaci
+            print(f"Chyba při logování: {e}")
+
+    async def _next_batch(self) -> tuple[list[dict], bool]:
+        """Počká na první záznam a pak sbírá další do naplnění dávky nebo vypršení intervalu."""
+        loop = asyncio.get_running_loop()
+        first = await self._queue.get()
+        if first is _STOP:
+            return [], True
+
+        batch = [first]
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                entry = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if entry is _STOP:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    async def _flush(self, batch: list[dict]):
+        """
+        Zapíše dávku. Když selže, zapisuje po jednom záznamu - jeden vadný záznam
+        nesmí vzít s sebou celou dávku. Neúspěšné záznamy zkouší znovu
+        (OUTBOX_MAX_ATTEMPTS, exponenciální backoff), co neprojde ani tak, vypíše a zahodí.
+        """
+        try:
+            await _write_batch(batch)
+            return
+        except Exception as e:
+            print(f"❌ Audit log (dávka {len(batch)} záznamů): {e} - zapisuji po jednom.")
+
+        pending = batch
+        for attempt in range(1, settings.OUTBOX_MAX_ATTEMPTS + 1):
+            failed = []
+            for entry in pending:
+                try:
+                    await _write_batch([entry])
+                except Exception as e:
+                    failed.append(entry)
+                    error = e
+            if not failed:
+                return
+            print(f"❌ Audit log: {len(failed)} záznamů nezapsáno, pokus {attempt}: {error}")
+            pending = failed
+            if attempt < settings.OUTBOX_MAX_ATTEMPTS:
+                await asyncio.sleep(settings.OUTBOX_RETRY_DELAY * 2 ** (attempt - 1))
+
+        for entry in pending:
+            print(f"❌ Audit log: záznam zahozen: {entry}")
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = await self._next_batch()
+            if batch:
+                await self._flush(batch)
+
+
+audit_sink = AuditSink(
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL,
+    queue_size=settings.AUDIT_QUEUE_SIZE,
+)
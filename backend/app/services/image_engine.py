@@ -0,0 +1,82 @@
+# backend/app/services/image_engine.py
+"""
+Omezený pool procesů pro zpracování obrázků.
+
+Pillow (dekódování, resize, WebP enkódování) je čistě CPU práce a drží GIL,
+takže na event loopu by zablokovala všechny ostatní requesty. Práci proto
+posíláme do ProcessPoolExecutoru s pevným počtem workerů a omezenou frontou.
+Když je fronta plná, vyhodíme ImageEngineBusy a router vrátí 503.
+"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app.core.config import settings
+
+
+class ImageEngineBusy(Exception):
+    """Všichni workeři pracují a fronta je plná."""
+
+
+class ImageEngine:
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = max(1, workers)
+        self.queue_size = max(0, queue_size)
+        self._executor: ProcessPoolExecutor | None = None
+        self._pending = 0  # Běžící + čekající úlohy
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_size
+
+    @property
+    def is_saturated(self) -> bool:
+        return self._pending >= self.capacity
+
+    @property
+    def has_free_worker(self) -> bool:
+        """Nějaký proces právě nic nedělá (práce na pozadí nesmí brzdit uploady)."""
+        return self._pending < self.workers
+
+    def start(self):
+        if self._executor is None:
+            # "spawn" = čisté procesy bez zděděných vláken a event loopu
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            print(f"🖼️ Image engine spuštěn ({self.workers} workerů, fronta {self.queue_size}).")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            print("🖼️ Image engine vypnut.")
+
+    async def run(self, fn, *args):
+        """
+        Spustí fn(*args) ve worker procesu a počká na výsledek.
+        Funkce i argumenty musí jít picklovat (žádné UploadFile, žádné sessions).
+        """
+        if self.is_saturated:
+            raise ImageEngineBusy()
+
+        self.start()  # Pro skripty / testy bez lifespanu
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        except BrokenProcessPool:
+            # Worker spadl (např. OOM) -> pool je nepoužitelný, vyrobíme nový
+            print("❌ Image engine: worker spadl, restartuji pool.")
+            broken, self._executor = self._executor, None
+            broken.shutdown(wait=False, cancel_futures=True)
+            self.start()
+            raise
+        finally:
+            self._pending -= 1
+
+
+image_engine = ImageEngine(settings.IMAGE_WORKERS, settings.IMAGE_QUEUE_SIZE)
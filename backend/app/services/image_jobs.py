@@ -0,0 +1,145 @@
+# backend/app/services/image_jobs.py
+"""
+Fronta jobů pro asynchronní zpracování obrázků.
+
+Upload v režimu "job" jen uloží syrový soubor, založí řádek v image_jobs
+a hned vrátí ID. Zpracování dělá ImageJobRunner, který běží v lifespanu
+aplikace:
+- max. IMAGE_JOB_CONCURRENCY jobů najednou (v rámci jednoho workeru),
+- při chybě opakuje s exponenciálním backoffem (max. IMAGE_JOB_MAX_ATTEMPTS),
+- stav je v DB, takže po restartu nedokončené joby převezme znovu.
+
+Víc uvicorn workerů si joby nepřebírá dvakrát: převzetí je atomický UPDATE
+s lease (locked_until). Když worker při zpracování spadne, lease vyprší
+a job si vezme jiný.
+"""
+
+import asyncio
+import os
+
+from PIL import UnidentifiedImageError
+
+from app.core.config import settings
+from app.crud import crud_image_job
+from app.crud.crud_user import get_user_by_id
+from app.db.session import SessionLocal
+from app.services.audit import log_upload
+from app.services.image_engine import ImageEngineBusy
+from app.services.image_processing import ImageRejected
+from app.services.image_service import process_staged_image, build_srcset
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class ImageJobRunner:
+    def __init__(self, concurrency: int, max_attempts: int, lease_seconds: int, poll_seconds: int):
+        self.concurrency = max(1, concurrency)
+        self.max_attempts = max(1, max_attempts)
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self._queue: asyncio.Queue | None = None
+        self._queued: set[str] = set()  # ID, která už čekají v lokální frontě
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        # Poller hned na startu převezme joby nedokončené před restartem
+        self._tasks.append(asyncio.create_task(self._poller()))
+        print(f"📦 Image job runner spuštěn ({self.concurrency} souběžně).")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queued.clear()
+        # Rozpracované joby zůstanou v DB jako "processing"; po vypršení lease je převezme další start
+        print("📦 Image job runner vypnut.")
+
+    def enqueue(self, job_id: str):
+        """Zařadí job do lokální fronty (když runner neběží, vyzvedne ho poller jindy)."""
+        if self._queue is None or job_id in self._queued:
+            return
+        self._queued.add(job_id)
+        self._queue.put_nowait(job_id)
+
+    async def _poller(self):
+        while True:
+            try:
+                async with SessionLocal() as db:
+                    for job_id in await crud_image_job.get_claimable_job_ids(db):
+                        self.enqueue(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Image jobs: chyba při načítání fronty: {e}")
+            await asyncio.sleep(self.poll_seconds)
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            self._queued.discard(job_id)
+            try:
+                await self._run_job(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Image jobs: neočekávaná chyba u jobu {job_id}: {e}")
+
+    async def _run_job(self, job_id: str):
+        async with SessionLocal() as db:
+            # 1. Převzetí (jiný worker mohl být rychlejší)
+            if not await crud_image_job.claim_job(db, job_id, self.lease_seconds):
+                return
+            job = await crud_image_job.get_job(db, job_id)
+            # Po rollbacku (níže) jsou načtené objekty expirované - co potřebujeme, si vezmeme hned
+            attempts, source_path, source_hash, user_id = job.attempts, job.source_path, job.source_hash, job.user_id
+
+            # Chyba mohla přijít z DB (např. při registraci souboru) - transakce je pak nepoužitelná
+            # a stav jobu by se nezapsal. Proto vždy nejdřív rollback, stav jobu jde do čisté transakce.
+            try:
+                result = await process_staged_image(db, source_path, source_hash, user_id=user_id)
+            except ImageEngineBusy:
+                # Pool je plný -> zkusíme za chvíli, pokus se nepočítá
+                await db.rollback()
+                await crud_image_job.mark_retry(
+                    db, job_id, "Server je přetížený.", settings.IMAGE_RETRY_AFTER, count_attempt=False
+                )
+                return
+            except (ImageRejected, UnidentifiedImageError, FileNotFoundError) as e:
+                # Opakování nepomůže (moc velký / poškozený obrázek, zmizelý soubor)
+                await db.rollback()
+                await crud_image_job.mark_failed(db, job_id, str(e))
+                _remove_quietly(source_path)
+                return
+            except Exception as e:
+                await db.rollback()
+                if attempts >= self.max_attempts:
+                    await crud_image_job.mark_failed(db, job_id, str(e))
+                    _remove_quietly(source_path)
+                else:
+                    await crud_image_job.mark_retry(db, job_id, str(e), 2 ** attempts)
+                return
+
+            # 2. Hotovo - výsledek do DB, syrový soubor pryč, zápis do audit logu
+            await crud_image_job.mark_done(db, job_id, {**result, "srcset": build_srcset(result["variants"])})
+            _remove_quietly(source_path)
+
+            user = await get_user_by_id(db, user_id) if user_id else None
+            await log_upload(user_id, user.email if user else None, result)
+
+
+image_job_runner = ImageJobRunner(
+    settings.IMAGE_JOB_CONCURRENCY,
+    settings.IMAGE_JOB_MAX_ATTEMPTS,
+    settings.IMAGE_JOB_LEASE_SECONDS,
+    settings.IMAGE_JOB_POLL_SECONDS,
+)
@@ -0,0 +1,308 @@
+# backend/app/services/image_processing.py
+"""
+Čisté zpracování obrázků přes Pillow.
+
+Tento modul běží uvnitř worker procesů (viz image_engine.py), proto
+nesmí importovat nic z databáze ani FastAPI - jen Pillow a standardní knihovnu.
+"""
+
+import base64
+import hashlib
+import io
+import math
+import os
+import re
+import uuid
+from PIL import Image, ImageOps, ExifTags
+import pillow_heif
+
+# Aktivace HEIC podpory (musí proběhnout i ve worker procesu)
+pillow_heif.register_heif_opener()
+
+
+def variant_filename(stem: str, width: int) -> str:
+    """Název souboru menší varianty: abc.webp -> abc-640w.webp"""
+    return f"{stem}-{width}w.webp"
+
+
+VARIANT_SUFFIX = re.compile(r"-\d+w$")
+HEX_PREFIX = re.compile(r"^[0-9a-f]{4}")
+
+
+def owner_stem(filename: str) -> str:
+    """Stem hlavního obrázku: ab/cd/abc-640w.webp -> abc (varianty patří k hlavnímu souboru)."""
+    stem, _ = os.path.splitext(os.path.basename(filename))
+    return VARIANT_SUFFIX.sub("", stem)
+
+
+def shard_dir(filename: str) -> str:
+    """
+    Podsložka ve dvouúrovňovém rozvětvení uploads/ab/cd/.
+    Obsahově adresované soubory (a staré uuid názvy) začínají hexem -> bereme první 4 znaky,
+    jiné názvy se nejdřív zahashují. Varianty skončí ve stejné složce jako hlavní obrázek.
+    """
+    stem = owner_stem(filename)
+    key = stem if HEX_PREFIX.match(stem) else hashlib.md5(stem.encode()).hexdigest()
+    return f"{key[:2]}/{key[2:4]}"
+
+
+def upload_relpath(filename: str) -> str:
+    """abc.webp -> ab/cd/abc.webp (cesta relativně k UPLOAD_DIR; z ní je i URL /uploads/...)"""
+    filename = os.path.basename(filename)
+    return f"{shard_dir(filename)}/{filename}"
+
+
+def upload_url_aliases(url: str) -> list[str]:
+    """
+    Všechny podoby URL téhož souboru: /uploads/abc.webp (stará plochá)
+    a /uploads/ab/cd/abc.webp (rozvětvená). Jiné URL vrací beze změny.
+    """
+    if not url.startswith("/uploads/"):
+        return [url]
+    name = url.rsplit("/", 1)[-1]
+    return list(dict.fromkeys([url, f"/uploads/{name}", f"/uploads/{upload_relpath(name)}"]))
+
+
+def _write_if_missing(path: str, data: bytes):
+    """Obsahově adresovaný soubor: když už existuje, má stejný obsah -> nepřepisujeme."""
+    if os.path.exists(path):
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as out:
+        out.write(data)
+    os.replace(tmp_path, path)
+
+
+class ImageRejected(Exception):
+    """Obrázek je moc velký na dekódování (decompression bomb / překročený rozpočet paměti)."""
+
+
+# Přibližný počet bajtů na pixel po dekódování (pro odhad paměti)
+_BYTES_PER_PIXEL = {"1": 1, "L": 1, "P": 1, "LA": 2, "I;16": 2, "RGB": 3, "YCbCr": 3, "LAB": 3}
+
+# Režimy, které Image.reduce neumí, a na co je před předzmenšením převést
+_REDUCE_CONVERT = {"P": "RGB", "1": "L"}
+
+# Orientace z EXIFu, u kterých se obrázek otáčí o 90° (šířka <-> výška)
+_ROTATED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+def open_within_budget(source_path: str, target_width: int, max_pixels: int, max_decode_bytes: int) -> Image.Image:
+    """
+    Otevře obrázek a dekóduje ho jen v takovém rozlišení, jaké opravdu potřebujeme.
+
+    1. Podle hlavičky (bez dekódování) odmítne obrázky nad max_pixels.
+    2. JPEG dekóduje rovnou zmenšený (draft mode, DCT škálování 1/2, 1/4, 1/8),
+       takže 50 MP fotka pro 1600px výstup nikdy nevznikne v plném rozlišení.
+    3. Odhad paměti po dekódování musí být pod max_decode_bytes.
+    4. U ostatních formátů (PNG, HEIC, WebP) po dekódování rychle zmenší
+       celočíselným faktorem (Image.reduce), než přijde na řadu drahý LANCZOS.
+
+    `target_width` je požadovaná šířka po otočení podle EXIFu.
+    """
+    try:
+        image = Image.open(source_path)
+    except Image.DecompressionBombError as e:
+        raise ImageRejected(str(e))
+
+    try:
+        # 1. Rozměry z hlavičky
+        width, height = image.size
+        if width * height > max_pixels:
+            raise ImageRejected(
+                f"Obrázek má příliš mnoho pixelů ({width}x{height}, limit {max_pixels // 1_000_000} MP)."
+            )
+
+        # Po otočení o 90° odpovídá cílová šířka výšce uloženého obrázku
+        orientation = image.getexif().get(ExifTags.Base.Orientation, 1)
+        rotated = orientation in _ROTATED_ORIENTATIONS
+        stored_target = (
+            (math.ceil(target_width * width / height), target_width) if rotated
+            else (target_width, math.ceil(target_width * height / width))
+        )
+
+        # 2. JPEG draft - dekodér sám zmenší na nejmenší měřítko >= cíl
+        if image.format == "JPEG" and stored_target[0] < width:
+            image.draft(image.mode, stored_target)
+
+        # 3. Rozpočet paměti pro dekódovaný obrázek
+        decoded_bytes = image.width * image.height * _BYTES_PER_PIXEL.get(image.mode, 4)
+        if decoded_bytes > max_decode_bytes:
+            raise ImageRejected(
+                f"Dekódování obrázku by potřebovalo {decoded_bytes // (1024 * 1024)} MB paměti "
+                f"(limit {max_decode_bytes // (1024 * 1024)} MB)."
+            )
+
+        image.load()
+
+        # 4. Rychlé předzmenšení (necháme aspoň 2x rezervu pro kvalitní LANCZOS)
+        factor = image.width // (stored_target[0] * 2)
+        if factor >= 2 and image.mode in _REDUCE_CONVERT:
+            # Image.reduce neumí paletu ani 1bit -> převod, který by stejně přišel později
+            converted = image.convert(_REDUCE_CONVERT[image.mode])
+            image.close()
+            image = converted
+        if factor >= 2 and not image.mode.startswith("I;16"):  # 16bit reduce neumí, jde rovnou na LANCZOS
+            reduced = image.reduce(factor)  # EXIF (otočení) se zachová v info
+            image.close()
+            image = reduced
+
+        return image
+    except BaseException:
+        image.close()
+        raise
+
+
+# Šířka náhledového "rozmazaného" obrázku (LQIP), který frontend zobrazí před načtením
+PLACEHOLDER_WIDTH = 16
+
+
+def make_placeholder(image: Image.Image) -> str:
+    """Malinký WebP (16px na šířku) jako data URI - vejde se rovnou do JSON odpovědi."""
+    tiny = image.resize(
+        (PLACEHOLDER_WIDTH, max(1, round(PLACEHOLDER_WIDTH * image.height / image.width))),
+        Image.Resampling.BILINEAR,
+    )
+    buffer = io.BytesIO()
+    tiny.save(buffer, format="WEBP", quality=30)
+    return "data:image/webp;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def read_placeholder(source_path: str, max_pixels: int, max_decode_bytes: int) -> dict:
+    """
+    Rozměry (po otočení podle EXIFu) a placeholder už uloženého obrázku - dopočet
+    pro soubory nahrané dřív, než se placeholder začal ukládat. Dekóduje jen malý náhled.
+    """
+    image = open_within_budget(source_path, PLACEHOLDER_WIDTH * 4, max_pixels, max_decode_bytes)
+    try:
+        # Skutečné rozměry z hlavičky (dekódovaný obrázek může být zmenšený)
+        with Image.open(source_path) as header:
+            width, height = header.size
+        if image.getexif().get(ExifTags.Base.Orientation, 1) in _ROTATED_ORIENTATIONS:
+            width, height = height, width
+        ImageOps.exif_transpose(image, in_place=True)
+        if image.mode not in ("RGB", "RGBA"):
+            converted = image.convert("RGBA" if "A" in image.getbands() or image.mode == "P" else "RGB")
+            image.close()
+            image = converted
+        return {"width": width, "height": height, "placeholder": make_placeholder(image)}
+    finally:
+        image.close()
+
+
+def _encode_webp(image: Image.Image, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="WEBP", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def process_image_file(
+    source_path: str,
+    dest_dir: str,
+    widths: list[int],
+    quality: int,
+    max_pixels: int,
+    max_decode_bytes: int,
+) -> dict:
+    """
+    Načte obrázek z disku (jediné dekódování, jen v potřebném rozlišení - viz
+    open_within_budget), zkonvertuje (HEIC->WebP) a vyrobí z něj žebříček variant podle `widths`.
+
+    Název souboru je hash obsahu hlavního (největšího) WebP: <hash>.webp,
+    menší varianty jsou <hash>-<šířka>w.webp. Šířky větší než originál se přeskočí.
+    Soubory se ukládají rozvětveně do dest_dir/ab/cd/ (viz upload_relpath).
+    Vrací dict s cestou hlavního souboru (relativně k dest_dir), rozměry a seznamem variant.
+    """
+    original_size_bytes = os.path.getsize(source_path)
+    max_width = max(widths)
+
+    image = open_within_budget(source_path, max_width, max_pixels, max_decode_bytes)
+    ImageOps.exif_transpose(image, in_place=True) # Otočení podle EXIF (bez kopie celého obrázku)
+
+    if image.mode in ("RGBA", "P", "CMYK"):
+        image = image.convert("RGB")
+
+    # 1. Hlavní obrázek (největší šířka z žebříčku)
+    if image.width > max_width:
+        image = image.resize(
+            (max_width, round(max_width * image.height / image.width)),
+            Image.Resampling.LANCZOS,
+        )
+
+    main_data = _encode_webp(image, quality)
+    stem = hashlib.sha256(main_data).hexdigest()[:32]
+    filename = upload_relpath(f"{stem}.webp")
+    _write_if_missing(os.path.join(dest_dir, filename), main_data)
+
+    variants = [{
+        "filename": filename,
+        "width": image.width,
+        "height": image.height,
+        "size": len(main_data),
+    }]
+
+    # 2. Menší varianty - vždy zmenšujeme z předchozí (větší) varianty,
+    #    takže každý krok pracuje s méně pixely než s originálem
+    current = image
+    for width in sorted(widths, reverse=True):
+        if width >= image.width:
+            continue
+        current = current.resize(
+            (width, max(1, round(width * image.height / image.width))),
+            Image.Resampling.LANCZOS,
+        )
+        data = _encode_webp(current, quality)
+        variant_name = upload_relpath(variant_filename(stem, width))
+        _write_if_missing(os.path.join(dest_dir, variant_name), data)
+        variants.append({
+            "filename": variant_name,
+            "width": current.width,
+            "height": current.height,
+            "size": len(data),
+        })
+
+    # 3. Placeholder z nejmenší varianty (ta už je v paměti)
+    placeholder = make_placeholder(current)
+
+    return {
+        "filename": filename,
+        "width": image.width,
+        "height": image.height,
+        "placeholder": placeholder,
+        # Od nejmenší po největší (tak, jak se píše do srcset)
+        "variants": sorted(variants, key=lambda v: v["width"]),
+        "original_size": original_size_bytes,
+        "final_size": len(main_data),
+    }
+
+
+# Pillow formát pro jednotlivé přípony on-demand variant
+RENDER_FORMATS = {"webp": "WEBP", "jpeg": "JPEG", "png": "PNG", "avif": "AVIF"}
+
+
+def render_variant(source_path: str, dest_path: str, width: int, quality: int, fmt: str) -> int:
+    """
+    Vyrenderuje jednu variantu obrázku o dané šířce a formátu.
+    Zapisuje do dočasného souboru a pak ho atomicky přejmenuje, takže
+    souběžný čtenář nikdy neuvidí napůl zapsaný soubor. Vrací velikost v bajtech.
+    """
+    with Image.open(source_path) as image:
+        image.load()
+        if fmt == "jpeg" and image.mode != "RGB":
+            image = image.convert("RGB")
+
+        if image.width > width:
+            image = image.resize(
+                (width, max(1, round(width * image.height / image.width))),
+                Image.Resampling.LANCZOS,
+            )
+
+        tmp_path = f"{dest_path}.{uuid.uuid4().hex}.tmp"
+        save_kwargs = {"quality": quality}
+        if fmt in ("webp", "jpeg", "png"):
+            save_kwargs["optimize"] = True
+        image.save(tmp_path, format=RENDER_FORMATS[fmt], **save_kwargs)
+
+    os.replace(tmp_path, dest_path)
+    return os.path.getsize(dest_path)
@@ -1,73 +1,244 @@
+import hashlib
 import os
+import shutil
+import time
 import uuid
 from fastapi import UploadFile
-from PIL import Image, ImageOps
-import pillow_heif
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
-# Aktivace HEIC podpory
-pillow_heif.register_heif_opener()
+from app.core.config import settings
+from app.crud import crud_media
+from app.services.image_engine import image_engine, ImageEngineBusy
+from app.services.image_processing import process_image_file, upload_relpath, ImageRejected
+from app.services.storage_usage import record_uploads_change
 
 UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
+os.makedirs(settings.UPLOAD_TMP_DIR, exist_ok=True)
 
-MAX_WIDTH = 1600
-QUALITY = 80
+# Hlavní obrázek má největší šířku z žebříčku variant
+MAX_WIDTH = max(settings.IMAGE_VARIANT_WIDTHS)
+QUALITY = settings.IMAGE_QUALITY
 
-def delete_file_by_url(file_url: str):
+def upload_path_candidates(filename: str) -> list[str]:
+    """
+    Možná umístění nahraného souboru na disku (`filename` = cesta relativně k UPLOAD_DIR).
+    Soubory se postupně stěhují z ploché složky do uploads/ab/cd/ (upload_migration),
+    proto zkoušíme obě podoby: uvedenou cestu i tu druhou.
+    Cesta mimo UPLOAD_DIR (../, skryté soubory) -> prázdný seznam.
+    """
+    parts = filename.split("/")
+    if not filename or any(part in ("", ".", "..") or part.startswith(".") for part in parts):
+        return []
+    name = parts[-1]
+    flat, sharded = name, upload_relpath(name)
+    ordered = [flat, sharded] if filename == flat else [filename, flat]
+    return [os.path.join(UPLOAD_DIR, p) for p in dict.fromkeys(ordered)]
+
+def resolve_upload_path(filename: str) -> str | None:
+    """Cesta k existujícímu souboru (nová i stará podoba URL), nebo None."""
+    for path in upload_path_candidates(filename):
+        if os.path.isfile(path):
+            return path
+    return None
+
+def _remove_upload_files(filenames: list[str]) -> tuple[int, int, list[str]]:
+    """Smaže soubory z /uploads. Vrací (smazané bajty, počet smazaných, nesmazané kvůli chybě)."""
+    removed_bytes, removed, failed = 0, 0, []
+    for filename in filenames:
+        file_path = resolve_upload_path(filename)
+        if file_path is None:
+            continue
+        try:
+            size = os.path.getsize(file_path)
+            os.remove(file_path)
+            removed_bytes += size
+            removed += 1
+            print(f"Smazán soubor: {file_path}")
+        except FileNotFoundError:
+            pass # Mezitím ho smazal někdo jiný
+        except Exception as e:
+            print(f"Chyba při mazání: {e}")
+            failed.append(filename)
+    return removed_bytes, removed, failed
+
+async def remove_upload_files(filenames: list[str]) -> list[str]:
+    """
+    Smaže soubory (ve vlákně) a odečte je z počítadla místa.
+    Vrací soubory, které se smazat nepodařilo.
+    """
+    removed_bytes, removed, failed = await run_in_threadpool(_remove_upload_files, filenames)
+    await record_uploads_change(-removed_bytes, -removed)
+    return failed
+
+def _touch_upload(filename: str):
+    """Obnoví mtime souboru - úklid osiřelých souborů (upload_gc) ho pak bere jako čerstvý upload."""
+    file_path = resolve_upload_path(filename)
+    try:
+        if file_path:
+            os.utime(file_path)
+    except OSError:
+        pass
+
+def _recently_uploaded(filename: str) -> bool:
+    """Soubor se nahrál (nebo deduplikací znovu použil) v posledních UPLOAD_GC_GRACE_HOURS."""
+    file_path = resolve_upload_path(filename)
+    try:
+        return file_path is not None and os.path.getmtime(file_path) > time.time() - settings.UPLOAD_GC_GRACE_HOURS * 3600
+    except OSError:
+        return False
+
+async def release_file_by_url(db: AsyncSession, file_url: str) -> list[str]:
+    """
+    Uvolní jednu referenci na nahraný soubor (jen v DB, bez commitu).
+    Vrací soubory (hlavní + varianty), které se mají smazat z disku - ale až
+    PO úspěšném commitu volajícího (viz services/outbox.py). Prázdný seznam =
+    soubor ještě někdo používá.
+
+    Čerstvě nahraný soubor bez referencí nemažeme: stejný obrázek mohl někdo právě
+    nahrát znovu (deduplikace) a formulář ještě neuložil. Ten uklidí upload_gc.
+    """
     if not file_url:
-        return
+        return []
+
+    media = await crud_media.get_media_by_url(db, file_url)
+
+    if media is not None:
+        # Hlavní soubor i menší varianty (abc-320w.webp, ...)
+        filenames = [v["filename"] for v in media.variants] or [media.filename]
+        remaining = await crud_media.release_reference(db, media)
+        if remaining > 0:
+            print(f"Soubor {file_url} stále používá {remaining} záznamů, nemažu.")
+            return []
+        if await run_in_threadpool(_recently_uploaded, media.filename):
+            print(f"Soubor {file_url} byl nedávno nahrán, mazání nechávám na úklidu (upload_gc).")
+            return []
+        await crud_media.delete_media(db, media)
+        return filenames
 
-    filename = file_url.split("/")[-1]  # vezme poslední část (abc.webp)
+    # Starý soubor z doby před evidencí v media_files
+    return [file_url.split("/uploads/")[-1]]  # abc.webp nebo ab/cd/abc.webp
 
-    file_path = os.path.join(UPLOAD_DIR, filename)
+class UploadTooLarge(Exception):
+    """Soubor je větší než UPLOAD_MAX_BYTES."""
 
+def _stage_upload(source) -> tuple[str, str]:
+    """
+    Zkopíruje nahraný soubor do dočasné složky, aby si ho worker proces mohl přečíst z disku.
+    Cestou spočítá SHA-256 obsahu (pro deduplikaci) a hlídá limit velikosti. Vrací (cesta, hash).
+    """
+    staged_path = os.path.join(settings.UPLOAD_TMP_DIR, f"{uuid.uuid4()}.upload")
+    digest = hashlib.sha256()
+    written = 0
+    source.seek(0)
     try:
-        if os.path.exists(file_path):
-            os.remove(file_path)
-            print(f"Smazán soubor: {file_path}")
-    except Exception as e:
-        print(f"Chyba při mazání: {e}")
+        with open(staged_path, "wb") as out:
+            while chunk := source.read(1024 * 1024):
+                written += len(chunk)
+                if written > settings.UPLOAD_MAX_BYTES:
+                    raise UploadTooLarge()
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        _remove_quietly(staged_path)
+        raise
+    return staged_path, digest.hexdigest()
+
+async def stage_upload_file(file: UploadFile) -> tuple[str, str]:
+    """Uloží UploadFile do UPLOAD_TMP_DIR (mimo event loop). Vrací (cesta, sha256)."""
+    return await run_in_threadpool(_stage_upload, file.file)
+
+def hash_file(path: str) -> str:
+    """SHA-256 souboru na disku (volat přes run_in_threadpool)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        while chunk := source.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
 
-async def process_and_save_image(file: UploadFile) -> dict:
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def _media_result(media, original_size: int, deduplicated: bool) -> dict:
+    variants = [{**v, "url": f"/uploads/{v['filename']}"} for v in media.variants]
+    return {
+        "url": media.url,
+        "filename": media.filename,
+        "width": media.width,
+        "height": media.height,
+        "placeholder": media.placeholder,
+        "variants": variants,
+        "original_size": original_size,
+        "final_size": media.final_size,
+        "deduplicated": deduplicated,
+    }
+
+async def process_and_save_image(db: AsyncSession, file: UploadFile, user_id: int = None) -> dict:
     """
-    Načte obrázek, zkonvertuje (HEIC->WebP), zmenší, zkomprimuje a uloží.
+    Načte obrázek, zkonvertuje (HEIC->WebP), vyrobí varianty pro srcset, zkomprimuje a uloží.
+    Samotná práce s Pillow běží v process poolu (image_engine), event loop se neblokuje.
     Vrací dict s URL a informacemi o velikosti.
+    Při přetížení poolu vyhodí ImageEngineBusy, u příliš velkého souboru UploadTooLarge,
+    u obrázku s příliš velkým rozlišením ImageRejected.
+    """
+
+    # 0. Když je pool plný, nemá smysl soubor ani kopírovat a hashovat
+    #    (přijde o deduplikaci za přetížení, ale 503 je levná)
+    if image_engine.is_saturated:
+        raise ImageEngineBusy()
+
+    # 1. Upload uložíme na disk (kopírování + hash běží ve vlákně, ne na event loopu)
+    staged_path, source_hash = await stage_upload_file(file)
+
+    try:
+        return await process_staged_image(db, staged_path, source_hash, user_id=user_id)
+    finally:
+        _remove_quietly(staged_path)
+
+async def process_staged_image(db: AsyncSession, staged_path: str, source_hash: str, user_id: int = None) -> dict:
+    """
+    Zpracuje soubor, který už leží na disku (klasický upload i navazovaný upload po kusech).
+    Dočasný soubor neodstraňuje - to je starost volajícího.
+
+    Soubory jsou obsahově adresované: když už stejný soubor někdo nahrál,
+    přeskočíme zpracování a vrátíme existující URL. Referenci (ref_count) přidává
+    až uložení záznamu, který URL použije (crud_media.add_reference).
     """
-    
-    # 1. Zjistíme původní velikost (pro logy) - musíme přečíst a pak vrátit kurzor
-    file.file.seek(0, 2)
-    original_size_bytes = file.file.tell()
-    file.file.seek(0)
-    
     try:
-        # 2. Načtení a zpracování
-        image = Image.open(file.file)
-        image = ImageOps.exif_transpose(image) # Otočení podle EXIF
-
-        if image.mode in ("RGBA", "P", "CMYK"):
-            image = image.convert("RGB")
-
-        # 3. Resize
-        if image.width > MAX_WIDTH:
-            aspect_ratio = image.height / image.width
-            new_height = int(MAX_WIDTH * aspect_ratio)
-            image = image.resize((MAX_WIDTH, new_height), Image.Resampling.LANCZOS)
-
-        # 4. Uložení
-        filename = f"{uuid.uuid4()}.webp"
-        file_path = os.path.join(UPLOAD_DIR, filename)
-        
-        # Uložíme a zjistíme novou velikost
-        image.save(file_path, format="WEBP", quality=QUALITY, optimize=True)
-        final_size_bytes = os.path.getsize(file_path)
-
-        return {
-            "url": f"/uploads/{filename}",
-            "filename": filename,
-            "original_size": original_size_bytes,
-            "final_size": final_size_bytes
-        }
+        original_size = os.path.getsize(staged_path)
+
+        # 1. Deduplikace (nepotřebuje process pool, funguje i při přetížení)
+        existing = await crud_media.get_media_by_source_hash(db, source_hash)
+        if existing is not None:
+            # Nový mtime = upload_gc ani release_file_by_url soubor hned nesmažou
+            await run_in_threadpool(_touch_upload, existing.filename)
+            return _media_result(existing, original_size, deduplicated=True)
+
+        # 2. Zpracování ve worker procesu
+        result = await image_engine.run(
+            process_image_file, staged_path, UPLOAD_DIR, settings.IMAGE_VARIANT_WIDTHS, QUALITY,
+            settings.IMAGE_MAX_PIXELS, settings.IMAGE_MAX_DECODE_BYTES,
+        )
+        result["url"] = f"/uploads/{result['filename']}"
 
+        # 3. Evidence souboru (rozměry + žebříček variant)
+        media, created = await crud_media.register_media_file(db, result, source_hash, user_id=user_id)
+        # Nové soubory na disku (hlavní + varianty) -> počítadlo místa pro /api/stats
+        # (not created = souběžný request stejný soubor uložil a započítal dřív)
+        if created:
+            await record_uploads_change(sum(v["size"] for v in result["variants"]), len(result["variants"]))
+        return _media_result(media, original_size, deduplicated=not created)
+
+    except (ImageEngineBusy, ImageRejected):
+        raise
     except Exception as e:
         print(f"Chyba v image_service: {e}")
-        raise e
\ No newline at end of file
+        raise e
+
+def build_srcset(variants: list[dict]) -> str:
+    """[{url, width}, ...] -> "/uploads/a-320w.webp 320w, /uploads/a.webp 1600w\""""
+    return ", ".join(f"{v['url']} {v['width']}w" for v in variants)
@@ -0,0 +1,120 @@
+# backend/app/services/metrics.py
+"""
+Časové řady čísel z dashboardu (uživatelé, publikovaný obsah, nepřečtené zprávy, uploady).
+
+Plánovač každých METRICS_SAMPLE_MINUTES vezme čerstvý snapshot statistik
+(services/stats_snapshot.py) a započítá ho rovnou do tří rozlišení:
+minuta, hodina, den. Každý bucket drží min / max / součet / počet vzorků /
+poslední hodnotu, takže se nic dalšího dopočítávat nemusí a /api/stats/history
+jen čte hotové buckety (nikdy neprochází zdrojové tabulky).
+
+Retence: jemnější rozlišení se mažou dřív (METRICS_RETENTION_*), denní
+buckety zůstávají (pokud není nastaveno jinak).
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.crud import crud_metric_point
+from app.services.stats_snapshot import stats_snapshot
+
+# Metrika -> jak ji vytáhnout ze snapshotu statistik
+METRICS = {
+    "users": lambda s: s["counts"]["users"],
+    "content_items": lambda s: s["counts"]["content_items"],
+    "messages_unread": lambda s: s["counts"]["messages"],
+    "uploads_bytes": lambda s: s["storage"]["uploads_folder_size"],
+    "uploads_files": lambda s: s["storage"]["uploads_file_count"],
+}
+
+# Od nejjemnějšího
+RESOLUTIONS = {
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+
+
+def bucket_start(moment: datetime, resolution: str) -> datetime:
+    """Začátek bucketu (UTC), do kterého okamžik patří."""
+    moment = moment.astimezone(timezone.utc)
+    if resolution == "minute":
+        return moment.replace(second=0, microsecond=0)
+    if resolution == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def retention(resolution: str) -> timedelta | None:
+    """Jak dlouho buckety daného rozlišení držíme (None = napořád)."""
+    limits = {
+        "minute": timedelta(hours=settings.METRICS_RETENTION_MINUTE_HOURS),
+        "hour": timedelta(days=settings.METRICS_RETENTION_HOUR_DAYS),
+        "day": timedelta(days=settings.METRICS_RETENTION_DAY_DAYS),
+    }
+    limit = limits[resolution]
+    return limit if limit > timedelta(0) else None
+
+
+def pick_resolution(start: datetime, end: datetime) -> str:
+    """
+    Nejjemnější rozlišení, které rozsah pokryje (retence) a nepřesáhne
+    METRICS_MAX_POINTS bodů. Když nic nevyhoví, vrátí se denní.
+    """
+    now = datetime.now(timezone.utc)
+    for resolution, size in RESOLUTIONS.items():
+        keep = retention(resolution)
+        if keep is not None and start < now - keep:
+            continue
+        if (end - start) / size <= settings.METRICS_MAX_POINTS:
+            return resolution
+    return "day"
+
+
+async def record_sample(db: AsyncSession, snapshot: dict, moment: datetime | None = None) -> dict[str, float]:
+    """Započítá jeden vzorek všech metrik do bucketů všech rozlišení. Vrací zapsané hodnoty."""
+    moment = moment or datetime.now(timezone.utc)
+    samples = {name: float(extract(snapshot)) for name, extract in METRICS.items()}
+    buckets = {resolution: bucket_start(moment, resolution) for resolution in RESOLUTIONS}
+    await crud_metric_point.add_samples(db, samples, buckets)
+    return samples
+
+
+async def prune_metrics(db: AsyncSession) -> int:
+    """Smaže buckety po retenci. Vrací počet smazaných."""
+    now = datetime.now(timezone.utc)
+    removed = 0
+    for resolution in RESOLUTIONS:
+        keep = retention(resolution)
+        if keep is not None:
+            removed += await crud_metric_point.delete_older_than(db, resolution, now - keep)
+    return removed
+
+
+async def sample_metrics(db: AsyncSession) -> dict[str, float]:
+    """Vzorek z čerstvého snapshotu + úklid podle retence (volá plánovač)."""
+    snapshot = await stats_snapshot.refresh()
+    samples = await record_sample(db, snapshot)
+    await prune_metrics(db)
+    return samples
+
+
+async def get_history(
+    db: AsyncSession, metric: str, start: datetime, end: datetime, resolution: str
+) -> list[dict]:
+    points = await crud_metric_point.get_points(
+        db, metric, resolution, bucket_start(start, resolution), end
+    )
+    return [
+        {
+            "bucket": p.bucket,
+            "min": p.min_value,
+            "max": p.max_value,
+            "avg": p.sum_value / p.sample_count,
+            "last": p.last_value,
+            "samples": p.sample_count,
+        }
+        for p in points
+    ]
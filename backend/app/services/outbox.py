@@ -0,0 +1,97 @@
+# backend/app/services/outbox.py
+"""
+Vedlejší efekty requestu, které se smí provést až po úspěšném commitu.
+
+Endpoint si během práce do Outboxu jen poznamená, co má následovat
+(smazat soubory z disku, zapsat audit log), všechno uloží JEDNÍM commitem
+(outbox.commit(db)) a teprve potom se efekty spustí - request na ně nečeká.
+Když commit selže, nic se nesmaže ani nezaloguje.
+
+Audit log jde do dávkového zápisu (audit_sink), mazání souborů běží na pozadí
+a při chybě se opakuje (OUTBOX_MAX_ATTEMPTS, exponenciální backoff).
+Soubor, který se nepodaří smazat ani tak, později najde úklid osiřelých
+souborů (upload_gc).
+"""
+
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.services.audit_sink import audit_sink
+from app.services.image_service import release_file_by_url, remove_upload_files
+
+# Běžící dispatch tasky (reference, aby je GC nezrušil, a kvůli čekání při vypnutí)
+_pending: set[asyncio.Task] = set()
+
+
+async def _with_retry(name: str, attempt_fn):
+    """Zavolá attempt_fn(), dokud neuspěje (vrací True) nebo nedojdou pokusy."""
+    for attempt in range(1, settings.OUTBOX_MAX_ATTEMPTS + 1):
+        try:
+            if await attempt_fn():
+                return
+        except Exception as e:
+            print(f"❌ Outbox ({name}), pokus {attempt}: {e}")
+        if attempt < settings.OUTBOX_MAX_ATTEMPTS:
+            await asyncio.sleep(settings.OUTBOX_RETRY_DELAY * 2 ** (attempt - 1))
+    print(f"❌ Outbox ({name}): vzdávám to po {settings.OUTBOX_MAX_ATTEMPTS} pokusech.")
+
+
+class Outbox:
+    def __init__(self):
+        self.files: list[str] = []
+        self.audit: list[dict] = []
+
+    async def release_file(self, db: AsyncSession, file_url: str | None):
+        """Uvolní referenci na soubor (změna v DB jde do stejného commitu); smazání z disku až po commitu."""
+        self.files.extend(await release_file_by_url(db, file_url))
+
+    def log(
+        self,
+        action: str,
+        details: str = None,
+        user_id: int = None,
+        actor_email: str = None,
+        payload: dict = None,
+    ):
+        """Záznam do audit logu (parametry jako log_activity), zapíše se po commitu."""
+        self.audit.append({
+            "action": action,
+            "details": details,
+            "user_id": user_id,
+            "actor_email": actor_email,
+            "payload": payload,
+        })
+
+    async def commit(self, db: AsyncSession):
+        """Jeden commit za celý request, pak spuštění efektů na pozadí."""
+        await db.commit()
+        await self.dispatch()
+
+    async def dispatch(self):
+        files, audit = self.files, self.audit
+        self.files, self.audit = [], []
+        for entry in audit:
+            await audit_sink.enqueue(**entry)
+        if not files:
+            return
+        task = asyncio.create_task(_remove_files(files))
+        _pending.add(task)
+        task.add_done_callback(_pending.discard)
+
+
+async def _remove_files(files: list[str]):
+    remaining = list(files)
+
+    async def remove() -> bool:
+        remaining[:] = await remove_upload_files(remaining)
+        return not remaining
+
+    await _with_retry("mazání souborů", remove)
+
+
+async def wait_for_pending(timeout: float = 10):
+    """Při vypnutí aplikace počká na rozběhnuté mazání souborů."""
+    if _pending:
+        await asyncio.wait(list(_pending), timeout=timeout)
@@ -0,0 +1,137 @@
+# backend/app/services/placeholder_backfill.py
+"""
+Dopočet rozměrů a placeholderů (LQIP) u obrázků nahraných dřív, než se začaly ukládat.
+
+Migrace c41a7d9e2b58 přidala sloupce, ale starým záznamům doplnila jen rozměry
+(a to jen u souborů evidovaných v media_files) - placeholder z databáze
+vzít nejde, vzniká jen při zpracování uploadu. Tady se proto vyrábí ze
+souboru na disku: dekóduje se jen malý náhled ve worker procesu image engine,
+a jen když má engine volný proces (uploady mají přednost).
+
+Běží na pozadí po dávkách s časovým rozpočtem (stejně jako upload_migration),
+prochází URL obrázků bez placeholderu seřazené podle URL a kurzor si ukládá do
+system_state (klíč "image_placeholder_backfill"). Po projití všech si poznamená
+"done" a dál nic nedělá. Chybějící nebo nečitelný soubor se jen započítá do reportu.
+"""
+
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import select, update, union
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.crud import crud_system_state
+from app.models.category import Category
+from app.models.content_item import ContentItem, ContentPhoto
+from app.models.media_file import MediaFile
+from app.services.image_engine import image_engine, ImageEngineBusy
+from app.services.image_processing import read_placeholder, upload_url_aliases
+from app.services.image_service import resolve_upload_path
+
+STATE_KEY = "image_placeholder_backfill"
+
+# Sloupce obrázků, které mají vedle sebe rozměry a placeholder (ikona kategorie je nemá)
+IMAGE_COLUMNS = [
+    (ContentItem, ContentItem.image_url),
+    (ContentPhoto, ContentPhoto.image_url),
+    (Category, Category.image_path),
+]
+
+
+def new_report() -> dict:
+    return {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "generated": 0,
+        "missing": 0,
+        "failed": 0,
+        "rows_updated": 0,
+    }
+
+
+async def _next_urls(db: AsyncSession, after: str, size: int) -> list[str]:
+    """Dalších `size` různých URL nahraných obrázků bez placeholderu za kurzorem."""
+    urls = union(*(
+        select(column.label("url")).where(
+            column > after, column.like("/uploads/%"), model.image_placeholder.is_(None)
+        )
+        for model, column in IMAGE_COLUMNS
+    )).subquery()
+    result = await db.execute(select(urls.c.url).order_by(urls.c.url).limit(size))
+    return list(result.scalars().all())
+
+
+async def _backfill_url(db: AsyncSession, url: str, report: dict):
+    """Vyrobí placeholder souboru a doplní ho (s rozměry) všem záznamům i media_files."""
+    path = resolve_upload_path(url.removeprefix("/uploads/"))
+    if path is None:
+        report["missing"] += 1
+        return
+    try:
+        result = await image_engine.run(
+            read_placeholder, path, settings.IMAGE_MAX_PIXELS, settings.IMAGE_MAX_DECODE_BYTES
+        )
+    except ImageEngineBusy:
+        raise
+    except Exception as e:
+        print(f"❌ Placeholdery: nepodařilo se přečíst {url}: {e}")
+        report["failed"] += 1
+        return
+
+    # Všechny podoby URL (soubor mohla mezitím přestěhovat upload_migration)
+    aliases = upload_url_aliases(url)
+    for model, column in IMAGE_COLUMNS:
+        rows = await db.execute(
+            update(model)
+            .where(column.in_(aliases), model.image_placeholder.is_(None))
+            .values(
+                image_width=result["width"],
+                image_height=result["height"],
+                image_placeholder=result["placeholder"],
+            )
+            .execution_options(synchronize_session=False)
+        )
+        report["rows_updated"] += rows.rowcount
+    # I do evidence souboru - nové záznamy se stejným obrázkem si ho pak zkopírují samy
+    await db.execute(
+        update(MediaFile)
+        .where(MediaFile.url.in_(aliases), MediaFile.placeholder.is_(None))
+        .values(placeholder=result["placeholder"])
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    report["generated"] += 1
+
+
+async def run_placeholder_backfill(db: AsyncSession, time_budget: float) -> dict | None:
+    """
+    Jedno (časově omezené) spuštění dopočtu. Vrací report průchodu,
+    nebo None, když je dopočet už hotový.
+    """
+    state = await crud_system_state.get_state(db, STATE_KEY) or {}
+    if state.get("done"):
+        return None
+
+    cursor = state.get("cursor", "")
+    report = state.get("report") or new_report()
+    deadline = time.monotonic() + time_budget
+
+    try:
+        while time.monotonic() < deadline and image_engine.has_free_worker:
+            urls = await _next_urls(db, cursor, settings.PLACEHOLDER_BACKFILL_BATCH_SIZE)
+            if not urls:
+                report["finished_at"] = datetime.now(timezone.utc).isoformat()
+                state["done"] = True
+                break
+            for url in urls:
+                if time.monotonic() >= deadline or not image_engine.has_free_worker:
+                    break
+                await _backfill_url(db, url, report)
+                cursor = url
+    except ImageEngineBusy:
+        pass  # Engine se mezitím zaplnil uploady - pokračujeme příště
+
+    state["cursor"] = cursor
+    state["report"] = report
+    await crud_system_state.set_state(db, STATE_KEY, state)
+    return report
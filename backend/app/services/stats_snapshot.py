@@ -0,0 +1,130 @@
+# backend/app/services/stats_snapshot.py
+"""
+Snapshot čísel pro dashboard (/api/stats).
+
+Každá záložka administrace se na statistiky ptá pořád dokola, ale čísla se
+mění pomalu. Proto je počítáme jednou za čas a držíme v paměti:
+
+- Všechny počty + počítadla místa jdou JEDNÍM dotazem (skalární poddotazy),
+  místo několika dotazů za sebou.
+- Snapshot mladší než STATS_CACHE_TTL_SECONDS se vrací rovnou.
+- Starší (ale ne starší než STATS_MAX_STALE_SECONDS) se vrátí hned také
+  a na pozadí se spustí přepočet (stale-while-revalidate) - vždy jen jeden.
+- Když snapshot chybí nebo je úplně zastaralý, request na přepočet počká
+  (souběžné requesty čekají na tentýž).
+
+Přepočet má vlastní session, nezávislou na requestu, který ho spustil.
+Snapshot drží každý uvicorn worker zvlášť.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import select, func
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.content_item import ContentItem
+from app.models.message import Message
+from app.models.storage_usage import StorageUsage
+from app.models.user import User
+from app.services.storage_usage import UPLOADS_KEY, APP_KEY
+from app.services.system_info import get_disk_usage
+
+# Cesta, podle které se zjišťuje využití filesystemu
+UPLOAD_DIR = "uploads"
+
+
+def _usage_column(key: str, column):
+    return select(column).where(StorageUsage.key == key).scalar_subquery()
+
+
+async def _compute() -> dict:
+    """Spočítá čerstvý snapshot (jeden dotaz do DB + statvfs)."""
+    query = select(
+        select(func.count(User.id)).scalar_subquery().label("users"),
+        select(func.count(ContentItem.id))
+        .where(ContentItem.is_published == True)  # noqa: E712
+        .scalar_subquery().label("content_items"),
+        select(func.count(Message.id))
+        .where(Message.is_read == False)  # noqa: E712
+        .scalar_subquery().label("messages"),
+        _usage_column(UPLOADS_KEY, StorageUsage.bytes).label("uploads_bytes"),
+        _usage_column(UPLOADS_KEY, StorageUsage.files).label("uploads_files"),
+        _usage_column(UPLOADS_KEY, StorageUsage.reconciled_at).label("reconciled_at"),
+        _usage_column(APP_KEY, StorageUsage.bytes).label("app_bytes"),
+    )
+    async with SessionLocal() as db:
+        row = (await db.execute(query)).one()
+
+    total_disk, used_disk, free_disk = await run_in_threadpool(get_disk_usage, UPLOAD_DIR)
+
+    # Před prvním přepočtem počítadel (po nasazení) tam ještě nic není -> 0
+    return {
+        "counts": {
+            "users": row.users or 0,
+            "content_items": row.content_items or 0,
+            "messages": row.messages or 0,
+        },
+        "storage": {
+            "total_disk_size": total_disk,
+            "used_disk_size": used_disk,
+            "free_disk_size": free_disk,
+            "app_folder_size": row.app_bytes or 0,
+            "uploads_folder_size": row.uploads_bytes or 0,
+            "uploads_file_count": row.uploads_files or 0,
+            "reconciled_at": row.reconciled_at,
+        },
+    }
+
+
+class StatsSnapshot:
+    def __init__(self, ttl: float, max_stale: float):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._data: dict | None = None
+        self._generated_at: datetime | None = None
+        self._computed_mono = 0.0  # time.monotonic() posledního přepočtu
+        self._refresh: asyncio.Task | None = None
+
+    def _start_refresh(self) -> asyncio.Task:
+        """Spustí přepočet, pokud už jeden neběží. Vrací běžící task."""
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.create_task(self._run_refresh())
+            self._refresh.add_done_callback(_log_refresh_error)
+        return self._refresh
+
+    async def _run_refresh(self):
+        data = await _compute()
+        self._data = data
+        self._generated_at = datetime.now(timezone.utc)
+        self._computed_mono = time.monotonic()
+
+    async def get(self) -> tuple[dict, datetime, float]:
+        """Vrací (data, kdy byla spočítána, stáří v sekundách)."""
+        age = time.monotonic() - self._computed_mono
+
+        if self._data is None or age > self.max_stale:
+            # Není co vrátit -> počkáme na přepočet (shield: zrušený request nezruší přepočet ostatním)
+            await asyncio.shield(self._start_refresh())
+        elif age > self.ttl:
+            # Vrátíme starší snapshot a přepočet doběhne na pozadí
+            # (když selže, jen se vypíše a příští request to zkusí znovu)
+            self._start_refresh()
+
+        return self._data, self._generated_at, time.monotonic() - self._computed_mono
+
+    async def refresh(self) -> dict:
+        """Vynutí přepočet (např. pro vzorkování metrik) a vrátí čerstvá data."""
+        await asyncio.shield(self._start_refresh())
+        return self._data
+
+
+def _log_refresh_error(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        print(f"❌ Přepočet statistik selhal: {task.exception()}")
+
+
+stats_snapshot = StatsSnapshot(settings.STATS_CACHE_TTL_SECONDS, settings.STATS_MAX_STALE_SECONDS)
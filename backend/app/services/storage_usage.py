@@ -0,0 +1,42 @@
+# backend/app/services/storage_usage.py
+"""
+Počítadla obsazeného místa pro /api/stats.
+
+Místo procházení celé složky při každém načtení dashboardu držíme v DB
+(tabulka storage_usage) průběžný součet bajtů a počtu souborů:
+- image_service ho upraví při každém uložení a smazání souboru v /uploads,
+- plánovač ho jednou za STORAGE_RECONCILE_HOURS přepočítá podle disku
+  (opraví případné odchylky - ručně smazané soubory, pád mezi zápisem a evidencí...).
+"""
+
+from starlette.concurrency import run_in_threadpool
+
+from app.crud import crud_storage_usage
+from app.db.session import SessionLocal
+from app.services.system_info import get_folder_stats
+
+UPLOADS_KEY = "uploads"
+APP_KEY = "app"
+
+
+async def record_uploads_change(delta_bytes: int, delta_files: int):
+    """Promítne uložení (+) / smazání (-) souborů v /uploads do počítadla. Chyba nesmí shodit upload."""
+    if not delta_bytes and not delta_files:
+        return
+    try:
+        async with SessionLocal() as db:
+            await crud_storage_usage.add_usage(db, UPLOADS_KEY, delta_bytes, delta_files)
+    except Exception as e:
+        print(f"Chyba při aktualizaci počítadla místa: {e}")
+
+
+async def reconcile_storage_usage(upload_dir: str, app_dir: str) -> dict:
+    """Přepočítá počítadla podle skutečného stavu disku (procházení běží ve vlákně)."""
+    uploads_bytes, uploads_files = await run_in_threadpool(get_folder_stats, upload_dir)
+    app_bytes, app_files = await run_in_threadpool(get_folder_stats, app_dir)
+
+    async with SessionLocal() as db:
+        await crud_storage_usage.set_usage(db, UPLOADS_KEY, uploads_bytes, uploads_files)
+        await crud_storage_usage.set_usage(db, APP_KEY, app_bytes, app_files)
+
+    return {UPLOADS_KEY: uploads_bytes, APP_KEY: app_bytes}
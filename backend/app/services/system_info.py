@@ -9,22 +9,31 @@ from typing import Tuple
 # (ze složky app/services)
 BACKEND_ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
 
-def get_folder_size(folder_path: str) -> int:
-    """Vrátí rekurzivní velikost složky v bajtech."""
+def get_folder_stats(folder_path: str) -> Tuple[int, int]:
+    """Vrátí rekurzivní velikost složky v bajtech a počet souborů: (bytes, files)."""
     total_size = 0
+    total_files = 0
     # Sestavíme plnou cestu z kořene backendu
     full_path = os.path.join(BACKEND_ROOT, folder_path)
     
     if not os.path.exists(full_path):
-        return 0
+        return 0, 0
     
-    for dirpath, _, filenames in os.walk(full_path):
-        for f in filenames:
-            fp = os.path.join(dirpath, f)
-            if not os.path.islink(fp):
-                total_size += os.path.getsize(fp)
+    # scandir místo os.walk + getsize: typ a velikost bereme z DirEntry (méně syscallů)
+    stack = [full_path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        total_size += entry.stat(follow_symlinks=False).st_size
+                        total_files += 1
+        except OSError:
+            continue
     
-    return total_size
+    return total_size, total_files
 
 def get_disk_usage(path: str) -> Tuple[int, int, int]:
     """
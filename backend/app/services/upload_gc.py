@@ -0,0 +1,237 @@
+# backend/app/services/upload_gc.py
+"""
+Úklid osiřelých souborů v /uploads.
+
+Soubor je osiřelý, když na něj (ani na jeho hlavní obrázek, jde-li o variantu
+abc-320w.webp) neodkazuje žádný sloupec s URL:
+ContentItem.image_url, ContentPhoto.image_url, Category.image_path / icon_path.
+Typicky jde o upload, po kterém uživatel formulář nikdy neuložil, nebo o soubor,
+jehož smazání kdysi selhalo.
+
+Složka může mít statisíce souborů, proto úklid běží po dávkách s časovým
+rozpočtem: jedno spuštění zpracuje, co stihne, a kurzor (poslední cesta, např.
+ab/cd/abc.webp) si uloží do system_state. Prochází se nejdřív stará plochá
+složka, pak podsložky uploads/ab/cd/ v abecedním pořadí. Další spuštění pokračuje od kurzoru; po projití celé
+složky se začíná znovu od začátku a report dokončeného průchodu zůstane
+v system_state (klíč "upload_gc", položka "last_pass").
+
+Soubory mladší než UPLOAD_GC_GRACE_HOURS se nemažou - upload může čekat,
+až uživatel uloží formulář. (Deduplikovaný upload proto hlavnímu souboru
+obnoví mtime, viz image_service.)
+"""
+
+import heapq
+import os
+import re
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.crud import crud_system_state
+from app.models.category import Category
+from app.models.content_item import ContentItem, ContentPhoto
+from app.models.media_file import MediaFile
+from app.services.image_processing import upload_url_aliases
+from app.services.image_service import UPLOAD_DIR, remove_upload_files
+
+STATE_KEY = "upload_gc"
+# Kolik jmen osiřelých souborů si report pamatuje (zbytek jen sečte)
+REPORT_SAMPLE_SIZE = 100
+
+VARIANT_NAME = re.compile(r"^(?P<stem>.+)-\d+w\.webp$")
+
+URL_COLUMNS = [
+    ContentItem.image_url,
+    ContentPhoto.image_url,
+    Category.image_path,
+    Category.icon_path,
+]
+
+
+def _owner_filename(filename: str) -> str:
+    """ab/cd/abc-320w.webp -> ab/cd/abc.webp (varianta patří hlavnímu obrázku), jinak beze změny."""
+    directory, _, name = filename.rpartition("/")
+    match = VARIANT_NAME.match(name)
+    if not match:
+        return filename
+    return f"{directory}/{match['stem']}.webp" if directory else f"{match['stem']}.webp"
+
+
+def _url(filename: str) -> str:
+    return f"/uploads/{filename}"
+
+
+def new_report() -> dict:
+    return {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "scanned": 0,
+        "orphans": 0,
+        "orphan_bytes": 0,
+        "deleted": 0,
+        "sample": [],
+    }
+
+
+def _subdirs(path: str) -> list[str]:
+    try:
+        with os.scandir(path) as entries:
+            return sorted(e.name for e in entries if e.is_dir(follow_symlinks=False) and not e.name.startswith("."))
+    except OSError:
+        return []
+
+
+def _iter_buckets(after_bucket: str):
+    """Složky k procházení od `after_bucket` dál: "" (stará plochá složka), pak "00/00" ... "ff/ff"."""
+    if after_bucket == "":
+        yield ""
+    after_top = after_bucket.split("/")[0]
+    for top in _subdirs(UPLOAD_DIR):
+        if top < after_top:
+            continue
+        for sub in _subdirs(os.path.join(UPLOAD_DIR, top)):
+            bucket = f"{top}/{sub}"
+            if bucket >= after_bucket:
+                yield bucket
+
+
+def _scan_batch(after: str, size: int) -> list[dict]:
+    """
+    Dalších `size` souborů za kurzorem `after` (volat přes run_in_threadpool).
+    Jména čteme přes scandir (bez stat), stat děláme jen pro vybranou dávku.
+    Skryté soubory (.gitkeep) přeskakujeme.
+    """
+    after_bucket, _, after_name = after.rpartition("/")
+    names: list[str] = []
+    for bucket in _iter_buckets(after_bucket):
+        floor = after_name if bucket == after_bucket else ""
+        with os.scandir(os.path.join(UPLOAD_DIR, bucket)) as entries:
+            found = heapq.nsmallest(
+                size - len(names),
+                (
+                    e.name for e in entries
+                    if e.name > floor and not e.name.startswith(".") and e.is_file(follow_symlinks=False)
+                ),
+            )
+        names.extend(f"{bucket}/{name}" if bucket else name for name in found)
+        if len(names) >= size:
+            break
+
+    batch = []
+    mtimes: dict[str, float] = {}
+    for name in names:
+        try:
+            stat = os.stat(os.path.join(UPLOAD_DIR, name))
+        except OSError:
+            continue  # mezitím zmizel
+        mtimes[name] = stat.st_mtime
+        batch.append({"filename": name, "size": stat.st_size, "mtime": stat.st_mtime})
+
+    # Stáří varianty se počítá podle hlavního souboru (ten při deduplikaci dostane nový mtime)
+    for item in batch:
+        owner = _owner_filename(item["filename"])
+        item["owner"] = owner
+        if owner not in mtimes:
+            try:
+                mtimes[owner] = os.stat(os.path.join(UPLOAD_DIR, owner)).st_mtime
+            except OSError:
+                mtimes[owner] = item["mtime"]
+        item["owner_mtime"] = max(item["mtime"], mtimes[owner])
+    return batch
+
+
+def _item_urls(item: dict) -> set[str]:
+    """URL, které soubor "drží naživu": vlastní i hlavního obrázku, v plochém i rozvětveném tvaru."""
+    return {
+        alias
+        for filename in (item["filename"], item["owner"])
+        for alias in upload_url_aliases(_url(filename))
+    }
+
+
+async def _referenced_urls(db: AsyncSession, urls: set[str]) -> set[str]:
+    referenced = set()
+    for column in URL_COLUMNS:
+        result = await db.execute(select(column).where(column.in_(urls)).distinct())
+        referenced.update(result.scalars().all())
+    return referenced
+
+
+async def gc_step(db: AsyncSession, cursor: str, report: dict, dry_run: bool) -> str | None:
+    """
+    Zpracuje jednu dávku souborů za kurzorem. Vrací nový kurzor,
+    nebo None, když už ve složce nic dalšího není (průchod je u konce).
+    """
+    batch = await run_in_threadpool(_scan_batch, cursor, settings.UPLOAD_GC_BATCH_SIZE)
+    if not batch:
+        return None
+
+    grace_cutoff = time.time() - settings.UPLOAD_GC_GRACE_HOURS * 3600
+    candidates = [item for item in batch if item["owner_mtime"] < grace_cutoff]
+    urls = set().union(*(_item_urls(item) for item in candidates))
+    referenced = await _referenced_urls(db, urls) if urls else set()
+
+    orphans = [item for item in candidates if not _item_urls(item) & referenced]
+
+    report["scanned"] += len(batch)
+    report["orphans"] += len(orphans)
+    report["orphan_bytes"] += sum(item["size"] for item in orphans)
+    free_slots = REPORT_SAMPLE_SIZE - len(report["sample"])
+    report["sample"].extend(item["filename"] for item in orphans[:max(free_slots, 0)])
+
+    if orphans and not dry_run:
+        # Nejdřív evidence (media_files), pak disk - když mazání souboru selže,
+        # chytí ho další průchod jako obyčejný osiřelý soubor
+        owner_urls = {alias for item in orphans for alias in upload_url_aliases(_url(item["owner"]))}
+        result = await db.execute(select(MediaFile).where(MediaFile.url.in_(owner_urls)))
+        filenames = {item["filename"] for item in orphans}
+        for media in result.scalars().all():
+            # Varianty mohly vypadnout do další dávky - smažeme je rovnou
+            filenames.update(v["filename"] for v in media.variants or [])
+        await db.execute(delete(MediaFile).where(MediaFile.url.in_(owner_urls)))
+        await db.commit()
+
+        failed = await remove_upload_files(sorted(filenames))
+        report["deleted"] += len(filenames) - len(failed)
+
+    return batch[-1]["filename"]
+
+
+async def run_upload_gc(db: AsyncSession, time_budget: float, dry_run: bool) -> dict:
+    """
+    Jedno (časově omezené) spuštění úklidu. Pokračuje tam, kde skončilo minulé.
+    Vrací souhrn tohoto spuštění.
+    """
+    state = await crud_system_state.get_state(db, STATE_KEY) or {}
+    cursor = state.get("cursor", "")
+    report = state.get("pass") or new_report()
+    # Přepnutí dry-run <-> ostré mazání začne nový průchod, aby se čísla nemíchala
+    if report.get("dry_run") != dry_run:
+        cursor, report = "", new_report()
+    report["dry_run"] = dry_run
+
+    counters = ("scanned", "orphans", "deleted")
+    before = {key: report[key] for key in counters}
+    finished = None
+    deadline = time.monotonic() + time_budget
+
+    while time.monotonic() < deadline:
+        next_cursor = await gc_step(db, cursor, report, dry_run)
+        if next_cursor is None:
+            finished = report
+            finished["finished_at"] = datetime.now(timezone.utc).isoformat()
+            state["last_pass"] = finished
+            cursor, report = "", {**new_report(), "dry_run": dry_run}
+            break
+        cursor = next_cursor
+
+    state["cursor"] = cursor
+    state["pass"] = report
+    await crud_system_state.set_state(db, STATE_KEY, state)
+
+    run = {key: (finished or report)[key] - before[key] for key in counters}
+    run["finished_pass"] = finished is not None
+    return run
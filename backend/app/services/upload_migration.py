@@ -0,0 +1,150 @@
+# backend/app/services/upload_migration.py
+"""
+Přestěhování starých souborů z ploché složky uploads/ do rozvětvené uploads/ab/cd/.
+
+Běží na pozadí po dávkách s časovým rozpočtem (stejně jako upload_gc) a kurzor
+si ukládá do system_state (klíč "upload_shard_migration"), takže po restartu
+pokračuje, kde skončila. Po projití celé složky si poznamená "done" a dál nic nedělá.
+
+Každá dávka:
+1. přepíše URL v DB (sloupce s obrázky + media_files) na novou podobu a commitne,
+2. teprve pak přesune soubory na disku.
+Když proces spadne mezi 1. a 2., nic se nerozbije - /uploads umí najít soubor
+podle staré i nové URL (resolve_upload_path) a další běh soubory dostěhuje.
+URL vložené přímo v textu obsahu (ContentItem.content) se nepřepisují;
+fungují dál díky stejnému dohledání.
+"""
+
+import heapq
+import os
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import select, update, case
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.crud import crud_system_state
+from app.models.category import Category
+from app.models.content_item import ContentItem, ContentPhoto
+from app.models.media_file import MediaFile
+from app.services.image_processing import upload_relpath
+from app.services.image_service import UPLOAD_DIR
+
+STATE_KEY = "upload_shard_migration"
+
+URL_COLUMNS = [
+    (ContentItem, ContentItem.image_url),
+    (ContentPhoto, ContentPhoto.image_url),
+    (Category, Category.image_path),
+    (Category, Category.icon_path),
+]
+
+
+def new_report() -> dict:
+    return {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "moved": 0,
+        "failed": 0,
+        "rows_updated": 0,
+    }
+
+
+def _list_flat_files(after: str, size: int) -> list[str]:
+    """Dalších `size` souborů přímo v UPLOAD_DIR (bez podsložek a skrytých souborů) za kurzorem."""
+    with os.scandir(UPLOAD_DIR) as entries:
+        return heapq.nsmallest(
+            size,
+            (
+                e.name for e in entries
+                if e.name > after and not e.name.startswith(".") and e.is_file(follow_symlinks=False)
+            ),
+        )
+
+
+def _move_files(names: list[str]) -> int:
+    """Přesune soubory do podsložek. Vrací počet neúspěchů (zůstanou na místě, kurzor je přeskočí)."""
+    failed = 0
+    for name in names:
+        source = os.path.join(UPLOAD_DIR, name)
+        target = os.path.join(UPLOAD_DIR, upload_relpath(name))
+        try:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if os.path.exists(target):
+                # Obsahově adresovaný soubor už na novém místě je (stejný obsah)
+                os.remove(source)
+            else:
+                os.replace(source, target)  # Atomické v rámci jednoho filesystemu
+        except FileNotFoundError:
+            pass  # Mezitím ho někdo smazal
+        except OSError as e:
+            print(f"❌ Migrace uploadů: nepodařilo se přesunout {name}: {e}")
+            failed += 1
+    return failed
+
+
+async def _rewrite_urls(db: AsyncSession, names: list[str]) -> int:
+    """Přepíše /uploads/abc.webp -> /uploads/ab/cd/abc.webp ve všech sloupcích. Vrací počet změněných řádků."""
+    mapping = {f"/uploads/{name}": f"/uploads/{upload_relpath(name)}" for name in names}
+    updated = 0
+
+    for model, column in URL_COLUMNS:
+        result = await db.execute(
+            update(model)
+            .where(column.in_(mapping.keys()))
+            .values({column.key: case(mapping, value=column)})
+            .execution_options(synchronize_session=False)
+        )
+        updated += result.rowcount
+
+    # media_files: URL, cesta hlavního souboru i cesty variant
+    result = await db.execute(select(MediaFile).where(MediaFile.url.in_(mapping.keys())))
+    for media in result.scalars().all():
+        media.url = mapping[media.url]
+        media.filename = upload_relpath(media.filename)
+        media.variants = [{**v, "filename": upload_relpath(v["filename"])} for v in media.variants or []]
+        updated += 1
+
+    await db.commit()
+    return updated
+
+
+async def migrate_step(db: AsyncSession, cursor: str, report: dict) -> str | None:
+    """Přestěhuje jednu dávku. Vrací nový kurzor, nebo None, když v ploché složce nic dalšího není."""
+    names = await run_in_threadpool(_list_flat_files, cursor, settings.UPLOAD_MIGRATION_BATCH_SIZE)
+    if not names:
+        return None
+
+    report["rows_updated"] += await _rewrite_urls(db, names)
+    failed = await run_in_threadpool(_move_files, names)
+    report["moved"] += len(names) - failed
+    report["failed"] += failed
+    return names[-1]
+
+
+async def run_upload_migration(db: AsyncSession, time_budget: float) -> dict | None:
+    """
+    Jedno (časově omezené) spuštění migrace. Vrací report průchodu,
+    nebo None, když je migrace už hotová.
+    """
+    state = await crud_system_state.get_state(db, STATE_KEY) or {}
+    if state.get("done"):
+        return None
+
+    cursor = state.get("cursor", "")
+    report = state.get("report") or new_report()
+    deadline = time.monotonic() + time_budget
+
+    while time.monotonic() < deadline:
+        next_cursor = await migrate_step(db, cursor, report)
+        if next_cursor is None:
+            report["finished_at"] = datetime.now(timezone.utc).isoformat()
+            state["done"] = True
+            break
+        cursor = next_cursor
+
+    state["cursor"] = cursor
+    state["report"] = report
+    await crud_system_state.set_state(db, STATE_KEY, state)
+    return report
@@ -0,0 +1,208 @@
+# backend/app/services/upload_sessions.py
+"""
+Navazovaný (resumable) upload po kusech.
+
+Klient si založí session s celkovou velikostí souboru, pak posílá kusy
+(PUT s hlavičkou Upload-Offset) a nakonec upload dokončí. Když spojení
+spadne, zeptá se na aktuální offset a pokračuje od posledního potvrzeného bajtu.
+
+Stav je jen na disku (UPLOAD_TMP_DIR/sessions), takže funguje napříč
+uvicorn workery i po restartu:
+- <id>.json  ... metadata (kdo, co, jak velké)
+- <id>.part  ... dosud přijatá data; jeho velikost = potvrzený offset
+"""
+
+import fcntl
+import json
+import os
+import time
+import uuid
+from dataclasses import dataclass, asdict
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.services.image_service import UploadTooLarge
+
+SESSIONS_DIR = os.path.join(settings.UPLOAD_TMP_DIR, "sessions")
+os.makedirs(SESSIONS_DIR, exist_ok=True)
+
+# Data z requestu zapisujeme na disk po blocích, ne po každém malém kousku
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+
+class UploadSessionNotFound(Exception):
+    pass
+
+
+class UploadSessionBusy(Exception):
+    """Do stejné session právě zapisuje jiný request."""
+
+
+class UploadOffsetMismatch(Exception):
+    """Klient poslal kus od jiného offsetu, než kolik máme uloženo."""
+
+    def __init__(self, current_offset: int):
+        super().__init__(current_offset)
+        self.current_offset = current_offset
+
+
+@dataclass
+class UploadSession:
+    id: str
+    user_id: int
+    filename: str
+    content_type: str
+    total_size: int
+    created_at: float
+
+    @property
+    def meta_path(self) -> str:
+        return os.path.join(SESSIONS_DIR, f"{self.id}.json")
+
+    @property
+    def part_path(self) -> str:
+        return os.path.join(SESSIONS_DIR, f"{self.id}.part")
+
+
+def _current_offset(session: UploadSession) -> int:
+    try:
+        return os.path.getsize(session.part_path)
+    except OSError:
+        return 0
+
+
+def _create(session: UploadSession):
+    open(session.part_path, "wb").close()
+    with open(session.meta_path, "w") as out:
+        json.dump(asdict(session), out)
+
+
+def _load(upload_id: str) -> UploadSession:
+    # Ochrana proti "../" v ID
+    if os.path.basename(upload_id) != upload_id:
+        raise UploadSessionNotFound()
+    try:
+        with open(os.path.join(SESSIONS_DIR, f"{upload_id}.json")) as source:
+            return UploadSession(**json.load(source))
+    except (OSError, ValueError, TypeError):
+        raise UploadSessionNotFound()
+
+
+def _open_locked(session: UploadSession):
+    """Otevře .part soubor s exkluzivním zámkem (zámek zmizí i při pádu procesu)."""
+    handle = open(session.part_path, "r+b")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        handle.close()
+        raise UploadSessionBusy()
+    return handle
+
+
+def _write(handle, data: bytes):
+    handle.write(data)
+
+
+def _sync_and_close(handle):
+    try:
+        handle.flush()
+        os.fsync(handle.fileno())
+    finally:
+        handle.close()
+
+
+def _remove(session: UploadSession):
+    for path in (session.part_path, session.meta_path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+async def create_session(user_id: int, filename: str, content_type: str, total_size: int) -> UploadSession:
+    if total_size > settings.UPLOAD_MAX_BYTES:
+        raise UploadTooLarge()
+
+    session = UploadSession(
+        id=uuid.uuid4().hex,
+        user_id=user_id,
+        filename=filename,
+        content_type=content_type,
+        total_size=total_size,
+        created_at=time.time(),
+    )
+    await run_in_threadpool(_create, session)
+    return session
+
+
+async def get_session(upload_id: str, user_id: int) -> tuple[UploadSession, int]:
+    """Vrátí session a aktuální (potvrzený) offset. Cizí session se tváří jako neexistující."""
+    session = await run_in_threadpool(_load, upload_id)
+    if session.user_id != user_id:
+        raise UploadSessionNotFound()
+    return session, await run_in_threadpool(_current_offset, session)
+
+
+async def append_chunk(session: UploadSession, offset: int, stream) -> int:
+    """
+    Zapíše další kus souboru z `stream` (async iterátor bajtů, typicky request.stream()).
+    Limit velikosti hlídáme průběžně - nic nad total_size se na disk nedostane.
+    Vrací nový potvrzený offset.
+    """
+    handle = await run_in_threadpool(_open_locked, session)
+    try:
+        current = handle.seek(0, os.SEEK_END)
+        if offset != current:
+            raise UploadOffsetMismatch(current)
+
+        received = current
+        buffer = bytearray()
+        async for piece in stream:
+            received += len(piece)
+            if received > session.total_size:
+                raise UploadTooLarge()
+            buffer += piece
+            if len(buffer) >= WRITE_BUFFER_SIZE:
+                await run_in_threadpool(_write, handle, bytes(buffer))
+                buffer.clear()
+
+        if buffer:
+            await run_in_threadpool(_write, handle, bytes(buffer))
+    finally:
+        # I při přerušeném spojení uložíme, co už je zapsané -> klient naváže odtud
+        await run_in_threadpool(_sync_and_close, handle)
+
+    return await run_in_threadpool(_current_offset, session)
+
+
+async def lock_session(session: UploadSession):
+    """Zamkne session (např. během dokončování), aby do ní nikdo nezapisoval. Vrací handle pro unlock_session."""
+    return await run_in_threadpool(_open_locked, session)
+
+
+async def unlock_session(handle):
+    await run_in_threadpool(handle.close)
+
+
+async def discard_session(session: UploadSession):
+    await run_in_threadpool(_remove, session)
+
+
+def cleanup_stale_sessions() -> int:
+    """Smaže rozpracované uploady starší než UPLOAD_SESSION_TTL_HOURS. Vrací počet smazaných."""
+    cutoff = time.time() - settings.UPLOAD_SESSION_TTL_HOURS * 3600
+    removed = 0
+    for entry in os.scandir(SESSIONS_DIR):
+        if entry.name.endswith(".json"):
+            upload_id = entry.name[:-len(".json")]
+            part_path = os.path.join(SESSIONS_DIR, f"{upload_id}.part")
+            # Poslední aktivita = poslední zápis do .part souboru
+            try:
+                last_activity = os.path.getmtime(part_path)
+            except OSError:
+                last_activity = entry.stat().st_mtime
+            if last_activity < cutoff:
+                _remove(UploadSession(upload_id, 0, "", "", 0, 0))
+                removed += 1
+    return removed
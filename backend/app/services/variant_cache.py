@@ -0,0 +1,185 @@
+# backend/app/services/variant_cache.py
+"""
+On-demand varianty obrázků s omezenou cache na disku.
+
+- První request na (soubor, šířka, kvalita, formát) variantu vyrenderuje
+  v image_engine a uloží do VARIANT_CACHE_DIR.
+- Další requesty ji servírují rovnou z disku.
+- Cache má strop VARIANT_CACHE_MAX_BYTES; při překročení mažeme
+  nejdéle nepoužité soubory (LRU podle posledního přístupu).
+- Souběžné requesty na stejnou variantu čekají na jediný render.
+- peek() jen zjistí, jestli varianta už existuje, a warm() ji nechá
+  vyrenderovat na pozadí (pro vyjednání formátu podle Accept u originálů).
+
+Index LRU drží každý uvicorn worker zvlášť. Když soubor mezitím smaže
+jiný worker, prostě ho vyrenderujeme znovu.
+"""
+
+import asyncio
+import os
+from collections import OrderedDict
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.services.image_engine import image_engine
+from app.services.image_processing import render_variant, variant_filename
+
+
+class VariantCache:
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, int] = OrderedDict()  # cesta -> velikost (od nejstarší)
+        self._total_bytes = 0
+        self._loaded = False
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._background: set[asyncio.Task] = set()  # Reference na běžící warm() tasky
+
+    # --- Index ---
+    def _scan(self) -> list[tuple[str, int, float]]:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        found = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                st = entry.stat()
+                found.append((entry.path, st.st_size, st.st_mtime))
+        return found
+
+    async def _ensure_loaded(self):
+        if self._loaded:
+            return
+        found = await run_in_threadpool(self._scan)
+        # Čas posledního přístupu ukládáme do mtime (viz _touch)
+        for path, size, _ in sorted(found, key=lambda f: f[2]):
+            self._entries[path] = size
+            self._total_bytes += size
+        self._loaded = True
+
+    def _forget(self, path: str):
+        size = self._entries.pop(path, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def _add(self, path: str, size: int):
+        self._forget(path)
+        self._entries[path] = size
+        self._total_bytes += size
+
+    @staticmethod
+    def _touch(path: str):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _evict(self) -> list[str]:
+        """Vyřadí z indexu nejstarší položky nad limit a vrátí jejich cesty ke smazání."""
+        victims = []
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            path, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            victims.append(path)
+        return victims
+
+    @staticmethod
+    def _remove_files(paths: list[str]):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    # --- Veřejné API ---
+    def variant_path(self, source_path: str, width: int, quality: int, fmt: str) -> str:
+        stem, _ = os.path.splitext(os.path.basename(source_path))
+        return os.path.join(self.cache_dir, f"{stem}-w{width}-q{quality}.{fmt}")
+
+    async def peek(self, source_path: str, width: int, quality: int, fmt: str) -> str | None:
+        """Cesta k variantě, jen když už je v cache (nic nerenderuje)."""
+        await self._ensure_loaded()
+        path = self.variant_path(source_path, width, quality, fmt)
+        if path not in self._entries:
+            return None
+        if not os.path.exists(path):
+            self._forget(path)
+            return None
+        self._entries.move_to_end(path)
+        await run_in_threadpool(self._touch, path)
+        return path
+
+    def warm(self, source_path: str, width: int, quality: int, fmt: str):
+        """
+        Vyrenderuje variantu na pozadí (request na ni nečeká).
+        Když pool nemá volný proces nebo už render probíhá, nedělá nic - zkusí se při dalším requestu.
+        """
+        path = self.variant_path(source_path, width, quality, fmt)
+        if path in self._inflight or not image_engine.has_free_worker:
+            return
+
+        async def render():
+            try:
+                await self.get(source_path, width, quality, fmt)
+            except Exception as e:
+                print(f"Varianta {path} se nevyrenderovala: {e}")
+
+        task = asyncio.create_task(render())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def get(self, source_path: str, width: int, quality: int, fmt: str) -> str:
+        """Vrátí cestu k (případně právě vyrenderované) variantě."""
+        await self._ensure_loaded()
+
+        path = self.variant_path(source_path, width, quality, fmt)
+
+        # 1. Cache hit
+        if path in self._entries:
+            if os.path.exists(path):
+                self._entries.move_to_end(path)
+                await run_in_threadpool(self._touch, path)
+                return path
+            self._forget(path)
+
+        # 2. Už ji renderuje jiný request -> počkáme na něj
+        inflight = self._inflight.get(path)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        # 3. Renderujeme my
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[path] = future
+        try:
+            render_source = await run_in_threadpool(_best_render_source, source_path, width)
+            size = await image_engine.run(render_variant, render_source, path, width, quality, fmt)
+            self._add(path, size)
+            victims = self._evict()
+            if victims:
+                await run_in_threadpool(self._remove_files, victims)
+            future.set_result(path)
+            return path
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Aby asyncio nehlásilo "exception was never retrieved"
+            raise
+        finally:
+            del self._inflight[path]
+
+
+def _best_render_source(source_path: str, width: int) -> str:
+    """
+    Nejmenší předgenerovaná varianta (abc-640w.webp), která je aspoň tak
+    široká jako požadovaná šířka. Dekódovat 640px soubor je mnohem levnější
+    než 1600px originál. Když žádná nevyhovuje, vrátí originál.
+    """
+    stem, _ = os.path.splitext(source_path)
+    for ladder_width in settings.IMAGE_VARIANT_WIDTHS:  # Seřazeno vzestupně
+        if ladder_width < width:
+            continue
+        candidate = variant_filename(stem, ladder_width)
+        if os.path.exists(candidate):
+            return candidate
+    return source_path
+
+
+variant_cache = VariantCache(settings.VARIANT_CACHE_DIR, settings.VARIANT_CACHE_MAX_BYTES)
@@ -0,0 +1,79 @@
+# backend/tests/conftest.py
+"""
+Společné nastavení testů.
+
+Testy běží proti SQLite v dočasné složce (ne proti .env) a s pracovním
+adresářem tamtéž - uploads/, uploads_tmp/, cache/ i archive/ vznikají
+mimo repozitář. Musí se nastavit dřív, než se importuje cokoliv z app.
+"""
+
+import asyncio
+import io
+import os
+import tempfile
+
+WORKDIR = tempfile.mkdtemp(prefix="backend-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{WORKDIR}/test.db"
+os.chdir(WORKDIR)
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+from sqlalchemy import select
+
+from app.core.security import create_access_token, get_password_hash
+from app.db import session as db_session
+from app.db.base import Base
+from app.main import app
+from app.models.storage_usage import StorageUsage
+from app.models.user import User
+from app.services.storage_usage import APP_KEY
+
+db_session.engine.echo = False
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def db():
+    """Čistá databáze pro každý test."""
+    async with db_session.engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    async with db_session.SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+async def admin(db):
+    user = User(email="admin@example.com", hashed_password=get_password_hash("heslo"), is_admin=True, is_active=True)
+    db.add(user)
+    await db.commit()
+    return user
+
+
+@pytest.fixture
+def auth_headers(admin):
+    return {"Authorization": f"Bearer {create_access_token({'sub': admin.email})}"}
+
+
+@pytest.fixture
+async def client(db):
+    """Aplikace včetně lifespanu (audit writer, image engine, plánovač)."""
+    with TestClient(app) as test_client:
+        # Plánovač hned po startu přepočítává místo na disku. Při vypnutí by ho zrušil
+        # uprostřed zápisu a SQLite by zůstala zamčená pro další test -> počkáme na něj.
+        for _ in range(100):
+            if await db.scalar(select(StorageUsage.reconciled_at).where(StorageUsage.key == APP_KEY)):
+                break
+            await asyncio.sleep(0.05)
+        yield test_client
+
+
+def make_jpeg(width: int = 1200, height: int = 800, color=(200, 50, 50)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(buffer, "JPEG")
+    return buffer.getvalue()
@@ -0,0 +1,44 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.services import audit_archive
+
+DAY = datetime(2025, 1, 10, tzinfo=timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(audit_archive, "ARCHIVE_DIR", str(tmp_path))
+    monkeypatch.setattr(audit_archive, "MANIFEST_PATH", str(tmp_path / "manifest.ndjson"))
+
+
+def _row(id: int, hour: int, action: str = "LOGIN") -> dict:
+    return {
+        "id": id, "created_at": DAY.replace(hour=hour), "action": action, "details": None,
+        "payload": None, "user_id": None, "actor_email": "admin@example.com",
+    }
+
+
+def test_search_reads_overlapping_files_of_one_day():
+    # Dvě dávky retence téhož dne, časy se překrývají (id neodpovídá pořadí created_at)
+    audit_archive.archive_rows([_row(1, 10), _row(2, 12)])
+    audit_archive.archive_rows([_row(3, 9), _row(4, 11)])
+
+    found = audit_archive.search(DAY, DAY.replace(hour=23), limit=2)
+    assert [record["id"] for record in found] == [3, 1]
+
+    found = audit_archive.search(DAY, DAY.replace(hour=23), limit=10)
+    assert [record["id"] for record in found] == [3, 1, 4, 2]
+
+
+def test_search_skips_duplicates_and_filters():
+    # Stejná dávka archivovaná dvakrát (úklid spadl mezi archivem a smazáním)
+    rows = [_row(1, 8, "LOGIN"), _row(2, 9, "LOGS_CLEANUP")]
+    audit_archive.archive_rows(rows)
+    audit_archive.archive_rows(rows)
+
+    found = audit_archive.search(DAY, DAY.replace(hour=23))
+    assert [record["id"] for record in found] == [1, 2]
+    found = audit_archive.search(DAY, DAY.replace(hour=23), action="LOGS_CLEANUP", email="ADMIN@")
+    assert [record["id"] for record in found] == [2]
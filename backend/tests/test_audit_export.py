@@ -0,0 +1,39 @@
+import csv
+import io
+import json
+
+import pytest
+
+from app.models.audit_log import AuditLog
+
+pytestmark = pytest.mark.anyio
+
+
+async def _add_logs(db):
+    db.add_all([
+        AuditLog(action="LOGIN_FAILED", actor_email="=HYPERLINK(\"http://x\")", details="@SUM(A1:A9)"),
+        AuditLog(action="UPLOAD", actor_email="admin@example.com", details="-1+2"),
+        AuditLog(action="NOTE", actor_email="admin@example.com", details="běžný text"),
+    ])
+    await db.commit()
+
+
+async def test_csv_export_neutralizes_formulas(db, client, auth_headers):
+    await _add_logs(db)
+
+    response = client.get("/api/logs/export?format=csv", headers=auth_headers)
+    assert response.status_code == 200
+    rows = {row["action"]: row for row in csv.DictReader(io.StringIO(response.text))}
+
+    assert rows["LOGIN_FAILED"]["actor_email"] == "'=HYPERLINK(\"http://x\")"
+    assert rows["LOGIN_FAILED"]["details"] == "'@SUM(A1:A9)"
+    assert rows["UPLOAD"]["details"] == "'-1+2"
+    assert rows["NOTE"]["details"] == "běžný text"
+
+
+async def test_ndjson_export_keeps_values(db, client, auth_headers):
+    await _add_logs(db)
+
+    response = client.get("/api/logs/export?format=ndjson", headers=auth_headers)
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert {r["details"] for r in records} == {"@SUM(A1:A9)", "-1+2", "běžný text"}
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models.audit_log import AuditLog
+
+pytestmark = pytest.mark.anyio
+
+START = datetime(2026, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+
+async def _add_logs(db, count: int = 25):
+    # Po třech záznamech se stejným časem - pořadí musí rozhodnout id
+    db.add_all([
+        AuditLog(action="LOGIN" if i % 2 else "UPLOAD", details=f"log {i}", created_at=START + timedelta(minutes=i // 3))
+        for i in range(count)
+    ])
+    await db.commit()
+
+
+def _pages(client, headers, limit: int, **params) -> list[list[int]]:
+    pages, cursor = [], None
+    while True:
+        query = {"limit": limit, **params, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/logs/", headers=headers, params=query)
+        assert response.status_code == 200
+        pages.append([log["id"] for log in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return pages
+
+
+async def test_cursor_pages_have_no_gaps_or_duplicates(db, client, auth_headers):
+    await _add_logs(db)
+
+    everything = [log["id"] for log in client.get("/api/logs/", headers=auth_headers, params={"limit": 100}).json()]
+    assert len(everything) == 25
+
+    pages = _pages(client, auth_headers, limit=7)
+    assert [len(page) for page in pages] == [7, 7, 7, 4]
+    assert [log_id for page in pages for log_id in page] == everything
+
+    # Stejné stránky jako přes skip (OFFSET)
+    for number, page in enumerate(pages):
+        by_skip = client.get("/api/logs/", headers=auth_headers, params={"limit": 7, "skip": number * 7}).json()
+        assert [log["id"] for log in by_skip] == page
+
+
+async def test_cursor_respects_filters_and_new_rows(db, client, auth_headers):
+    await _add_logs(db)
+
+    first = client.get("/api/logs/", headers=auth_headers, params={"limit": 5, "action": "LOGIN"})
+    # Nový záznam mezi stránkami se do dalších stránek nepropíše (na rozdíl od OFFSETu)
+    db.add(AuditLog(action="LOGIN", details="nový", created_at=START + timedelta(days=1)))
+    await db.commit()
+    rest = _pages(client, auth_headers, limit=5, action="LOGIN", cursor=first.headers["X-Next-Cursor"])
+
+    ids = [log["id"] for log in first.json()] + [log_id for page in rest for log_id in page]
+    assert len(ids) == len(set(ids)) == 12
+
+
+@pytest.mark.parametrize("cursor", ["nesmysl", "bm90LWEtY3Vyc29y", "MjAyNi0wNS0wMVQxMjowMDowMHxhYmM"])
+async def test_invalid_cursor_is_rejected(client, auth_headers, cursor):
+    response = client.get("/api/logs/", headers=auth_headers, params={"cursor": cursor})
+    assert response.status_code == 400
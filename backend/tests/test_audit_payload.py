@@ -0,0 +1,70 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.crud import crud_audit_log
+from app.models.audit_log import AuditLog
+
+pytestmark = pytest.mark.anyio
+
+
+async def _add_logs(db):
+    now = datetime.now(timezone.utc)
+    db.add_all([
+        AuditLog(action="UPLOAD_FILE", details="a", payload={"category_id": 5, "deduplicated": True}, created_at=now),
+        AuditLog(action="UPLOAD_FILE", details="b", payload={"category_id": 5, "deduplicated": False}, created_at=now),
+        AuditLog(action="CATEGORY_UPDATE", details="c", payload={"category_id": 6, "name": "Léto"}, created_at=now),
+        AuditLog(action="LOGIN", details="d", payload={}, created_at=now),
+        AuditLog(action="LOGIN", details="e", payload=None, created_at=now),
+    ])
+    await db.commit()
+
+
+def test_parse_payload_filter():
+    assert crud_audit_log.parse_payload_filter(
+        ["category_id=5", "deduplicated=true", "name=Léto", "note=null", "empty="]
+    ) == {"category_id": 5, "deduplicated": True, "name": "Léto", "note": None, "empty": ""}
+    for item in ("category_id", "=5", "a.b=1", "$.x=1"):
+        with pytest.raises(ValueError):
+            crud_audit_log.parse_payload_filter([item])
+
+
+def test_postgres_uses_containment():
+    query = crud_audit_log._filter(select(AuditLog), "postgresql", payload={"category_id": 5, "deduplicated": True})
+    sql = str(query.compile(dialect=postgresql.dialect()))
+    # Jedna podmínka @> (jde přes GIN index), žádné json_extract
+    assert "audit_logs.payload @> " in sql and "json_extract" not in sql
+
+
+async def test_logs_filtered_by_payload(db, client, auth_headers):
+    await _add_logs(db)
+
+    def details(*payload):
+        response = client.get("/api/logs/", headers=auth_headers, params={"payload": list(payload)})
+        assert response.status_code == 200
+        return sorted(log["details"] for log in response.json())
+
+    assert details("category_id=5") == ["a", "b"]
+    assert details("category_id=5", "deduplicated=true") == ["a"]
+    assert details("deduplicated=false") == ["b"]
+    assert details("name=Léto") == ["c"]
+    # Číslo v payloadu neodpovídá textu
+    assert details('category_id="5"') == []
+    assert details("category_id=7") == []
+
+    assert client.get("/api/logs/", headers=auth_headers, params={"payload": "bez-rovnitka"}).status_code == 400
+
+
+async def test_export_uses_payload_filter(db, client, auth_headers):
+    await _add_logs(db)
+    response = client.get(
+        "/api/logs/export", headers=auth_headers, params={"format": "ndjson", "payload": "category_id=6"}
+    )
+    assert response.status_code == 200
+    lines = response.text.strip().splitlines()
+    assert len(lines) == 1 and '"c"' in lines[0]
+
+    bad = client.get("/api/logs/export", headers=auth_headers, params={"payload": "a.b=1"})
+    assert bad.status_code == 400
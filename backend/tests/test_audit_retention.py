@@ -0,0 +1,195 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import delete, func, select
+
+from app.core.config import settings
+from app.models.audit_log import AuditLog
+from app.services import audit_partitions, audit_retention
+
+pytestmark = pytest.mark.anyio
+
+OLD_MONTH = (
+    datetime(2025, 1, 1, tzinfo=timezone.utc),
+    datetime(2025, 2, 1, tzinfo=timezone.utc),
+)
+
+
+@pytest.fixture(autouse=True)
+def retention_settings(monkeypatch):
+    monkeypatch.setattr(settings, "AUDIT_DELETE_BATCH_SIZE", 100)
+    monkeypatch.setattr(settings, "AUDIT_RETENTION_PAUSE_SECONDS", 0)
+    monkeypatch.setattr(audit_retention, "_adapt_batch_size", lambda job, elapsed: None)
+    # Hodiny po krocích: rozpočet 4 = právě jedna dávka (kontrola, start, konec dávky)
+    clock = iter(range(10**9))
+    monkeypatch.setattr(audit_retention, "time", SimpleNamespace(monotonic=lambda: next(clock)))
+
+
+async def _add_logs(db, old: int, new: int):
+    db.add_all(
+        [AuditLog(action="OLD", created_at=OLD_MONTH[0] + timedelta(minutes=i)) for i in range(old)]
+        + [AuditLog(action="NEW", created_at=datetime.now(timezone.utc)) for _ in range(new)]
+    )
+    await db.commit()
+
+
+async def _count(db, action: str) -> int:
+    return await db.scalar(select(func.count()).select_from(AuditLog).where(AuditLog.action == action))
+
+
+@pytest.fixture
+def fake_partitions(monkeypatch):
+    """SQLite partitions nemá - prošlý měsíc OLD_MONTH jen předstíráme."""
+    calls = {"detach": [], "detached": [], "dropped": [], "estimated": 0}
+
+    async def is_partitioned(db):
+        return True
+
+    async def expired_partitions(db, cutoff):
+        name = "audit_logs_y2025m01"
+        return [] if name in calls["detached"] else [(name, *OLD_MONTH)]
+
+    async def estimated_rows(db, name):
+        calls["estimated"] += 1
+        return await db.scalar(select(func.count()).select_from(AuditLog).where(AuditLog.created_at < OLD_MONTH[1]))
+
+    async def detach_partition(db, name):
+        # Výsledky pokusů lze naplánovat (False = zámek nedostupný), jinak se odpojí
+        detached = calls["detach"].pop(0) if calls["detach"] else True
+        if detached:
+            calls["detached"].append(name)
+        return detached
+
+    async def drop_partition(db, name):
+        await db.execute(delete(AuditLog).where(AuditLog.created_at < OLD_MONTH[1]))
+        await db.commit()
+        calls["dropped"].append(name)
+
+    monkeypatch.setattr(audit_partitions, "is_partitioned", is_partitioned)
+    monkeypatch.setattr(audit_partitions, "expired_partitions", expired_partitions)
+    monkeypatch.setattr(audit_partitions, "estimated_rows", estimated_rows)
+    monkeypatch.setattr(audit_partitions, "detach_partition", detach_partition)
+    monkeypatch.setattr(audit_partitions, "drop_partition", drop_partition)
+    return calls
+
+
+async def test_partition_archive_respects_budget_and_resumes(db, fake_partitions, monkeypatch):
+    monkeypatch.setattr(settings, "AUDIT_ARCHIVE_ENABLED", True)
+    await _add_logs(db, old=250, new=10)
+    start = audit_retention.new_job(days=30, trigger="manual")
+
+    # Jedna dávka archivu, měsíc ještě stojí; rozpracovaný měsíc je uložený v jobu
+    job = await audit_retention.run_retention(db, time_budget=4, start=start)
+    assert job["archived"] == 100 and job["deleted"] == 0
+    assert not job["partitions_checked"] and fake_partitions["dropped"] == []
+    saved = await audit_retention.get_job(db)
+    assert saved["partition"]["name"] == "audit_logs_y2025m01"
+    assert saved["partition"]["cursor"] == job["partition"]["cursor"] > 0
+
+    # Další spuštění navazuje od kurzoru - nic se nearchivuje dvakrát
+    job = await audit_retention.run_retention(db, time_budget=1000)
+    assert job["done"]
+    assert fake_partitions["dropped"] == ["audit_logs_y2025m01"]
+    # Počet smazaných je z archivu, žádné počítání řádků partition
+    assert job["archived"] == 250 and job["deleted"] == 250 and fake_partitions["estimated"] == 0
+    assert "partition" not in job
+    assert await _count(db, "OLD") == 0 and await _count(db, "NEW") == 10
+
+
+async def test_partition_detach_retries_and_drop_resumes(db, fake_partitions, monkeypatch):
+    monkeypatch.setattr(settings, "AUDIT_ARCHIVE_ENABLED", False)
+    await _add_logs(db, old=250, new=10)
+    fake_partitions["detach"] = [False]
+
+    # Zámek nedostupný: měsíc zůstává, příští krok to zkusí znovu
+    job = await audit_retention.run_retention(db, time_budget=4, start=audit_retention.new_job(30, "auto"))
+    assert job["partition"]["detached"] is False and fake_partitions["dropped"] == []
+
+    # Pád mezi odpojením a DROP: odpojený měsíc už mezi partitions není, zahodí se podle jobu
+    real_drop = audit_partitions.drop_partition
+
+    async def failing_drop(db, name):
+        raise RuntimeError("spojení spadlo")
+
+    monkeypatch.setattr(audit_partitions, "drop_partition", failing_drop)
+    with pytest.raises(RuntimeError):
+        await audit_retention.run_retention(db, time_budget=4)
+    saved = await audit_retention.get_job(db)
+    assert saved["partition"]["detached"] is True and saved["partition"]["rows"] == 250
+
+    monkeypatch.setattr(audit_partitions, "drop_partition", real_drop)
+    job = await audit_retention.run_retention(db, time_budget=1000)
+    assert job["done"] and job["deleted"] == 250
+    assert fake_partitions["dropped"] == ["audit_logs_y2025m01"]
+    assert await _count(db, "OLD") == 0 and await _count(db, "NEW") == 10
+
+
+async def test_manual_cleanup_takes_over_detached_partition(db, client, auth_headers, fake_partitions, monkeypatch):
+    monkeypatch.setattr(settings, "AUDIT_ARCHIVE_ENABLED", False)
+    monkeypatch.setattr(settings, "AUDIT_RETENTION_REQUEST_SECONDS", 1000)
+    await _add_logs(db, old=250, new=10)
+    real_drop = audit_partitions.drop_partition
+
+    async def failing_drop(db, name):
+        raise RuntimeError("spojení spadlo")
+
+    # Automatický úklid měsíc odpojí a spadne před DROP
+    monkeypatch.setattr(audit_partitions, "drop_partition", failing_drop)
+    with pytest.raises(RuntimeError):
+        await audit_retention.run_retention(db, time_budget=4, start=audit_retention.new_job(30, "auto"))
+    monkeypatch.setattr(audit_partitions, "drop_partition", real_drop)
+
+    # Ruční úklid založí nový job, ale odpojený měsíc převezme a zahodí
+    response = client.delete("/api/logs/cleanup", headers=auth_headers, params={"days": 30})
+    assert response.status_code == 200
+    assert response.json()["done"] and response.json()["deleted"] == 250
+    assert fake_partitions["dropped"] == ["audit_logs_y2025m01"]
+    job = await audit_retention.get_job(db)
+    assert job["trigger"] == "manual" and "partition" not in job
+
+
+async def test_batches_resume_from_saved_cursor(db, monkeypatch):
+    monkeypatch.setattr(settings, "AUDIT_ARCHIVE_ENABLED", False)
+    await _add_logs(db, old=250, new=10)
+
+    job = await audit_retention.run_retention(db, time_budget=4, start=audit_retention.new_job(30, "auto"))
+    assert (job["deleted"], job["batches"], job["done"]) == (100, 1, False)
+
+    # Nové spuštění (jiný request / po restartu) čte stav z databáze
+    saved = await audit_retention.get_job(db)
+    assert saved["cursor"] == job["cursor"] and saved["deleted"] == 100
+    job = await audit_retention.run_retention(db, time_budget=4)
+    assert (job["deleted"], job["done"]) == (200, False)
+
+    job = await audit_retention.run_retention(db, time_budget=1000)
+    assert job["done"] and job["deleted"] == 250
+    assert await _count(db, "OLD") == 0 and await _count(db, "NEW") == 10
+
+    # Hotový job se znovu nespouští
+    assert (await audit_retention.run_retention(db, time_budget=1000))["deleted"] == 250
+
+
+async def test_running_job_is_not_replaced(db, monkeypatch):
+    monkeypatch.setattr(settings, "AUDIT_ARCHIVE_ENABLED", False)
+    await _add_logs(db, old=250, new=0)
+    await audit_retention.run_retention(db, time_budget=4, start=audit_retention.new_job(30, "auto"))
+    before = await audit_retention.get_job(db)
+
+    async with audit_retention.retention_lock(db) as acquired:
+        assert acquired
+        with pytest.raises(audit_retention.RetentionBusy):
+            await audit_retention.run_retention(db, time_budget=1000, start=audit_retention.new_job(7, "manual"))
+
+    assert await audit_retention.get_job(db) == before
+    assert await _count(db, "OLD") == 150
+
+
+async def test_cleanup_endpoint_reports_running_job(db, client, auth_headers):
+    async with audit_retention.retention_lock(db) as acquired:
+        assert acquired
+        response = client.delete("/api/logs/cleanup", headers=auth_headers, params={"days": 30})
+    assert response.status_code == 409
+
+    response = client.delete("/api/logs/cleanup", headers=auth_headers, params={"days": 30})
+    assert response.status_code == 200
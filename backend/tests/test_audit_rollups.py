@@ -0,0 +1,89 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.models.user import User
+from app.services import audit_rollups
+from app.services.audit_sink import AuditSink
+
+pytestmark = pytest.mark.anyio
+
+DAY = datetime(2026, 5, 1, tzinfo=timezone.utc)
+
+
+def _entry(action: str, hour: int, minute: int = 0, user_id=None, day: int = 1) -> dict:
+    return {
+        "action": action,
+        "details": None,
+        "payload": {},
+        "user_id": user_id,
+        "actor_email": None,
+        "created_at": datetime(2026, 5, day, hour, minute, tzinfo=timezone.utc),
+    }
+
+
+async def _write(*batches):
+    sink = AuditSink(batch_size=10, flush_interval=1, queue_size=10)
+    for batch in batches:
+        await sink._flush(batch)
+
+
+async def test_counts_are_added_with_every_batch(db, admin):
+    # Dvě dávky se stejnými buckety -> počty se sčítají, nepřepisují
+    await _write(
+        [_entry("LOGIN", 8, 5, admin.id), _entry("LOGIN", 8, 50, admin.id), _entry("LOGIN_FAILED", 9)],
+        [_entry("LOGIN", 8, 30), _entry("LOGIN", 10, day=2, user_id=admin.id)],
+    )
+    end = datetime(2026, 5, 3, tzinfo=timezone.utc)
+
+    hourly = await audit_rollups.aggregate(db, "hour", DAY, end, action="LOGIN")
+    assert [(p["bucket"].hour, p["bucket"].day, p["count"]) for p in hourly] == [(8, 1, 3), (10, 2, 1)]
+
+    daily = await audit_rollups.aggregate(db, "day", DAY, end)
+    assert [(p["bucket"].day, p["action"], p["count"]) for p in daily] == [
+        (1, "LOGIN", 3), (1, "LOGIN_FAILED", 1), (2, "LOGIN", 1),
+    ]
+
+    total = await audit_rollups.aggregate(db, "total", DAY, end, per_user=True)
+    assert [(p["action"], p["user_id"], p["actor_email"], p["count"]) for p in total] == [
+        ("LOGIN", None, None, 1),
+        ("LOGIN", admin.id, "admin@example.com", 3),
+        ("LOGIN_FAILED", None, None, 1),
+    ]
+
+    # user_id=0 = záznamy bez uživatele
+    system = await audit_rollups.aggregate(db, "total", DAY, end, user_id=audit_rollups.NO_USER)
+    assert [(p["action"], p["count"]) for p in system] == [("LOGIN", 1), ("LOGIN_FAILED", 1)]
+
+
+async def test_range_is_aligned_to_bucket_start(db):
+    await _write([_entry("UPLOAD_FILE", 8, 10), _entry("UPLOAD_FILE", 23, 59)])
+
+    # Začátek uprostřed hodiny / dne bucket nevynechá
+    hourly = await audit_rollups.aggregate(db, "hour", DAY.replace(hour=8, minute=30), DAY.replace(hour=12))
+    assert [p["count"] for p in hourly] == [1]
+    total = await audit_rollups.aggregate(db, "total", DAY.replace(hour=12), DAY.replace(hour=23, minute=59))
+    assert [p["count"] for p in total] == [2]
+
+
+async def test_aggregate_endpoint(db, client, auth_headers):
+    user = User(email="user@example.com", hashed_password="x", is_active=True)
+    db.add(user)
+    await db.commit()
+    await _write([_entry("UPLOAD_FILE", 8, user_id=user.id), _entry("UPLOAD_FILE", 9, user_id=user.id)])
+
+    params = {"date_from": "2026-05-01", "date_to": "2026-05-07", "action": "UPLOAD_FILE"}
+    response = client.get("/api/logs/aggregate", headers=auth_headers, params={**params, "step": "total", "by_user": True})
+    assert response.status_code == 200
+    assert [(p["actor_email"], p["count"]) for p in response.json()["points"]] == [("user@example.com", 2)]
+
+    daily = client.get("/api/logs/aggregate", headers=auth_headers, params={**params, "step": "day"}).json()
+    assert [p["count"] for p in daily["points"]] == [2]
+
+    # Neznámý krok, otočený rozsah, příliš mnoho bodů
+    for query in (
+        {"step": "minute"},
+        {"step": "day", "date_from": "2026-05-08", "date_to": "2026-05-01"},
+        {"step": "hour", "date_from": "2020-01-01", "date_to": "2026-05-01"},
+    ):
+        assert client.get("/api/logs/aggregate", headers=auth_headers, params=query).status_code == 400
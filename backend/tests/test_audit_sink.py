@@ -0,0 +1,40 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.models.audit_log import AuditLog
+from app.services.audit_sink import AuditSink
+
+pytestmark = pytest.mark.anyio
+
+
+def _entry(action: str, created_at=None) -> dict:
+    return {
+        "action": action,
+        "details": None,
+        "payload": {},
+        "user_id": None,
+        "actor_email": None,
+        "created_at": created_at or datetime.now(timezone.utc),
+    }
+
+
+async def test_bad_entry_does_not_drop_batch(db, monkeypatch, capsys):
+    monkeypatch.setattr(settings, "OUTBOX_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(settings, "OUTBOX_RETRY_DELAY", 0)
+    sink = AuditSink(batch_size=10, flush_interval=1, queue_size=10)
+
+    # created_at, který nejde uložit -> celá dávka jedním INSERTem selže
+    await sink._flush([_entry("A"), _entry("BAD", created_at="not a date"), _entry("B")])
+
+    actions = (await db.execute(select(AuditLog.action).order_by(AuditLog.id))).scalars().all()
+    assert actions == ["A", "B"]
+    assert "záznam zahozen" in capsys.readouterr().out
+
+
+async def test_batch_written_at_once(db):
+    sink = AuditSink(batch_size=10, flush_interval=1, queue_size=10)
+    await sink._flush([_entry("A"), _entry("B")])
+    assert await db.scalar(select(func.count()).select_from(AuditLog)) == 2
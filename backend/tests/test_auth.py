@@ -0,0 +1,18 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.main import app
+from app.models.audit_log import AuditLog
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_login_with_overlong_username_is_audited_truncated(db):
+    with TestClient(app) as client:
+        response = client.post("/api/auth/login", data={"username": "x" * 1000 + "@a.cz", "password": "x"})
+        assert response.status_code == 401
+
+    # Writer zapíše zbytek fronty při vypnutí aplikace
+    log = (await db.execute(select(AuditLog).where(AuditLog.action == "LOGIN_FAILED"))).scalar_one()
+    assert len(log.actor_email) == 255
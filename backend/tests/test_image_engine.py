@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+from app.core.config import settings
+from app.services.image_engine import ImageEngine, ImageEngineBusy, image_engine
+from tests.conftest import make_jpeg
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_engine_runs_in_worker_process_and_frees_slot():
+    engine = ImageEngine(workers=1, queue_size=0)
+    try:
+        assert await engine.run(pow, 2, 10) == 1024
+        with pytest.raises(ZeroDivisionError):
+            await engine.run(divmod, 1, 0)
+        # Výjimka z workeru místo v poolu uvolní
+        assert engine._pending == 0 and not engine.is_saturated
+    finally:
+        engine.shutdown()
+
+
+async def test_saturated_engine_refuses_work():
+    engine = ImageEngine(workers=1, queue_size=1)
+    engine._pending = engine.capacity
+    with pytest.raises(ImageEngineBusy):
+        await engine.run(pow, 2, 10)
+    assert engine._executor is None  # Odmítnuto dřív, než se pool vůbec spustil
+
+
+async def test_busy_engine_returns_503_with_retry_after(client, auth_headers, monkeypatch):
+    # Pool se zaplnil až během zpracování (kontrola na vstupu ještě prošla)
+    async def run(*args):
+        raise ImageEngineBusy()
+    monkeypatch.setattr(image_engine, "run", run)
+
+    response = client.post(
+        "/api/upload/", headers=auth_headers, files={"file": ("foto.jpg", make_jpeg(), "image/jpeg")}
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(settings.IMAGE_RETRY_AFTER)
+    # Dočasný soubor po odmítnutí nezůstal
+    assert not any(name.endswith(".upload") for name in os.listdir(settings.UPLOAD_TMP_DIR))
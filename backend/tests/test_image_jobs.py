@@ -0,0 +1,102 @@
+import pytest
+
+from app.crud import crud_image_job, crud_media
+from app.db.session import SessionLocal
+from app.models.image_job import ImageJob
+from app.models.media_file import MediaFile
+from app.services import image_jobs
+from app.services.image_processing import ImageRejected
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def job(db, tmp_path):
+    source = tmp_path / "staged.jpg"
+    source.write_bytes(b"raw")
+    return await crud_image_job.create_job(db, "job1", None, "a.jpg", str(source), "hash")
+
+
+async def _reload(job_id: str) -> ImageJob:
+    async with SessionLocal() as fresh:
+        return await crud_image_job.get_job(fresh, job_id)
+
+
+def _fail_in_db(monkeypatch):
+    """Zpracování, které shodí transakci session (jako chyba při registraci souboru)."""
+    async def process(db, *args, **kwargs):
+        db.add(ImageJob(id="job1", status="queued", source_path="x", source_hash="x", attempts=0))
+        await db.flush()  # IntegrityError - duplicitní primární klíč
+    monkeypatch.setattr(image_jobs, "process_staged_image", process)
+
+
+async def test_db_error_schedules_retry(job, monkeypatch):
+    _fail_in_db(monkeypatch)
+    runner = image_jobs.ImageJobRunner(1, max_attempts=3, lease_seconds=60, poll_seconds=1)
+
+    await runner._run_job("job1")
+
+    stored = await _reload("job1")
+    assert stored.status == "queued"
+    assert stored.attempts == 1
+    assert stored.locked_until is None
+    assert stored.next_attempt_at is not None
+    assert "UNIQUE" in stored.error
+
+
+async def test_last_attempt_marks_failed_and_removes_source(job, monkeypatch):
+    _fail_in_db(monkeypatch)
+    runner = image_jobs.ImageJobRunner(1, max_attempts=1, lease_seconds=60, poll_seconds=1)
+
+    await runner._run_job("job1")
+
+    stored = await _reload("job1")
+    assert stored.status == "failed"
+    assert stored.attempts == 1
+    with pytest.raises(FileNotFoundError):
+        open(job.source_path)
+
+
+async def test_rejected_image_fails_without_retry(job, monkeypatch):
+    async def process(*args, **kwargs):
+        raise ImageRejected("Příliš velký.")
+    monkeypatch.setattr(image_jobs, "process_staged_image", process)
+    runner = image_jobs.ImageJobRunner(1, max_attempts=3, lease_seconds=60, poll_seconds=1)
+
+    await runner._run_job("job1")
+
+    stored = await _reload("job1")
+    assert (stored.status, stored.error) == ("failed", "Příliš velký.")
+
+
+async def test_concurrent_dedupe_still_logs_upload(db, admin, tmp_path, monkeypatch):
+    source = tmp_path / "staged.jpg"
+    source.write_bytes(b"raw")
+    await crud_image_job.create_job(db, "job2", admin.id, "a.jpg", str(source), "hash2")
+    data = {
+        "url": "/uploads/ab/cd/abcd.webp", "filename": "abcd.webp", "width": 10, "height": 10,
+        "variants": [], "original_size": 100, "final_size": 50,
+    }
+    # Stejný soubor mezitím uložil souběžný request
+    db.add(MediaFile(source_hash="other", **data))
+    await db.commit()
+
+    async def process(db, source_path, source_hash, user_id=None):
+        # register_media_file narazí na IntegrityError a udělá rollback (expiruje načtený job)
+        media, created = await crud_media.register_media_file(db, data, source_hash, user_id)
+        assert not created
+        return {**data, "url": media.url, "deduplicated": True}
+
+    logged = []
+
+    async def log_upload(user_id, user_email, result):
+        logged.append((user_id, user_email, result["filename"]))
+
+    monkeypatch.setattr(image_jobs, "process_staged_image", process)
+    monkeypatch.setattr(image_jobs, "log_upload", log_upload)
+    runner = image_jobs.ImageJobRunner(1, max_attempts=3, lease_seconds=60, poll_seconds=1)
+
+    await runner._run_job("job2")
+
+    assert (await _reload("job2")).status == "done"
+    assert logged == [(admin.id, admin.email, "abcd.webp")]
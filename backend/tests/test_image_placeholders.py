@@ -0,0 +1,45 @@
+import base64
+import io
+
+import pytest
+from PIL import Image
+
+from tests.conftest import make_jpeg
+
+pytestmark = pytest.mark.anyio
+
+
+def _upload(client, headers, data: bytes) -> dict:
+    response = client.post("/api/upload/", headers=headers, files={"file": ("foto.jpg", data, "image/jpeg")})
+    assert response.status_code == 200
+    return response.json()
+
+
+def _decode(placeholder: str) -> Image.Image:
+    prefix = "data:image/webp;base64,"
+    assert placeholder.startswith(prefix)
+    return Image.open(io.BytesIO(base64.b64decode(placeholder.removeprefix(prefix))))
+
+
+async def test_upload_returns_dimensions_and_tiny_placeholder(client, auth_headers):
+    body = _upload(client, auth_headers, make_jpeg(1200, 600))
+    assert (body["width"], body["height"]) == (1200, 600)
+    with _decode(body["placeholder"]) as tiny:
+        assert (tiny.format, tiny.size) == ("WEBP", (16, 8))
+    assert len(body["placeholder"]) < 1000  # Vejde se rovnou do JSONu
+
+
+async def test_records_copy_image_metadata(client, auth_headers):
+    first = _upload(client, auth_headers, make_jpeg(1200, 600, color=(1, 1, 1)))
+    second = _upload(client, auth_headers, make_jpeg(400, 800, color=(2, 2, 2)))
+
+    response = client.post("/api/categories/", headers=auth_headers, json={"name": "Foto", "image_path": first["url"]})
+    category = response.json()
+    assert (category["image_width"], category["image_height"]) == (1200, 600)
+    assert category["image_placeholder"] == first["placeholder"]
+
+    # Změna fotky přepíše i rozměry a placeholder
+    response = client.patch(f"/api/categories/{category['id']}", headers=auth_headers, json={"image_path": second["url"]})
+    category = response.json()
+    assert (category["image_width"], category["image_height"]) == (400, 800)
+    assert category["image_placeholder"] == second["placeholder"]
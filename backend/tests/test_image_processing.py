@@ -0,0 +1,72 @@
+import os
+
+import pytest
+from PIL import Image
+
+from app.core.config import settings
+from app.services.image_processing import ImageRejected, open_within_budget, process_image_file
+from tests.conftest import make_jpeg
+
+WIDTHS = [320, 640, 1600]
+MAX_PIXELS = 100_000_000
+MAX_DECODE_BYTES = 1024 * 1024 * 1024
+
+
+# Režimy, které Image.reduce neumí (paleta, 1bit, 16bit) - široký obrázek jde přes předzmenšení
+@pytest.mark.parametrize("mode", ["P", "1", "I;16"])
+def test_wide_image_in_mode_without_reduce(tmp_path, mode):
+    source = tmp_path / "wide.png"
+    Image.new(mode, (7000, 1000)).save(source)
+
+    result = process_image_file(str(source), str(tmp_path / "out"), WIDTHS, 80, MAX_PIXELS, MAX_DECODE_BYTES)
+
+    assert result["width"] == 1600
+    assert sorted(v["width"] for v in result["variants"]) == [320, 640, 1600]
+
+
+def test_wide_image_is_reduced_before_resize(tmp_path):
+    source = tmp_path / "wide.png"
+    Image.new("RGB", (8000, 1000)).save(source)
+
+    with open_within_budget(str(source), 1000, MAX_PIXELS, MAX_DECODE_BYTES) as image:
+        assert image.width == 2000  # 8000 // (1000 * 2) = 4x
+
+
+def test_too_many_pixels_rejected(tmp_path):
+    source = tmp_path / "big.png"
+    Image.new("L", (2000, 2000)).save(source)
+
+    with pytest.raises(ImageRejected):
+        open_within_budget(str(source), 1000, 1_000_000, MAX_DECODE_BYTES)
+
+
+def test_variant_ladder_skips_widths_above_original(tmp_path):
+    source = tmp_path / "photo.jpg"
+    Image.new("RGB", (1000, 500), (10, 200, 90)).save(source)
+    out = tmp_path / "out"
+
+    result = process_image_file(str(source), str(out), WIDTHS, 80, MAX_PIXELS, MAX_DECODE_BYTES)
+
+    # 1600 je víc než originál -> hlavní soubor má šířku originálu, menší varianty zůstávají
+    assert (result["width"], result["height"]) == (1000, 500)
+    assert [(v["width"], v["height"]) for v in result["variants"]] == [(320, 160), (640, 320), (1000, 500)]
+    stem = result["filename"].rsplit("/", 1)[-1].removesuffix(".webp")
+    assert result["variants"][0]["filename"].endswith(f"{stem}-320w.webp")
+    assert result["variants"][-1]["filename"] == result["filename"]
+    for variant in result["variants"]:
+        with Image.open(out / variant["filename"]) as image:
+            assert (image.format, image.width) == ("WEBP", variant["width"])
+            assert os.path.getsize(out / variant["filename"]) == variant["size"]
+
+
+@pytest.mark.anyio
+async def test_upload_response_lists_variants_and_srcset(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(settings, "IMAGE_VARIANT_WIDTHS", [320, 1600])
+    response = client.post(
+        "/api/upload/", headers=auth_headers, files={"file": ("foto.jpg", make_jpeg(1200, 600), "image/jpeg")}
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert [v["width"] for v in body["variants"]] == [320, 1200]
+    assert body["variants"][-1]["url"] == body["url"]
+    assert body["srcset"] == f"{body['variants'][0]['url']} 320w, {body['url']} 1200w"
@@ -0,0 +1,82 @@
+import os
+import time
+
+import pytest
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models.media_file import MediaFile
+from app.services import image_service
+from app.services.image_engine import image_engine
+from app.services.image_service import resolve_upload_path
+from tests.conftest import make_jpeg
+
+pytestmark = pytest.mark.anyio
+
+
+def _upload(client, headers, data: bytes):
+    return client.post("/api/upload/", headers=headers, files={"file": ("foto.jpg", data, "image/jpeg")})
+
+
+def _category(client, headers, name: str, **fields) -> int:
+    response = client.post("/api/categories/", headers=headers, json={"name": name, **fields})
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+async def _ref_count(db, url: str):
+    return await db.scalar(select(MediaFile.ref_count).where(MediaFile.url == url))
+
+
+async def test_upload_alone_adds_no_reference_and_dedup_reuses_file(client, auth_headers, db):
+    data = make_jpeg(color=(10, 120, 200))
+    first = _upload(client, auth_headers, data)
+    second = _upload(client, auth_headers, data)
+    assert first.status_code == second.status_code == 200
+    assert first.json()["url"] == second.json()["url"]
+
+    # Nahraný, ale nikde neuložený soubor nemá referenci (uklidí ho upload_gc)
+    assert await _ref_count(db, first.json()["url"]) == 0
+    assert len((await db.execute(select(MediaFile))).scalars().all()) == 1
+
+
+async def test_references_follow_saved_records(client, auth_headers, db, monkeypatch):
+    url = _upload(client, auth_headers, make_jpeg(color=(200, 30, 30))).json()["url"]
+    other = _upload(client, auth_headers, make_jpeg(color=(30, 200, 30))).json()["url"]
+
+    first = _category(client, auth_headers, "První", image_path=url)
+    second = _category(client, auth_headers, "Druhá", image_path=url)
+    assert await _ref_count(db, url) == 2
+
+    # Stejná URL znovu = beze změny, jiná URL = přesun reference
+    client.patch(f"/api/categories/{first}", headers=auth_headers, json={"image_path": url})
+    assert await _ref_count(db, url) == 2
+    client.patch(f"/api/categories/{first}", headers=auth_headers, json={"image_path": other})
+    assert await _ref_count(db, url) == 1
+    assert await _ref_count(db, other) == 1
+
+    # Poslední reference na čerstvý upload: soubor zůstává pro upload_gc
+    client.delete(f"/api/categories/{first}", headers=auth_headers)
+    assert await _ref_count(db, other) == 0
+    assert resolve_upload_path(other.removeprefix("/uploads/"))
+
+    # Po ochranné lhůtě se poslední reference maže i se soubory
+    monkeypatch.setattr(settings, "UPLOAD_GC_GRACE_HOURS", 0)
+    client.delete(f"/api/categories/{second}", headers=auth_headers)
+    assert await _ref_count(db, url) is None
+    path = os.path.join("uploads", url.removeprefix("/uploads/"))
+    deadline = time.monotonic() + 5
+    while os.path.exists(path) and time.monotonic() < deadline:
+        time.sleep(0.05)  # Soubory maže outbox na pozadí
+    assert not os.path.exists(path)
+
+
+async def test_saturated_engine_rejects_before_staging(client, auth_headers, monkeypatch):
+    staged = []
+    monkeypatch.setattr(image_service, "_stage_upload", lambda source: staged.append(source))
+    monkeypatch.setattr(image_engine, "_pending", image_engine.capacity)
+
+    response = _upload(client, auth_headers, make_jpeg())
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(settings.IMAGE_RETRY_AFTER)
+    assert staged == []
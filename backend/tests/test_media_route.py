@@ -0,0 +1,111 @@
+import io
+import os
+import time
+import uuid
+
+import pytest
+from PIL import Image
+
+from app.core.config import settings
+from app.services.image_service import UPLOAD_DIR
+from tests.conftest import make_jpeg
+
+pytestmark = pytest.mark.anyio
+
+
+def _upload(client, headers) -> str:
+    response = client.post(
+        "/api/upload/", headers=headers, files={"file": ("foto.jpg", make_jpeg(color=(40, 90, 160)), "image/jpeg")}
+    )
+    return response.json()["url"]
+
+
+@pytest.fixture
+def legacy_jpeg():
+    """Soubor se starým (ne obsahovým) názvem - nahraný před WebP a hashováním."""
+    name = f"legacy-{uuid.uuid4().hex}.jpg"
+    path = os.path.join(UPLOAD_DIR, name)
+    with open(path, "wb") as out:
+        out.write(make_jpeg(800, 600))
+    yield name
+    os.remove(path)
+
+
+async def test_content_addressed_file_is_immutable_and_conditional(client, auth_headers):
+    url = _upload(client, auth_headers)
+    name = url.rsplit("/", 1)[-1]
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/webp"
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert response.headers["etag"] == f'"{name}"'
+    assert "Accept" in response.headers["vary"]
+
+    for if_none_match in (f'"{name}"', f'W/"{name}"', f'"jiny", "{name}"', "*"):
+        revalidated = client.get(url, headers={"If-None-Match": if_none_match})
+        assert revalidated.status_code == 304 and revalidated.content == b""
+        assert revalidated.headers["etag"] == f'"{name}"'
+    assert client.get(url, headers={"If-None-Match": '"jiny"'}).status_code == 200
+
+    # Stará plochá URL vede na stejný soubor
+    assert client.get(f"/uploads/{name}").content == response.content
+
+
+async def test_legacy_file_uses_validators_and_short_max_age(client, legacy_jpeg):
+    url = f"/uploads/{legacy_jpeg}"
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == f"public, max-age={settings.MEDIA_CACHE_MAX_AGE}"
+
+    last_modified = response.headers["last-modified"]
+    assert client.get(url, headers={"If-Modified-Since": last_modified}).status_code == 304
+    assert client.get(url, headers={"If-Modified-Since": "Thu, 01 Jan 1998 00:00:00 GMT"}).status_code == 200
+    # If-None-Match má přednost před If-Modified-Since
+    stale = client.get(url, headers={"If-None-Match": '"jiny"', "If-Modified-Since": last_modified})
+    assert stale.status_code == 200
+
+
+async def test_accept_negotiation_serves_warmed_webp(client, legacy_jpeg):
+    url = f"/uploads/{legacy_jpeg}"
+    webp = {"Accept": "image/webp,image/*;q=0.8"}
+
+    # Bez podpory WebP vždy originál
+    assert client.get(url, headers={"Accept": "image/webp;q=0, image/*"}).headers["content-type"] == "image/jpeg"
+
+    # První request pošle originál a WebP variantu nechá vyrenderovat na pozadí
+    assert client.get(url, headers=webp).headers["content-type"] == "image/jpeg"
+    deadline = time.monotonic() + 10
+    while (response := client.get(url, headers=webp)).headers["content-type"] != "image/webp":
+        assert time.monotonic() < deadline, "varianta se nevyrenderovala"
+        time.sleep(0.05)
+    assert "Accept" in response.headers["vary"]
+    with Image.open(io.BytesIO(response.content)) as image:
+        assert (image.format, image.size) == ("WEBP", (800, 600))
+
+
+async def test_resize_parameters_and_bad_paths(client, auth_headers):
+    url = _upload(client, auth_headers)
+
+    response = client.get(url, params={"w": 500, "fmt": "png"})
+    assert response.status_code == 200 and response.headers["content-type"] == "image/png"
+    with Image.open(io.BytesIO(response.content)) as image:
+        assert image.width == 512  # Zaokrouhleno nahoru na VARIANT_WIDTH_STEP
+
+    assert client.get(url, params={"fmt": "bmp"}).status_code == 400
+    assert client.get("/uploads/neexistuje.webp").status_code == 404
+    assert client.get("/uploads/%2e%2e/test.db").status_code == 404
+    assert client.get("/uploads/.gitkeep").status_code == 404
+
+
+async def test_accel_redirect_leaves_body_to_nginx(client, auth_headers, monkeypatch):
+    url = _upload(client, auth_headers)
+    monkeypatch.setattr(settings, "MEDIA_ACCEL_REDIRECT", True)
+
+    response = client.get(url)
+    assert response.status_code == 200 and response.content == b""
+    assert response.headers["x-accel-redirect"] == "/_protected/uploads/" + url.removeprefix("/uploads/")
+    assert response.headers["etag"]
+
+    response = client.get(url, params={"w": 320})
+    assert response.headers["x-accel-redirect"].startswith("/_protected/variants/")
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services import metrics
+
+pytestmark = pytest.mark.anyio
+
+MOMENT = datetime(2026, 10, 18, 12, 30, 15, tzinfo=timezone.utc)
+
+
+def _snapshot(users: int) -> dict:
+    return {
+        "counts": {"users": users, "content_items": 5, "messages": 0},
+        "storage": {"uploads_folder_size": 1024, "uploads_file_count": 2},
+    }
+
+
+async def test_samples_accumulate_in_every_resolution(db):
+    await metrics.record_sample(db, _snapshot(10), MOMENT)
+    await metrics.record_sample(db, _snapshot(4), MOMENT + timedelta(seconds=20))
+    await metrics.record_sample(db, _snapshot(7), MOMENT + timedelta(minutes=5))
+
+    start, end = MOMENT - timedelta(hours=1), MOMENT + timedelta(hours=1)
+    minutes = await metrics.get_history(db, "users", start, end, "minute")
+    assert [(p["min"], p["max"], p["avg"], p["last"], p["samples"]) for p in minutes] == [
+        (4, 10, 7, 4, 2),
+        (7, 7, 7, 7, 1),
+    ]
+    (hour,) = await metrics.get_history(db, "users", start, end, "hour")
+    assert (hour["min"], hour["max"], hour["avg"], hour["last"], hour["samples"]) == (4, 10, 7, 7, 3)
+
+
+async def test_history_endpoint_reads_buckets(db, client, auth_headers):
+    await metrics.record_sample(db, _snapshot(3), MOMENT)
+    response = client.get("/api/stats/history", headers=auth_headers, params={
+        "metric": "users", "from": (MOMENT - timedelta(hours=1)).isoformat(), "to": MOMENT.isoformat(), "step": "hour",
+    })
+    assert response.status_code == 200
+    assert [point["last"] for point in response.json()["points"]] == [3]
+
+    response = client.get("/api/stats/history", headers=auth_headers, params={"metric": "nope"})
+    assert response.status_code == 400
+
+
+async def test_prune_keeps_coarser_resolutions_longer(db):
+    now = datetime.now(timezone.utc)
+    await metrics.record_sample(db, _snapshot(1), now - timedelta(days=3))
+    await metrics.record_sample(db, _snapshot(2), now)
+
+    # 3 dny staré: minutové buckety pryč (retence 48 h), hodinové a denní zůstávají
+    assert await metrics.prune_metrics(db) == len(metrics.METRICS)
+    old = now - timedelta(days=3, hours=1)
+    assert await metrics.get_history(db, "users", old, now - timedelta(days=2), "minute") == []
+    assert len(await metrics.get_history(db, "users", old, now - timedelta(days=2), "hour")) == 1
+
+
+def test_pick_resolution_respects_retention_and_point_limit():
+    now = datetime.now(timezone.utc)
+    assert metrics.pick_resolution(now - timedelta(hours=6), now) == "minute"
+    # 3 dny = 4320 minut > METRICS_MAX_POINTS
+    assert metrics.pick_resolution(now - timedelta(days=3), now) == "hour"
+    # Mimo retenci hodinových bucketů
+    assert metrics.pick_resolution(now - timedelta(days=200), now) == "day"
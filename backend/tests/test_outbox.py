@@ -0,0 +1,87 @@
+import os
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.models.category import Category
+from app.services import outbox
+from app.services.image_service import UPLOAD_DIR
+from app.services.outbox import Outbox
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def audit(monkeypatch):
+    entries = []
+
+    async def enqueue(action, **entry):
+        entries.append(action)
+
+    monkeypatch.setattr(outbox.audit_sink, "enqueue", enqueue)
+    return entries
+
+
+@pytest.fixture
+def stored_file():
+    name = f"outbox-{os.urandom(4).hex()}.jpg"
+    path = os.path.join(UPLOAD_DIR, name)
+    with open(path, "wb") as out:
+        out.write(b"data")
+    yield name, path
+    if os.path.exists(path):
+        os.remove(path)
+
+
+async def test_effects_run_only_after_commit(db, audit, stored_file):
+    name, path = stored_file
+    box = Outbox()
+    db.add(Category(name="A", slug="a"))
+    box.files.append(name)
+    box.log("CATEGORY_CREATE", payload={"name": "A"})
+
+    # Před commitem se nic nestalo
+    assert os.path.exists(path) and audit == []
+
+    await box.commit(db)
+    await outbox.wait_for_pending()
+    assert audit == ["CATEGORY_CREATE"]
+    assert not os.path.exists(path)
+
+
+async def test_failed_commit_drops_effects(db, audit, stored_file):
+    name, path = stored_file
+    db.add(Category(name="A", slug="a"))
+    await db.commit()
+
+    box = Outbox()
+    db.add(Category(name="B", slug="a"))  # Duplicitní slug -> commit selže
+    box.files.append(name)
+    box.log("CATEGORY_CREATE")
+    with pytest.raises(IntegrityError):
+        await box.commit(db)
+    await db.rollback()
+
+    await outbox.wait_for_pending()
+    assert os.path.exists(path) and audit == []
+
+
+async def test_file_removal_is_retried(monkeypatch, audit):
+    monkeypatch.setattr(settings, "OUTBOX_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(settings, "OUTBOX_RETRY_DELAY", 0)
+    attempts = []
+
+    async def remove_upload_files(filenames):
+        attempts.append(list(filenames))
+        # První pokus smaže jen jeden soubor, druhý zbytek
+        return filenames[1:] if len(attempts) == 1 else []
+
+    monkeypatch.setattr(outbox, "remove_upload_files", remove_upload_files)
+    box = Outbox()
+    box.files.extend(["a.webp", "b.webp", "c.webp"])
+    await box.dispatch()
+    await outbox.wait_for_pending()
+
+    assert attempts == [["a.webp", "b.webp", "c.webp"], ["b.webp", "c.webp"]]
+    assert box.files == []
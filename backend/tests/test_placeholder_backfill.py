@@ -0,0 +1,60 @@
+import os
+import uuid
+
+import pytest
+
+from app.crud import crud_system_state
+from app.models.category import Category
+from app.models.content_item import ContentItem
+from app.services import placeholder_backfill
+from app.services.image_engine import image_engine
+from app.services.image_service import UPLOAD_DIR
+from tests.conftest import make_jpeg
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def legacy_file():
+    """Obrázek nahraný před LQIP (stará plochá URL, žádný záznam v media_files)."""
+    name = f"legacy-{uuid.uuid4().hex}.jpg"
+    path = os.path.join(UPLOAD_DIR, name)
+    with open(path, "wb") as out:
+        out.write(make_jpeg(width=300, height=200))
+    yield f"/uploads/{name}"
+    os.remove(path)
+    image_engine.shutdown()
+
+
+async def test_backfill_fills_placeholders_and_finishes(db, legacy_file):
+    item = ContentItem(title="Starý", slug="stary", image_url=legacy_file)
+    category = Category(name="Stará", slug="stara", image_path=legacy_file)
+    missing = ContentItem(title="Bez souboru", slug="bez-souboru", image_url="/uploads/zmizel.webp")
+    db.add_all([item, category, missing])
+    await db.commit()
+
+    report = await placeholder_backfill.run_placeholder_backfill(db, time_budget=60)
+    assert report["finished_at"]
+    assert (report["generated"], report["missing"], report["failed"], report["rows_updated"]) == (1, 1, 0, 2)
+
+    for record in (item, category):
+        await db.refresh(record)
+        assert (record.image_width, record.image_height) == (300, 200)
+        assert record.image_placeholder.startswith("data:image/webp;base64,")
+    await db.refresh(missing)
+    assert missing.image_placeholder is None
+
+    # Hotový dopočet se už nespouští
+    assert (await crud_system_state.get_state(db, placeholder_backfill.STATE_KEY))["done"]
+    assert await placeholder_backfill.run_placeholder_backfill(db, time_budget=60) is None
+
+
+async def test_backfill_waits_for_free_engine(db, legacy_file, monkeypatch):
+    db.add(ContentItem(title="Starý", slug="stary", image_url=legacy_file))
+    await db.commit()
+    # Všechny procesy enginu zpracovávají uploady -> dopočet nic nedělá a pokračuje příště
+    monkeypatch.setattr(image_engine, "_pending", image_engine.workers)
+
+    report = await placeholder_backfill.run_placeholder_backfill(db, time_budget=60)
+    assert report["generated"] == 0 and "finished_at" not in report
+    assert (await crud_system_state.get_state(db, placeholder_backfill.STATE_KEY))["cursor"] == ""
@@ -0,0 +1,101 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.content_item import ContentItem
+from app.models.message import Message
+from app.services import stats_snapshot as stats_snapshot_module
+from app.services.stats_snapshot import StatsSnapshot
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(stats_snapshot_module, "time", SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+
+@pytest.fixture
+def computes(monkeypatch):
+    """Přepočet bez DB: vrací pořadové číslo, dokud je brána otevřená."""
+    calls = []
+    gate = asyncio.Event()
+    gate.set()
+
+    async def compute():
+        calls.append(len(calls) + 1)
+        await gate.wait()
+        return {"run": calls[-1]}
+
+    monkeypatch.setattr(stats_snapshot_module, "_compute", compute)
+    return SimpleNamespace(calls=calls, gate=gate)
+
+
+async def test_fresh_snapshot_is_reused(clock, computes):
+    snapshot = StatsSnapshot(ttl=30, max_stale=600)
+    data, _, age = await snapshot.get()
+    assert data == {"run": 1} and age == 0
+
+    clock.value += 20
+    data, _, age = await snapshot.get()
+    assert data == {"run": 1} and age == 20
+    assert computes.calls == [1]
+
+
+async def test_stale_snapshot_is_served_while_refreshing(clock, computes):
+    snapshot = StatsSnapshot(ttl=30, max_stale=600)
+    await snapshot.get()
+    clock.value += 60
+    computes.gate.clear()
+
+    # Starší snapshot se vrátí hned, přepočet běží na pozadí (jen jeden)
+    data, _, age = await snapshot.get()
+    assert data == {"run": 1} and age == 60
+    await snapshot.get()
+    await asyncio.sleep(0)
+    assert computes.calls == [1, 2]
+
+    computes.gate.set()
+    await snapshot._refresh
+    data, _, age = await snapshot.get()
+    assert data == {"run": 2} and age == 0
+
+
+async def test_too_old_snapshot_waits_for_one_shared_refresh(clock, computes):
+    snapshot = StatsSnapshot(ttl=30, max_stale=600)
+    await snapshot.get()
+    clock.value += 601
+    computes.gate.clear()
+
+    waiting = [asyncio.create_task(snapshot.get()) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    assert not any(task.done() for task in waiting)
+    computes.gate.set()
+
+    assert [(await task)[0] for task in waiting] == [{"run": 2}] * 3
+    assert computes.calls == [1, 2]
+
+
+async def test_compute_counts_in_one_query(db, admin):
+    db.add_all([
+        ContentItem(title="A", slug="a", is_published=True),
+        ContentItem(title="B", slug="b", is_published=False),
+        Message(email="x@example.com", body="Ahoj", is_read=False),
+        Message(email="y@example.com", body="Čau", is_read=True),
+    ])
+    await db.commit()
+
+    data = await stats_snapshot_module._compute()
+    assert data["counts"] == {"users": 1, "content_items": 1, "messages": 1}
+    # Počítadla místa ještě nejsou přepočítaná -> nuly
+    assert data["storage"]["uploads_folder_size"] == 0 and data["storage"]["reconciled_at"] is None
+
+
+async def test_stats_endpoint_reports_snapshot_age(client, auth_headers):
+    response = client.get("/api/stats/", headers=auth_headers)
+    assert response.status_code == 200
+    assert int(response.headers["Age"]) == int(response.json()["snapshot_age_seconds"])
+    assert set(response.json()["counts"]) == {"users", "content_items", "messages"}
@@ -0,0 +1,51 @@
+import pytest
+
+from app.crud import crud_media, crud_storage_usage
+from app.services.storage_usage import UPLOADS_KEY, APP_KEY, reconcile_storage_usage, record_uploads_change
+from tests.conftest import make_jpeg
+
+pytestmark = pytest.mark.anyio
+
+
+async def _uploads(db) -> tuple[int, int]:
+    db.expire_all()
+    row = (await crud_storage_usage.get_usage(db))[UPLOADS_KEY]
+    return row.bytes, row.files
+
+
+async def test_counters_follow_changes_and_reconcile_fixes_drift(db, tmp_path):
+    uploads = tmp_path / "uploads"
+    (uploads / "ab" / "cd").mkdir(parents=True)
+    (uploads / "a.webp").write_bytes(b"x" * 10)
+    (uploads / "ab" / "cd" / "b.webp").write_bytes(b"x" * 20)
+
+    # Bez prvního přepočtu počítadlo neexistuje a změny se zahodí
+    await record_uploads_change(100, 1)
+    assert await crud_storage_usage.get_usage(db) == {}
+
+    await reconcile_storage_usage(str(uploads), str(tmp_path))
+    assert await _uploads(db) == (30, 2)
+    assert (await crud_storage_usage.get_usage(db))[APP_KEY].reconciled_at is not None
+
+    await record_uploads_change(100, 1)
+    await record_uploads_change(-10, -1)
+    assert await _uploads(db) == (120, 2)
+
+    # Přepočet srovná odchylku podle disku
+    await reconcile_storage_usage(str(uploads), str(tmp_path))
+    assert await _uploads(db) == (30, 2)
+
+
+async def test_upload_adds_stored_bytes_once(db, client, auth_headers):
+    before_bytes, before_files = await _uploads(db)
+    data = make_jpeg(color=(5, 160, 5))
+    body = client.post("/api/upload/", headers=auth_headers, files={"file": ("a.jpg", data, "image/jpeg")}).json()
+
+    media = await crud_media.get_media_by_url(db, body["url"])
+    added = sum(v["size"] for v in media.variants)
+    assert await _uploads(db) == (before_bytes + added, before_files + len(body["variants"]))
+
+    # Deduplikovaný upload nic nového na disk neuložil
+    client.post("/api/upload/", headers=auth_headers, files={"file": ("b.jpg", data, "image/jpeg")})
+    assert await _uploads(db) == (before_bytes + added, before_files + len(body["variants"]))
+
@@ -0,0 +1,57 @@
+import pytest
+
+from app.api.v1 import upload
+from app.core.config import settings
+from tests.conftest import make_jpeg
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def audit(monkeypatch):
+    entries = []
+
+    async def log_activity(**entry):
+        entries.append(entry)
+
+    monkeypatch.setattr(upload, "log_activity", log_activity)
+    return entries
+
+
+async def test_one_bad_file_does_not_fail_the_batch(client, auth_headers, admin, audit):
+    files = [
+        ("files", ("dobry.jpg", make_jpeg(color=(1, 2, 3)), "image/jpeg")),
+        ("files", ("poznamky.txt", b"nejsem obrazek", "text/plain")),
+        ("files", ("rozbity.jpg", b"\xff\xd8 poskozeny obsah", "image/jpeg")),
+        ("files", ("druhy.jpg", make_jpeg(color=(9, 8, 7)), "image/jpeg")),
+    ]
+    response = client.post("/api/upload/batch", headers=auth_headers, files=files)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["uploaded"], body["failed"]) == (2, 2)
+    # Výsledky ve stejném pořadí jako soubory
+    assert [(item["filename"], item["ok"]) for item in body["items"]] == [
+        ("dobry.jpg", True), ("poznamky.txt", False), ("rozbity.jpg", False), ("druhy.jpg", True),
+    ]
+    assert body["items"][0]["result"]["url"].startswith("/uploads/")
+    assert body["items"][1]["error"] == "Soubor není obrázek."
+    assert body["items"][2]["error"] and not body["items"][2]["retryable"]
+
+    # Jeden souhrnný záznam za dávku, jen s úspěšnými soubory
+    (entry,) = audit
+    assert entry["action"] == "UPLOAD_BATCH" and entry["user_id"] == admin.id
+    assert (entry["payload"]["uploaded"], entry["payload"]["files"]) == (2, 4)
+
+
+async def test_batch_limit_and_busy_engine(client, auth_headers, audit, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_BATCH_MAX_FILES", 1)
+    files = [("files", (f"{i}.jpg", make_jpeg(), "image/jpeg")) for i in range(2)]
+    assert client.post("/api/upload/batch", headers=auth_headers, files=files).status_code == 400
+
+    # Přetížený engine: soubor je označený k opakování, žádný audit záznam
+    monkeypatch.setattr(settings, "UPLOAD_BATCH_MAX_FILES", 10)
+    monkeypatch.setattr(upload.image_engine, "_pending", upload.image_engine.capacity)
+    response = client.post("/api/upload/batch", headers=auth_headers, files=files[:1])
+    assert response.json()["items"][0]["retryable"] is True
+    assert audit == []
@@ -0,0 +1,102 @@
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.crud import crud_system_state
+from app.models.category import Category
+from app.models.content_item import ContentItem
+from app.models.media_file import MediaFile
+from app.services import image_service, upload_gc
+
+pytestmark = pytest.mark.anyio
+
+OLD = time.time() - 48 * 3600
+
+
+@pytest.fixture
+def uploads(tmp_path, monkeypatch):
+    """Vlastní složka uploads/ (ať úklid nevidí soubory z jiných testů)."""
+    root = tmp_path / "uploads"
+    root.mkdir()
+    monkeypatch.setattr(upload_gc, "UPLOAD_DIR", str(root))
+    monkeypatch.setattr(image_service, "UPLOAD_DIR", str(root))
+    monkeypatch.setattr(settings, "UPLOAD_GC_GRACE_HOURS", 24)
+
+    def add(relpath: str, mtime: float = OLD) -> str:
+        path = root / relpath
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x" * 10)
+        os.utime(path, (mtime, mtime))
+        return relpath
+
+    def exists(relpath: str) -> bool:
+        return (root / relpath).exists()
+
+    return SimpleNamespace(add=add, exists=exists)
+
+
+async def test_only_old_unreferenced_files_are_deleted(db, uploads):
+    kept = [
+        uploads.add("ab/cd/abcd0001.webp"),
+        uploads.add("ab/cd/abcd0001-320w.webp"),  # Varianta odkazovaného obrázku
+        uploads.add("ef/01/ef010002.webp"),  # Odkazovaný starou plochou URL
+        uploads.add("12/34/12340003.png"),  # Ikona kategorie
+        uploads.add("56/78/56780004.webp", mtime=time.time()),  # Čerstvý upload, formulář ještě neuložen
+        uploads.add(".gitkeep"),
+    ]
+    deleted = [
+        uploads.add("9a/bc/9abc0005.webp"),
+        uploads.add("9a/bc/9abc0005-320w.webp"),
+        uploads.add("legacy.jpg"),
+    ]
+    db.add_all([
+        ContentItem(title="A", slug="a", image_url="/uploads/ab/cd/abcd0001.webp"),
+        Category(name="B", slug="b", image_path="/uploads/ef010002.webp", icon_path="/uploads/12/34/12340003.png"),
+        MediaFile(
+            url="/uploads/9a/bc/9abc0005.webp", filename="9a/bc/9abc0005.webp", width=1, height=1,
+            variants=[{"filename": "9a/bc/9abc0005-320w.webp"}, {"filename": "9a/bc/9abc0005.webp"}],
+        ),
+    ])
+    await db.commit()
+
+    run = await upload_gc.run_upload_gc(db, time_budget=60, dry_run=False)
+
+    assert run["finished_pass"] and run["deleted"] == 3
+    assert all(uploads.exists(name) for name in kept)
+    assert not any(uploads.exists(name) for name in deleted)
+    # Evidence smazaného obrázku zmizela spolu se soubory
+    assert (await db.execute(select(MediaFile))).scalars().all() == []
+
+
+async def test_dry_run_only_reports(db, uploads):
+    uploads.add("9a/bc/9abc0005.webp")
+    uploads.add("legacy.jpg")
+
+    run = await upload_gc.run_upload_gc(db, time_budget=60, dry_run=True)
+
+    assert (run["orphans"], run["deleted"]) == (2, 0)
+    assert uploads.exists("9a/bc/9abc0005.webp") and uploads.exists("legacy.jpg")
+    last_pass = (await crud_system_state.get_state(db, upload_gc.STATE_KEY))["last_pass"]
+    assert last_pass["dry_run"] and sorted(last_pass["sample"]) == ["9a/bc/9abc0005.webp", "legacy.jpg"]
+
+
+async def test_pass_resumes_from_cursor(db, uploads, monkeypatch):
+    names = [uploads.add(name) for name in ("a.jpg", "b.jpg", "00/11/00110001.webp", "ff/ee/ffee0001.webp")]
+    monkeypatch.setattr(settings, "UPLOAD_GC_BATCH_SIZE", 2)
+    # Hodiny po krocích: rozpočet 2 = právě jedna dávka na spuštění
+    clock = iter(range(10**9))
+    monkeypatch.setattr(upload_gc, "time", SimpleNamespace(time=time.time, monotonic=lambda: next(clock)))
+
+    first = await upload_gc.run_upload_gc(db, time_budget=2, dry_run=False)
+    assert (first["scanned"], first["finished_pass"]) == (2, False)
+    assert (await crud_system_state.get_state(db, upload_gc.STATE_KEY))["cursor"] == "b.jpg"
+    assert not uploads.exists("a.jpg") and uploads.exists("00/11/00110001.webp")
+
+    second = await upload_gc.run_upload_gc(db, time_budget=2, dry_run=False)
+    third = await upload_gc.run_upload_gc(db, time_budget=2, dry_run=False)
+    assert second["scanned"] == 2 and third["finished_pass"]
+    assert not any(uploads.exists(name) for name in names)
@@ -0,0 +1,75 @@
+import pytest
+from sqlalchemy import select
+
+from app.crud import crud_system_state
+from app.models.category import Category
+from app.models.content_item import ContentItem, ContentPhoto
+from app.models.media_file import MediaFile
+from app.services import image_service, upload_migration
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def uploads(tmp_path, monkeypatch):
+    root = tmp_path / "uploads"
+    root.mkdir()
+    monkeypatch.setattr(upload_migration, "UPLOAD_DIR", str(root))
+    monkeypatch.setattr(image_service, "UPLOAD_DIR", str(root))
+    return root
+
+
+async def test_flat_files_move_and_urls_are_rewritten(db, uploads):
+    for name in ("abcd0001.webp", "abcd0001-320w.webp", "ef010002.webp", "logo.png", ".gitkeep"):
+        (uploads / name).write_bytes(name.encode())
+    # Obsahově adresovaný soubor už na novém místě je -> plochá kopie jen zmizí
+    (uploads / "ef" / "01").mkdir(parents=True)
+    (uploads / "ef" / "01" / "ef010002.webp").write_bytes(b"ef010002.webp")
+
+    item = ContentItem(title="A", slug="a", image_url="/uploads/abcd0001.webp")
+    category = Category(name="B", slug="b", image_path="/uploads/ef010002.webp", icon_path="/uploads/logo.png")
+    external = ContentItem(title="C", slug="c", image_url="https://cdn.example.com/abcd0001.webp")
+    media = MediaFile(
+        url="/uploads/abcd0001.webp", filename="abcd0001.webp", width=1, height=1,
+        variants=[{"filename": "abcd0001-320w.webp", "width": 320}, {"filename": "abcd0001.webp", "width": 1600}],
+    )
+    db.add_all([item, category, external, media])
+    await db.flush()
+    db.add(ContentPhoto(content_item_id=item.id, image_url="/uploads/abcd0001-320w.webp"))
+    await db.commit()
+    ids = {"item": item.id, "external": external.id, "category": category.id, "media": media.id}
+
+    report = await upload_migration.run_upload_migration(db, time_budget=60)
+
+    assert report["finished_at"] and (report["moved"], report["failed"]) == (4, 0)
+    assert sorted(p.name for p in uploads.iterdir() if p.is_file()) == [".gitkeep"]
+    assert (uploads / "ab" / "cd" / "abcd0001-320w.webp").read_bytes() == b"abcd0001-320w.webp"
+    logo = upload_migration.upload_relpath("logo.png")
+    assert (uploads / logo).exists()
+
+    db.expire_all()
+    assert (await db.get(ContentItem, ids["item"])).image_url == "/uploads/ab/cd/abcd0001.webp"
+    assert (await db.get(ContentItem, ids["external"])).image_url == "https://cdn.example.com/abcd0001.webp"
+    category = await db.get(Category, ids["category"])
+    assert (category.image_path, category.icon_path) == ("/uploads/ef/01/ef010002.webp", f"/uploads/{logo}")
+    photo = (await db.execute(select(ContentPhoto))).scalar_one()
+    assert photo.image_url == "/uploads/ab/cd/abcd0001-320w.webp"
+    media = await db.get(MediaFile, ids["media"])
+    assert (media.url, media.filename) == ("/uploads/ab/cd/abcd0001.webp", "ab/cd/abcd0001.webp")
+    assert [v["filename"] for v in media.variants] == ["ab/cd/abcd0001-320w.webp", "ab/cd/abcd0001.webp"]
+
+    # Hotová migrace už nic nedělá
+    assert (await crud_system_state.get_state(db, upload_migration.STATE_KEY))["done"]
+    assert await upload_migration.run_upload_migration(db, time_budget=60) is None
+
+
+async def test_moved_file_is_found_by_old_url(uploads):
+    (uploads / "abcd0001.webp").write_bytes(b"data")
+    assert image_service.resolve_upload_path("abcd0001.webp") == str(uploads / "abcd0001.webp")
+
+    upload_migration._move_files(["abcd0001.webp"])
+
+    # Stará plochá i nová URL vedou na stejný soubor
+    expected = str(uploads / "ab" / "cd" / "abcd0001.webp")
+    assert image_service.resolve_upload_path("abcd0001.webp") == expected
+    assert image_service.resolve_upload_path("ab/cd/abcd0001.webp") == expected
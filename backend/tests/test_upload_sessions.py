@@ -0,0 +1,90 @@
+import pytest
+
+from app.core.security import create_access_token, get_password_hash
+from app.models.user import User
+from tests.conftest import make_jpeg
+
+pytestmark = pytest.mark.anyio
+
+
+def _create(client, headers, data: bytes) -> str:
+    response = client.post("/api/upload/sessions", headers=headers, json={
+        "filename": "foto.jpg", "content_type": "image/jpeg", "total_size": len(data),
+    })
+    assert response.status_code == 201
+    assert response.json()["offset"] == 0
+    return response.json()["upload_id"]
+
+
+def _put(client, headers, upload_id: str, offset: int, chunk: bytes, **extra):
+    return client.put(
+        f"/api/upload/sessions/{upload_id}",
+        headers={**headers, "Upload-Offset": str(offset), **extra},
+        content=chunk,
+    )
+
+
+async def test_chunked_upload_resume_and_complete(client, auth_headers):
+    data = make_jpeg()
+    upload_id = _create(client, auth_headers, data)
+    half = len(data) // 2
+
+    assert _put(client, auth_headers, upload_id, 0, data[:half]).json()["offset"] == half
+
+    # Po výpadku spojení klient zjistí, kde pokračovat
+    status = client.get(f"/api/upload/sessions/{upload_id}", headers=auth_headers)
+    assert status.headers["Upload-Offset"] == str(half)
+
+    assert _put(client, auth_headers, upload_id, half, data[half:]).json()["offset"] == len(data)
+
+    response = client.post(f"/api/upload/sessions/{upload_id}/complete", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["url"].startswith("/uploads/")
+
+    # Hotová session zmizí
+    assert client.get(f"/api/upload/sessions/{upload_id}", headers=auth_headers).status_code == 404
+
+
+async def test_wrong_offset_reports_server_offset(client, auth_headers):
+    data = make_jpeg()
+    upload_id = _create(client, auth_headers, data)
+    _put(client, auth_headers, upload_id, 0, data[:100])
+
+    response = _put(client, auth_headers, upload_id, 50, data[50:200])
+    assert response.status_code == 409
+    assert response.headers["Upload-Offset"] == "100"
+
+
+async def test_incomplete_upload_cannot_complete(client, auth_headers):
+    data = make_jpeg()
+    upload_id = _create(client, auth_headers, data)
+    _put(client, auth_headers, upload_id, 0, data[:100])
+
+    response = client.post(f"/api/upload/sessions/{upload_id}/complete", headers=auth_headers)
+    assert response.status_code == 409
+    assert response.headers["Upload-Offset"] == "100"
+
+
+async def test_chunk_past_total_size_rejected(client, auth_headers):
+    data = make_jpeg()
+    upload_id = _create(client, auth_headers, data)
+    assert _put(client, auth_headers, upload_id, 0, data + b"navic").status_code == 413
+
+
+async def test_malformed_content_length_is_bad_request(client, auth_headers):
+    data = make_jpeg()
+    upload_id = _create(client, auth_headers, data)
+    response = _put(client, auth_headers, upload_id, 0, data[:100], **{"Content-Length": "abc"})
+    assert response.status_code == 400
+
+    response = client.post("/api/upload", headers={**auth_headers, "Content-Length": "1e9"}, content=b"x")
+    assert response.status_code == 400
+
+
+async def test_other_users_session_not_found(client, auth_headers, db):
+    db.add(User(email="jiny@example.com", hashed_password=get_password_hash("x"), is_active=True))
+    await db.commit()
+    other = {"Authorization": f"Bearer {create_access_token({'sub': 'jiny@example.com'})}"}
+
+    upload_id = _create(client, auth_headers, make_jpeg())
+    assert client.get(f"/api/upload/sessions/{upload_id}", headers=other).status_code == 404
@@ -0,0 +1,75 @@
+import asyncio
+import os
+
+import pytest
+
+from app.services import variant_cache as variant_cache_module
+from app.services.variant_cache import VariantCache
+
+pytestmark = pytest.mark.anyio
+
+VARIANT_BYTES = 100
+
+
+@pytest.fixture
+def renders(monkeypatch):
+    """Render bez Pillow a process poolu: zapíše VARIANT_BYTES bajtů, volání se počítají."""
+    calls = []
+    gate = asyncio.Event()
+    gate.set()
+
+    async def run(fn, source, path, width, quality, fmt):
+        calls.append(path)
+        await gate.wait()
+        with open(path, "wb") as out:
+            out.write(b"x" * VARIANT_BYTES)
+        return VARIANT_BYTES
+
+    monkeypatch.setattr(variant_cache_module.image_engine, "run", run)
+    return calls, gate
+
+
+async def test_concurrent_requests_share_one_render(tmp_path, renders):
+    calls, gate = renders
+    cache = VariantCache(str(tmp_path / "cache"), max_bytes=10_000)
+    gate.clear()
+
+    first = asyncio.create_task(cache.get("uploads/abc.webp", 320, 80, "webp"))
+    second = asyncio.create_task(cache.get("uploads/abc.webp", 320, 80, "webp"))
+    await asyncio.sleep(0.05)
+    gate.set()
+
+    assert await first == await second
+    assert len(calls) == 1
+    # Další request už jde z disku
+    assert await cache.get("uploads/abc.webp", 320, 80, "webp") == calls[0]
+    assert len(calls) == 1
+
+
+async def test_least_recently_used_variant_is_evicted(tmp_path, renders):
+    calls, _ = renders
+    cache = VariantCache(str(tmp_path / "cache"), max_bytes=2 * VARIANT_BYTES + 50)
+
+    a = await cache.get("uploads/a.webp", 320, 80, "webp")
+    b = await cache.get("uploads/b.webp", 320, 80, "webp")
+    await cache.get("uploads/a.webp", 320, 80, "webp")  # a je teď čerstvější než b
+    c = await cache.get("uploads/c.webp", 320, 80, "webp")
+
+    assert not os.path.exists(b)
+    assert os.path.exists(a) and os.path.exists(c)
+    assert await cache.peek("uploads/b.webp", 320, 80, "webp") is None
+
+    # Vyřazená varianta se při dalším requestu vyrenderuje znovu
+    await cache.get("uploads/b.webp", 320, 80, "webp")
+    assert calls.count(b) == 2
+
+
+async def test_index_survives_restart(tmp_path, renders):
+    calls, _ = renders
+    cache_dir = str(tmp_path / "cache")
+    path = await VariantCache(cache_dir, max_bytes=10_000).get("uploads/a.webp", 640, 80, "avif")
+
+    # Nový proces (jiný worker / restart) najde variantu na disku a nerenderuje
+    restarted = VariantCache(cache_dir, max_bytes=10_000)
+    assert await restarted.peek("uploads/a.webp", 640, 80, "avif") == path
+    assert len(calls) == 1
@@ -8,7 +8,7 @@ const AuditLogs = () => {
 
     // --- STAVY ---
     const [logs, setLogs] = useState([]);
-    const [page, setPage] = useState(0);      // stránka určující skip
+    const [page, setPage] = useState(0);      // pořadí načtené stránky (0 = od začátku)
     const [loading, setLoading] = useState(false);
     const [hasMore, setHasMore] = useState(true);
     const [separatorIndex, setSeparatorIndex] = useState(null);
@@ -21,6 +21,8 @@ const AuditLogs = () => {
 
     const LIMIT = 20;
     const abortControllerRef = useRef(null);
+    // Kurzor na další stránku (hlavička X-Next-Cursor z backendu)
+    const nextCursorRef = useRef(null);
 
     // --- FETCH FUNKCE ---
     const fetchLogs = async (isReset = false) => {
@@ -32,13 +34,15 @@ const AuditLogs = () => {
         setLoading(true);
 
         try {
-            const skip = page * LIMIT;
-
             const params = new URLSearchParams({
-                skip,
                 limit: LIMIT
             });
 
+            // Další stránky jdou přes kurzor (rychlé i hluboko v historii)
+            if (!isReset && nextCursorRef.current) {
+                params.append("cursor", nextCursorRef.current);
+            }
+
             if (filterEmail) params.append("email", filterEmail);
             if (filterAction) params.append("action", filterAction);
             if (dateFrom) params.append("date_from", dateFrom);
@@ -49,12 +53,13 @@ const AuditLogs = () => {
             });
 
             const newLogs = response.data;
+            nextCursorRef.current = response.headers["x-next-cursor"] || null;
 
             if (isReset) {
                 // NOVÉ HLEDÁNÍ
                 setLogs(newLogs);
                 setSeparatorIndex(null);
-                setHasMore(newLogs.length === LIMIT);
+                setHasMore(nextCursorRef.current !== null);
                 return;
             }
 
@@ -65,7 +70,7 @@ const AuditLogs = () => {
 
             setLogs(prev => [...prev, ...newLogs]);
 
-            if (newLogs.length < LIMIT) {
+            if (nextCursorRef.current === null) {
                 setHasMore(false);
             }
 
@@ -102,7 +107,7 @@ const AuditLogs = () => {
         if (e) e.preventDefault();
 
         setHasMore(true);
-        setPage(0);     // stránka 0 = skip 0
+        setPage(0);     // stránka 0 = od začátku
         fetchLogs(true); // reset fetch
     };
 
@@ -216,7 +221,7 @@ const AuditLogs = () => {
                                 <div className="audit-details">{log.details}</div>
                                 <div className="audit-meta">
                                     <small>
-                                        {log.user_email || `User ID: ${log.user_id}`}
+                                        {log.actor_email || (log.user_id ? `User ID: ${log.user_id}` : t("audit.system_actor"))}
                                     </small>
                                 </div>
                             </div>